@@ -0,0 +1,65 @@
+"""Runs benchmarks and compares them with a stored baseline.
+
+    python -m benchmarks run [-k PATTERN] [-o results.json]
+    python -m benchmarks compare [--baseline FILE] [--threshold 0.1] FILE
+
+Ratios are relative to the reference case timed in every run, see
+benchmarks/suite.py.
+"""
+
+import argparse
+import os
+import sys
+
+from benchmarks import suite
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def _print_result(name, seconds):
+    print('%-36s %12.2f us' % (name, seconds * 1e6))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='XJPath benchmarks.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='Run benchmarks.')
+    run_parser.add_argument('-k', '--pattern', default=None,
+                            help='Run only cases with names containing it.')
+    run_parser.add_argument('-r', '--repeat', type=int, default=5,
+                            help='Number of measurements of every case.')
+    run_parser.add_argument('-o', '--output', default=None,
+                            help='Where to write results as JSON.')
+
+    compare_parser = commands.add_parser(
+        'compare', help='Compare results with a baseline.')
+    compare_parser.add_argument('results', help='Results JSON file.')
+    compare_parser.add_argument('--baseline', default=BASELINE,
+                                help='Baseline JSON file.')
+    compare_parser.add_argument('--threshold', type=float, default=.1,
+                                help='Relative slowdown reported as a '
+                                'regression. Default is 0.1.')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = suite.run(args.pattern, args.repeat, _print_result)
+        if args.output:
+            suite.dump(results, args.output)
+        return 0
+
+    regressions = 0
+    for name, base, current, ratio, regressed in suite.compare(
+            suite.load(args.baseline), suite.load(args.results),
+            args.threshold):
+        regressions += regressed
+        print('%-36s %10.2f us %10.2f us %6.2fx%s' %
+              (name, base * 1e6, current * 1e6, ratio,
+               '  REGRESSION' if regressed else ''))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
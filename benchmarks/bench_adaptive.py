@@ -0,0 +1,71 @@
+"""Compares CompiledPath.lookup, generated functions and AdaptivePath.
+
+Documents of a steady shape are looked up by every variant and by a
+hand-written function, after AdaptivePath has specialized itself.
+
+Run from the repository root:
+
+    python benchmarks/bench_adaptive.py
+"""
+
+import timeit
+
+import xjpath
+from xjpath import codegen
+
+
+DOC = {'user': {'id': 1,
+                'profile': {'name': 'n', 'address': {'city': 'c'}},
+                'orders': [{'id': i, 'total': i * 1.5,
+                            'items': [{'sku': 's%d' % j} for j in range(3)]}
+                           for i in range(10)]}}
+
+
+def _city(doc):
+    try:
+        return doc['user']['profile']['address']['city'], True
+    except (KeyError, TypeError):
+        return None, False
+
+
+def _last_total(doc):
+    try:
+        total = doc['user']['orders'][-1]['total']
+    except (KeyError, IndexError, TypeError):
+        return None, False
+    if not isinstance(total, float):
+        raise xjpath.XJPathError('Not a float')
+    return total, True
+
+
+def _skus(doc):
+    orders = doc['user']['orders']
+    return tuple(tuple(item['sku'] for item in order['items'])
+                 for order in orders), True
+
+
+CASES = [
+    ('user.profile.address.city', _city, 1000000),
+    ('user.orders.@last.total%', _last_total, 1000000),
+    ('user.orders.*.items.*.sku', _skus, 100000),
+]
+
+
+def main():
+    for path, by_hand, number in CASES:
+        compiled = xjpath.compile(path).lookup
+        generated = codegen.compile_function(path)
+        adaptive = xjpath.AdaptivePath(path).lookup
+        for _ in range(10):
+            adaptive(DOC)
+        assert compiled(DOC) == generated(DOC) == adaptive(DOC) == \
+            by_hand(DOC)
+        timings = [timeit.timeit(lambda: lookup(DOC), number=number)
+                   for lookup in (compiled, generated, adaptive, by_hand)]
+        print('%-28s engine: %.3fs  generated: %.3fs  adaptive: %.3fs  '
+              'by hand: %.3fs  speedup: %.1fx' %
+              ((path,) + tuple(timings) + (timings[0] / timings[2],)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Compares reducing looked up tuples with xjpath.aggregate.
+
+Run from the repository root:
+
+    python benchmarks/bench_aggregate.py
+"""
+
+import heapq
+import timeit
+
+import xjpath
+
+
+DOC = {'orders': [{'total': i * 1.5,
+                   'items': [{'qty': j} for j in range(5)]}
+                  for i in range(20000)]}
+
+
+def main(number=20):
+    cases = [
+        ('orders.*.total%', 'sum',
+         lambda v: sum(v), None),
+        ('orders.*.total%', 'top',
+         lambda v: heapq.nlargest(10, v), 10),
+        ('orders.*.items.*.qty#', 'sum',
+         lambda v: sum(sum(items) for items in v), None),
+        ('orders.*.items.*', 'count',
+         lambda v: sum(len(items) for items in v), None),
+    ]
+    for path, func, reduce, k in cases:
+        def tuples():
+            return reduce(xjpath.strict_path_lookup(DOC, path))
+
+        def streaming():
+            return xjpath.aggregate(DOC, path, func, k)
+
+        assert tuples() == streaming()
+        tuples_time = timeit.timeit(tuples, number=number) / number
+        streaming_time = timeit.timeit(streaming, number=number) / number
+        print('%-24s %-6s tuples: %.4fs  aggregate: %.4fs  speedup: %.1fx' %
+              (path, func, tuples_time, streaming_time,
+               tuples_time / streaming_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Compares one CLI run per path with a single run with -p fields.
+
+Run from the repository root:
+
+    python benchmarks/bench_cli_fields.py
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from xjpath import cli
+
+
+FIELDS = ['id=id', 'user=user.name', 'country=user.address.country',
+          'latency=metrics.latency', 'status=metrics.status',
+          'tags=tags.*']
+
+
+def main(size=50000):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        input_file = os.path.join(tmp_dir, 'input.json')
+        output_file = os.path.join(tmp_dir, 'output')
+        with open(input_file, 'w') as f:
+            for i in range(size):
+                f.write(json.dumps({
+                    'id': i,
+                    'user': {'name': 'user %d' % i,
+                             'address': {'country': 'UA'}},
+                    'metrics': {'latency': i * .5, 'status': 200},
+                    'tags': ['a', 'b']}))
+                f.write('\n')
+        common = ['-i', input_file, '-o', output_file, '-m']
+
+        started = time.time()
+        for field in FIELDS:
+            cli.main(common + [field.partition('=')[2]])
+        per_path = time.time() - started
+
+        started = time.time()
+        for field in FIELDS:
+            common += ['-p', field]
+        cli.main(common + ['-f', 'csv'])
+        fields = time.time() - started
+        print('%d lines, %d paths  one run per path: %.3fs  '
+              '-p fields to csv: %.3fs  speedup: %.1fx' %
+              (size, len(FIELDS), per_path, fields, per_path / fields))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Compares CompiledPath.lookup with generated lookup functions.
+
+Run from the repository root:
+
+    python benchmarks/bench_codegen.py
+"""
+
+import timeit
+
+import xjpath
+from xjpath import codegen
+
+
+SECTIONS = ('profile', 'settings', 'billing', 'stats', 'audit')
+
+DOC = {'user': {'id': 1,
+                'account': dict((section, {'fields': dict(
+                    ('f%d' % i, i) for i in range(10))})
+                    for section in SECTIONS),
+                'orders': [{'id': i, 'total': i * 1.5,
+                            'items': [{'sku': 's%d' % j, 'qty': j}
+                                      for j in range(3)]}
+                           for i in range(10)]}}
+
+# 100 paths in the shapes seen in production configs.
+PATHS = (['user.id#', 'user.missing.key', 'user.orders.*.id',
+          'user.orders.*.total%', 'user.orders.*.items.*.sku',
+          'user.orders.*.items.@last.qty', 'user.orders.@first.id',
+          'user.orders.@-1.items.@0.sku$', 'user.account{}.stats{}',
+          'user.orders.@20.id'] +
+         ['user.account.%s.fields.f%d' % (section, i)
+          for section in SECTIONS for i in range(10)] +
+         ['user.account.%s.fields.f%d#' % (section, i)
+          for section in SECTIONS for i in range(8)])
+
+
+def main(number=2000):
+    compiled = [xjpath.compile(p).lookup for p in PATHS]
+    generated = [codegen.compile_function(p) for p in PATHS]
+    for lookup, func in zip(compiled, generated):
+        assert lookup(DOC) == func(DOC)
+    engine = timeit.timeit(
+        lambda: [lookup(DOC) for lookup in compiled], number=number)
+    functions = timeit.timeit(
+        lambda: [func(DOC) for func in generated], number=number)
+    print('%d paths  engine: %.3fs  generated: %.3fs  speedup: %.1fx' %
+          (len(PATHS), engine, functions, engine / functions))
+
+
+if __name__ == '__main__':
+    main()
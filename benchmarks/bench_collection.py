@@ -0,0 +1,46 @@
+"""Compares indexed collection queries with scanning all documents.
+
+Run from the repository root:
+
+    python benchmarks/bench_collection.py
+"""
+
+import timeit
+
+import xjpath
+
+
+def documents(count=50000, owners=1000):
+    return [{'spec': {'owner': {'id': 'u%d' % (i % owners)},
+                      'replicas': i % 17,
+                      'tags': ['t%d' % (i % 7), 't%d' % (i % 11)]}}
+            for i in range(count)]
+
+
+def scan(docs, path, value):
+    lookup = xjpath.compile(path).lookup
+    return [i for i, doc in enumerate(docs) if lookup(doc) == (value, True)]
+
+
+def main(number=20):
+    docs = documents()
+    collection = xjpath.XJPathCollection(docs)
+    collection.add_index('spec.owner.id')
+    collection.add_index('spec.replicas', ordered=True)
+    collection.add_index('spec.tags.*')
+    assert scan(docs, 'spec.owner.id', 'u7') == collection.find(
+        'spec.owner.id', 'u7')
+
+    scanned = timeit.timeit(lambda: scan(docs, 'spec.owner.id', 'u7'),
+                            number=number)
+    indexed = timeit.timeit(lambda: collection.find('spec.owner.id', 'u7'),
+                            number=number)
+    ranged = timeit.timeit(
+        lambda: collection.find_range('spec.replicas', 3, 4), number=number)
+    print('%d documents  scan: %.5fs  find: %.5fs  find_range: %.5fs '
+          'per query' % (len(docs), scanned / number, indexed / number,
+                         ranged / number))
+
+
+if __name__ == '__main__':
+    main()
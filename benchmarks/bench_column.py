@@ -0,0 +1,35 @@
+"""Compares a Python loop of strict lookups with lookup_column.
+
+Run from the repository root:
+
+    python benchmarks/bench_column.py
+"""
+
+import time
+
+import xjpath
+
+
+def main(size=500000):
+    docs = [{'metrics': {'latency': i * .5}} if i % 10 else {}
+            for i in range(size)]
+
+    started = time.time()
+    loop_values = []
+    for doc in docs:
+        try:
+            loop_values.append(
+                xjpath.strict_path_lookup(doc, 'metrics.latency%'))
+        except xjpath.XJPathError:
+            loop_values.append(0.)
+    loop = time.time() - started
+
+    started = time.time()
+    xjpath.lookup_column(docs, 'metrics.latency%')
+    batch = time.time() - started
+    print('%d docs  loop: %.3fs  lookup_column: %.3fs  speedup: %.1fx' %
+          (size, loop, batch, loop / batch))
+
+
+if __name__ == '__main__':
+    main()
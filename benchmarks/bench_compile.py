@@ -0,0 +1,189 @@
+"""Compares the recursive engine that split a path on every lookup with
+parsing a path per lookup, cached string lookups and lookups through a
+compiled path.
+
+The speedup is of a compiled path over the recursive engine, a copy of
+which is kept below as it was before paths were compiled.
+
+Run from the repository root:
+
+    python benchmarks/bench_compile.py
+"""
+
+import timeit
+
+import xjpath
+
+
+DOC = {'data': {'users': [{'id': i, 'profile': {'name': 'user%d' % i,
+                                                 'geo': {'lat': .5}}}
+                          for i in range(10)]}}
+
+PATHS = ['data.users.@first.profile.name$',
+         'data.users.@last.profile.geo.lat%',
+         'data.users.*.id#']
+
+
+# The recursive engine, create_dict_path support left out.
+
+_KEY_SPLIT = {
+    '$': str,
+    '#': int,
+    '%': float,
+    '{}': dict,
+    '[]': list,
+    '()': tuple,
+}
+
+
+def _split(inp_str, sep_char, maxsplit=-1, escape_char='\\'):
+    word_chars = []
+    word_chars_append = word_chars.append
+    inp_str_iter = iter(inp_str)
+    for c in inp_str_iter:
+        word_chars_append(c)
+        if c == escape_char:
+            try:
+                next_char = next(inp_str_iter)
+            except StopIteration:
+                continue
+            if next_char == sep_char:
+                word_chars[-1] = next_char
+            else:
+                word_chars.append(next_char)
+        elif c == sep_char:
+            word_chars.pop()
+            yield ''.join(word_chars)
+            maxsplit -= 1
+            if maxsplit == 0:
+                yield ''.join(inp_str_iter)
+                return
+            del word_chars[:]
+    yield ''.join(word_chars)
+
+
+def _unescape(in_str, escape_char='\\'):
+    str_iter = iter(in_str)
+    chars = []
+    chars_append = chars.append
+    try:
+        for c in str_iter:
+            if c == escape_char:
+                chars_append(next(str_iter))
+            else:
+                chars_append(c)
+    except StopIteration:
+        pass
+    return ''.join(chars)
+
+
+def _clean_key_type(key_name, escape_char='\\'):
+    for i in (2, 1):
+        if len(key_name) < i:
+            return None, key_name
+        type_v = key_name[-i:]
+        if type_v in _KEY_SPLIT:
+            if len(key_name) <= i:
+                return _KEY_SPLIT[type_v], ''
+            esc_cnt = 0
+            for pos in range(-i - 1, -len(key_name) - 1, -1):
+                if key_name[pos] == escape_char:
+                    esc_cnt += 1
+                else:
+                    break
+            if esc_cnt % 2 == 0:
+                return _KEY_SPLIT[type_v], key_name[:-i]
+            return None, key_name
+    return None, key_name
+
+
+def _get_array_index(array_path):
+    array_path = array_path[1:]
+    if array_path == 'last':
+        return -1
+    if array_path == 'first':
+        return 0
+    return int(array_path)
+
+
+def _full_sub_array(data_obj, xj_path):
+    if isinstance(data_obj, list):
+        items = data_obj
+    elif isinstance(data_obj, dict):
+        items = data_obj.values()
+    else:
+        return None, False
+    if not xj_path:
+        return tuple(items), True
+    res = []
+    for d in items:
+        val, exists = recursive_lookup(d, xj_path)
+        if exists:
+            res.append(val)
+    return tuple(res), True
+
+
+def _single_array_element(data_obj, xj_path, array_path):
+    val_type, array_path = _clean_key_type(array_path)
+    array_idx = _get_array_index(array_path)
+    if data_obj and isinstance(data_obj, (list, tuple)):
+        try:
+            value = data_obj[array_idx]
+        except IndexError:
+            return None, False
+        if val_type is not None and not isinstance(value, val_type):
+            raise xjpath.XJPathError('Index array type mismatch')
+        if xj_path:
+            return recursive_lookup(value, xj_path)
+        return value, True
+    if val_type is not None:
+        raise xjpath.XJPathError('Expected the list element type')
+    return None, False
+
+
+def recursive_lookup(data_obj, xj_path):
+    """path_lookup as it was before paths were compiled."""
+
+    if not xj_path or xj_path == '.':
+        return data_obj, True
+    res = list(_split(xj_path, '.', maxsplit=1))
+    top_key = res[0]
+    leftover = res[1] if len(res) > 1 else None
+    if top_key == '*':
+        return _full_sub_array(data_obj, leftover)
+    if top_key.startswith('@'):
+        return _single_array_element(data_obj, leftover, top_key)
+    val_type, top_key = _clean_key_type(top_key)
+    top_key = _unescape(top_key)
+    if top_key not in data_obj:
+        if val_type is not None and not isinstance(data_obj, dict):
+            raise xjpath.XJPathError('Accessed object must be a dict type')
+        return None, False
+    value = data_obj[top_key]
+    if val_type is not None and not isinstance(value, val_type):
+        raise xjpath.XJPathError('Key type mismatch')
+    if leftover:
+        return recursive_lookup(value, leftover)
+    return value, True
+
+
+def main(number=20000):
+    for path in PATHS:
+        compiled = xjpath.compile(path)
+        assert recursive_lookup(DOC, path) == compiled.lookup(DOC)
+        recursive = timeit.timeit(
+            lambda: recursive_lookup(DOC, path), number=number)
+        interpreted = timeit.timeit(
+            lambda: xjpath.CompiledPath(path).lookup(DOC), number=number)
+        cached = timeit.timeit(
+            lambda: xjpath.path_lookup(DOC, path), number=number)
+        precompiled = timeit.timeit(
+            lambda: compiled.lookup(DOC), number=number)
+        print('%-36s recursive: %.3fs  parse: %.3fs  string: %.3fs  '
+              'compiled: %.3fs  speedup: %.1fx' %
+              (path, recursive, interpreted, cached, precompiled,
+               recursive / precompiled))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compares '**' descendant lookups with chained '*' paths.
+
+Run from the repository root:
+
+    python benchmarks/bench_descendant.py
+"""
+
+import itertools
+import sys
+import timeit
+
+import xjpath
+
+
+def wide_document(events=100000, payloads=3):
+    return {'events': [{'payload': [{'id': i * payloads + j}
+                                    for j in range(payloads)]}
+                       for i in range(events)]}
+
+
+def deep_document(depth):
+    doc = value = {}
+    for _ in range(depth):
+        value['n'] = {}
+        value = value['n']
+    value['id'] = depth
+    return doc
+
+
+def bench(title, func, number):
+    seconds = timeit.timeit(func, number=number)
+    print('%-50s %.4fs per lookup' % (title, seconds / number))
+
+
+def main():
+    wide = wide_document()
+    for path in ('events.*.payload.*.id', 'events.**.id', 'events.**3.id'):
+        compiled = xjpath.compile(path)
+        bench('%s, 100k events' % path, lambda: compiled.lookup(wide), 5)
+    compiled = xjpath.compile('events.**.id')
+    bench('events.**.id, first 10 values', lambda: list(
+        itertools.islice(compiled.iter_lookup(wide, True), 10)), 1000)
+
+    depth = sys.getrecursionlimit() * 2
+    deep = deep_document(depth)
+    for title, path in (('n.n.(...).id', '.'.join(['n'] * depth + ['id'])),
+                        ('**.id', '**.id')):
+        compiled = xjpath.compile(path)
+        bench('%s, depth %d' % (title, depth),
+              lambda: compiled.lookup(deep), 100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Measures the lookup engine on wide and deep documents.
+
+Run from the repository root:
+
+    python benchmarks/bench_engine.py
+"""
+
+import sys
+import timeit
+
+import xjpath
+
+
+def wide_document(events=100000, payloads=3):
+    return {'events': [{'payload': [{'id': i * payloads + j}
+                                    for j in range(payloads)]}
+                       for i in range(events)]}
+
+
+def deep_document(depth):
+    doc = value = {}
+    for _ in range(depth):
+        value['n'] = {}
+        value = value['n']
+    value['id'] = depth
+    return doc
+
+
+def bench(title, doc, path, number):
+    compiled = xjpath.compile(path)
+    seconds = timeit.timeit(lambda: compiled.lookup(doc), number=number)
+    print('%-50s %.4fs per lookup' % (title, seconds / number))
+
+
+def main():
+    bench('events.*.payload.*.id, 100k events',
+          wide_document(), 'events.*.payload.*.id', 5)
+    bench('events.*.payload.@last.id, 100k events',
+          wide_document(), 'events.*.payload.@last.id', 5)
+    depth = sys.getrecursionlimit() * 2
+    bench('n.n.(...).id, depth %d' % depth,
+          deep_document(depth), '.'.join(['n'] * depth + ['id']), 100)
+
+
+if __name__ == '__main__':
+    main()
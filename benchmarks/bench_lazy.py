@@ -0,0 +1,70 @@
+"""Compares decoding a whole JSON blob with LazyDocument lookups.
+
+The first lookups into a LazyDocument scan the structure of containers
+they go through, later ones reuse the offset indexes.
+
+Run from the repository root:
+
+    python benchmarks/bench_lazy.py
+"""
+
+import json
+import timeit
+import tracemalloc
+
+import xjpath
+
+
+DOC = {'meta': {'version': '1.2', 'owner': 'me'},
+       'records': [{'id': i, 'name': 'record %d' % i,
+                    'tags': ['t%d' % j for j in range(5)],
+                    'attrs': {'x': i * .5, 'y': None}}
+                   for i in range(10000)]}
+
+PATHS = ['meta.version', 'records.@-1.id', 'records.@5000.attrs.x']
+
+
+def _peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(number=20):
+    text = json.dumps(DOC).encode()
+    compiled = [xjpath.compile(p) for p in PATHS]
+
+    def decode_all():
+        doc = json.loads(text)
+        return [p.lookup(doc) for p in compiled]
+
+    def lazy():
+        doc = xjpath.LazyDocument(text)
+        return [p.lookup(doc) for p in compiled]
+
+    assert decode_all() == lazy()
+    print('%d paths, %d bytes' % (len(PATHS), len(text)))
+    loads = timeit.timeit(decode_all, number=number) / number
+    lazy_time = timeit.timeit(lazy, number=number) / number
+    print('first lookups   json.loads: %.4fs  lazy: %.4fs' %
+          (loads, lazy_time))
+
+    decoded = json.loads(text)
+    doc = xjpath.LazyDocument(text)
+    lazy()
+    repeat = number * 1000
+    loads = timeit.timeit(lambda: [p.lookup(decoded) for p in compiled],
+                          number=repeat) / repeat
+    lazy_time = timeit.timeit(lambda: [p.lookup(doc) for p in compiled],
+                              number=repeat) / repeat
+    print('indexed lookups decoded: %.2fus  lazy: %.2fus' %
+          (loads * 1e6, lazy_time * 1e6))
+    print('peak memory     json.loads: %.1fMB  lazy: %.1fMB' %
+          (_peak_memory(decode_all) / 1e6, _peak_memory(lazy) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Compares re-running every watch after a write with TrackedDocument.
+
+Run from the repository root:
+
+    python benchmarks/bench_observe.py
+"""
+
+import copy
+import time
+
+import xjpath
+from xjpath.observe import TrackedDocument
+
+
+def _state():
+    return {'clusters': dict(
+        ('c%d' % i, {'nodes': dict(('n%d' % j, {'cpu': j, 'up': True})
+                                   for j in range(20)),
+                     'version': 1})
+        for i in range(50))}
+
+
+def main(writes=2000):
+    paths = ['clusters.c%d.version' % i for i in range(50)]
+    paths += ['clusters.c%d.nodes.*.cpu' % i for i in range(50)]
+    paths += ['clusters.c%d.nodes.n%d.up' % (i, i % 20) for i in range(100)]
+    paths += ['clusters.*.version'] * 10
+    updates = [('clusters.c%d.nodes.n%d.cpu' % (i % 50, i % 20), i)
+               for i in range(writes)]
+
+    state = _state()
+    compiled = [xjpath.compile(path) for path in paths]
+    changes = 0
+    started = time.time()
+    for path, value in updates:
+        old = [copy.deepcopy(p.lookup(state)) for p in compiled]
+        xjpath.path_set(state, path, value)
+        changes += sum(p.lookup(state) != res
+                       for p, res in zip(compiled, old))
+    naive = time.time() - started
+
+    doc = TrackedDocument(_state())
+    notified = []
+    for path in paths:
+        doc.subscribe(path, notified.append)
+    started = time.time()
+    for path, value in updates:
+        doc.set(path, value)
+    tracked = time.time() - started
+    assert changes == len(notified)
+    print('%d watches, %d writes  re-run all: %.3fs  tracked: %.3fs  '
+          'speedup: %.1fx' % (len(paths), writes, naive, tracked,
+                              naive / tracked))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Compares path_lookup with parallel_lookup on growing documents.
+
+Run from the repository root:
+
+    python benchmarks/bench_parallel.py [workers]
+
+Prints timings for every document size and the smallest size where the
+pool of forked workers is faster than the serial lookup. A pool cannot
+win on a single CPU, there the benchmark shows its fixed overhead.
+"""
+
+import os
+import sys
+import timeit
+
+import xjpath
+from xjpath import parallel
+
+
+PATH = 'records.*.attrs.*.value'
+
+
+def _doc(size):
+    return {'records': [{'id': i,
+                         'attrs': [{'value': i * j} for j in range(8)]}
+                        for i in range(size)]}
+
+
+def main(workers=None, number=3):
+    workers = workers or os.cpu_count() or 1
+    print('workers: %d, CPUs: %d' % (workers, os.cpu_count() or 1))
+    break_even = None
+    for size in (1000, 10000, 50000, 200000):
+        doc = _doc(size)
+
+        def serial():
+            return xjpath.path_lookup(doc, PATH)
+
+        def pool():
+            return parallel.parallel_lookup(doc, PATH, workers=workers,
+                                            min_size=0)
+
+        assert serial() == pool()
+        serial_time = timeit.timeit(serial, number=number) / number
+        pool_time = timeit.timeit(pool, number=number) / number
+        if break_even is None and pool_time < serial_time:
+            break_even = size
+        print('%7d records  serial: %.4fs  parallel: %.4fs  speedup: %.2fx' %
+              (size, serial_time, pool_time, serial_time / pool_time))
+    if break_even is None:
+        print('parallel lookups were not faster at any size')
+    else:
+        print('break-even below %d records (min_size defaults to %d)' %
+              (break_even, parallel.DEFAULT_MIN_SIZE))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,42 @@
+"""Compares looking up many paths one by one with a single PathSet walk.
+
+Run from the repository root:
+
+    python benchmarks/bench_pathset.py
+"""
+
+import timeit
+
+import xjpath
+
+
+SECTIONS = ('profile', 'settings', 'billing', 'stats')
+
+DOC = {'user': {'id': 1,
+                'account': dict((section, {'fields': dict(
+                    ('f%d' % i, i) for i in range(10))})
+                    for section in SECTIONS),
+                'orders': [{'id': i, 'total': i * 1.5,
+                            'items': [{'sku': 's%d' % j, 'qty': j}
+                                      for j in range(3)]}
+                           for i in range(10)]}}
+
+PATHS = (['user.id#', 'user.missing.key', 'user.orders.*.id',
+          'user.orders.*.total', 'user.orders.*.items.*.sku',
+          'user.orders.*.items.*.qty', 'user.orders.@first.id'] +
+         ['user.account.%s.fields.f%d' % (section, i)
+          for section in SECTIONS for i in range(10)])
+
+
+def main(number=5000):
+    compiled = [xjpath.compile(p) for p in PATHS]
+    path_set = xjpath.PathSet(PATHS)
+    one_by_one = timeit.timeit(
+        lambda: [p.lookup(DOC) for p in compiled], number=number)
+    single_walk = timeit.timeit(lambda: path_set.lookup(DOC), number=number)
+    print('%d paths  one by one: %.3fs  path set: %.3fs  speedup: %.1fx' %
+          (len(PATHS), one_by_one, single_walk, one_by_one / single_walk))
+
+
+if __name__ == '__main__':
+    main()
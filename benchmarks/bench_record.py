@@ -0,0 +1,56 @@
+"""Compares per field strict lookups with RecordSpec rows.
+
+Run from the repository root:
+
+    python benchmarks/bench_record.py
+"""
+
+import time
+
+import xjpath
+from xjpath.record import ErrorSummary
+from xjpath.record import RecordSpec
+
+
+FIELDS = [('id', 'id#'),
+          ('user', ('user.name$', '')),
+          ('country', 'user.address.country$'),
+          ('latency', ('metrics.latency%', 0.)),
+          ('status', 'metrics.status#')]
+
+
+def main(size=200000):
+    docs = [{'id': i,
+             'user': {'name': 'user %d' % i,
+                      'address': {'country': 'UA' if i % 3 else 'US'}},
+             'metrics': {'latency': i * .5,
+                         'status': 200 if i % 10 else '500'}}
+            for i in range(size)]
+
+    started = time.time()
+    loop_rows = []
+    for doc in docs:
+        row = []
+        for _, field in FIELDS:
+            path, default = field if isinstance(field, tuple) else (field,
+                                                                    None)
+            try:
+                row.append(xjpath.strict_path_lookup(doc, path))
+            except xjpath.XJPathError:
+                row.append(default)
+        loop_rows.append(tuple(row))
+    loop = time.time() - started
+
+    spec = RecordSpec(FIELDS)
+    errors = ErrorSummary()
+    started = time.time()
+    rows = list(spec.iter_rows(docs, errors))
+    batch = time.time() - started
+    assert rows == loop_rows
+    print('%d docs, %d fields  loop: %.3fs  RecordSpec: %.3fs  '
+          'speedup: %.1fx  %r' % (size, len(FIELDS), loop, batch,
+                                  loop / batch, errors))
+
+
+if __name__ == '__main__':
+    main()
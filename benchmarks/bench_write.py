@@ -0,0 +1,51 @@
+"""Compares ways of patching documents.
+
+Run from the repository root:
+
+    python benchmarks/bench_write.py
+"""
+
+import timeit
+
+import xjpath
+
+
+SECTIONS = ('profile', 'settings', 'billing', 'stats')
+
+UPDATES = [('user.account.%s.fields.f%d' % (section, i), i)
+           for section in SECTIONS for i in range(10)]
+
+
+def document():
+    return {'user': {'id': 1, 'account': dict(
+        (section, {'fields': dict(('f%d' % i, None) for i in range(10))})
+        for section in SECTIONS)}}
+
+
+def lookup_and_assign(doc):
+    # The pattern used before the write API existed.
+    for path, value in UPDATES:
+        root, key = path.rsplit('.', 1)
+        container, _ = xjpath.path_lookup(doc, root + '{}', True)
+        container[key] = value
+
+
+def path_set(doc):
+    for path, value in UPDATES:
+        xjpath.path_set(doc, path, value)
+
+
+def main(number=5000):
+    doc = document()
+    results = []
+    for name, func in (('lookup and assign', lookup_and_assign),
+                       ('path_set', path_set),
+                       ('apply_updates',
+                        lambda d: xjpath.apply_updates(d, UPDATES))):
+        seconds = timeit.timeit(lambda: func(doc), number=number)
+        results.append('%s: %.3fs' % (name, seconds))
+    print('%d updates  %s' % (len(UPDATES), '  '.join(results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Compares XJPath lookups with and without the result cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_xjpath_cache.py
+"""
+
+import timeit
+
+import xjpath
+
+
+CONFIG = {'services': dict(('svc%d' % i, {'port': 8000 + i,
+                                          'hosts': ['h%d' % j
+                                                    for j in range(10)]})
+                           for i in range(50)),
+          'limits': {'api': {'rate': 100, 'burst': 20}}}
+
+PATHS = ['limits.api.rate', 'services.svc7.hosts.@-1', 'services.*.port',
+         'services.*.hosts.@0', 'missing.key']
+
+
+def main(number=20000):
+    plain = xjpath.XJPath(CONFIG)
+    cached = xjpath.XJPath(CONFIG, cache_size=64)
+
+    def run(xj):
+        return [xj.get(path) for path in PATHS]
+
+    assert run(plain) == run(cached)
+    plain_time = timeit.timeit(lambda: run(plain), number=number)
+    cached_time = timeit.timeit(lambda: run(cached), number=number)
+    print('%d paths x %d  plain: %.3fs  cached: %.3fs  speedup: %.1fx' %
+          (len(PATHS), number, plain_time, cached_time,
+           plain_time / cached_time))
+
+
+if __name__ == '__main__':
+    main()
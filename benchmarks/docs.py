@@ -0,0 +1,55 @@
+"""Synthetic document generators for benchmarks.
+
+Every generator is deterministic, so results of different runs are
+comparable.
+"""
+
+import random
+
+
+def wide(keys=1000, values=10):
+    """A dictionary with many keys holding small dictionaries."""
+
+    return {'data': dict(('key%d' % i,
+                          dict(('v%d' % j, i * values + j)
+                               for j in range(values)))
+                         for i in range(keys))}
+
+
+def deep(depth=500):
+    """Nested dictionaries with a single chain of 'n' keys."""
+
+    doc = value = {}
+    for _ in range(depth):
+        value['n'] = value = {}
+    value['id'] = depth
+    return doc
+
+
+def deep_path(depth=500):
+    return '.'.join(['n'] * depth + ['id'])
+
+
+def array_heavy(events=10000, payloads=5):
+    """A list of events, each with a list of payloads."""
+
+    rnd = random.Random(0)
+    return {'events': [{'id': i, 'ts': rnd.random(),
+                        'payload': [{'id': j, 'value': rnd.random()}
+                                    for j in range(payloads)]}
+                       for i in range(events)]}
+
+
+def escape_heavy(keys=100):
+    """Keys full of characters that have to be escaped in paths."""
+
+    return {'a.b': dict(('k.%d@*' % i, {'x$': i, '#y': {'z{}': i}})
+                        for i in range(keys))}
+
+
+def ndjson_lines(count=20000):
+    """Newline-delimited JSON records."""
+
+    rnd = random.Random(1)
+    return ['{"user": {"id": %d, "name": "user%d"}, "score": %f}' %
+            (i, i, rnd.random()) for i in range(count)]
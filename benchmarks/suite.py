@@ -0,0 +1,175 @@
+"""Benchmark cases of the lookup engine and the command line tool.
+
+Every run also times REFERENCE, plain dict and list access without
+xjpath. Results are compared as multiples of it, so a baseline recorded
+on one machine stays roughly comparable on another; refresh it after
+adding cases with:
+
+    python -m benchmarks run -o benchmarks/baseline.json
+"""
+
+import collections
+import json
+import os
+import shutil
+import tempfile
+import timeit
+
+import xjpath
+from xjpath import cli
+
+from benchmarks import docs
+
+
+Case = collections.namedtuple('Case', ('name', 'func', 'number'))
+
+REFERENCE = 'reference'
+
+
+def _reference_case():
+    doc = {'data': [{'key%d' % i: {'v': i}} for i in range(100)]}
+
+    def reference():
+        for item in doc['data']:
+            for value in item.values():
+                value['v']
+
+    return Case(REFERENCE, reference, 10000)
+
+
+def _lookup_cases():
+    wide = docs.wide()
+    deep = docs.deep()
+    deep_path = docs.deep_path()
+    events = docs.array_heavy()
+    escaped = docs.escape_heavy()
+    xj = xjpath.XJPath(events)
+
+    return [
+        Case('path_lookup.key', lambda: xjpath.path_lookup(
+            wide, 'data.key500.v5'), 100000),
+        Case('path_lookup.typed', lambda: xjpath.path_lookup(
+            wide, 'data{}.key500{}.v5#'), 100000),
+        Case('path_lookup.deep', lambda: xjpath.path_lookup(
+            deep, deep_path), 2000),
+        Case('path_lookup.escaped', lambda: xjpath.path_lookup(
+            escaped, 'a\\.b.k\\.5\\@\\*.#y.z\\{}'), 100000),
+        Case('path_lookup.index', lambda: xjpath.path_lookup(
+            events, 'events.@-1.payload.@first.value%'), 100000),
+        Case('path_lookup.wildcard', lambda: xjpath.path_lookup(
+            events, 'events.*.ts'), 50),
+        Case('path_lookup.nested_wildcard', lambda: xjpath.path_lookup(
+            events, 'events.*.payload.*.id#'), 10),
+        Case('path_lookup.predicate', lambda: xjpath.path_lookup(
+            events, 'events.*[ts>0.99].id'), 50),
+        Case('path_lookup.descendant', lambda: xjpath.path_lookup(
+            events, 'events.**.id'), 10),
+        Case('path_lookup.descendant_deep', lambda: xjpath.path_lookup(
+            deep, '**.id'), 2000),
+        Case('path_lookup.slice', lambda: xjpath.path_lookup(
+            events, 'events.@-100:.id'), 10000),
+        Case('path_lookup.dict_wildcard', lambda: xjpath.path_lookup(
+            wide, 'data.*.v1'), 100),
+        Case('path_lookup.miss', lambda: xjpath.path_lookup(
+            wide, 'data.nokey.v5'), 100000),
+        Case('path_lookup.wildcard_miss', lambda: xjpath.path_lookup(
+            events, 'events.*.nokey'), 50),
+        Case('strict_path_lookup.key', lambda: xjpath.strict_path_lookup(
+            wide, 'data.key1.v1', int), 100000),
+        Case('strict_path_lookup.miss', lambda: _strict_miss(wide), 100000),
+        Case('XJPath.getitem', lambda: xj['events.@10.payload.@2.id'],
+             100000),
+        Case('XJPath.get_miss', lambda: xj.get('events.@10.nokey'), 100000),
+    ]
+
+
+def _strict_miss(doc):
+    try:
+        xjpath.strict_path_lookup(doc, 'data.nokey')
+    except xjpath.XJPathError:
+        pass
+
+
+class _NDJSONCase(object):
+    """Runs the command line tool over a file of JSON lines."""
+
+    def __init__(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self.input_file = os.path.join(self._tmp_dir, 'input.json')
+        self.output_file = os.path.join(self._tmp_dir, 'output.json')
+        with open(self.input_file, 'w') as f:
+            f.write('\n'.join(docs.ndjson_lines()))
+
+    def __call__(self):
+        cli.main(['-m', '-i', self.input_file, '-o', self.output_file,
+                  'user.name$'])
+
+    def close(self):
+        shutil.rmtree(self._tmp_dir)
+
+
+def run(pattern=None, repeat=5, progress=None):
+    """Runs benchmark cases.
+
+    :param str|None pattern: Substring of case names to run.
+    :param int repeat: Number of measurements, the best one is kept.
+    :param callable|None progress: Called with a case name and a result.
+    :rtype: dict
+    :return: Mapping of a case name to seconds per call.
+    """
+
+    ndjson = _NDJSONCase()
+    try:
+        cases = [_reference_case()] + _lookup_cases() + [
+            Case('cli.ndjson', ndjson, 1)]
+        results = collections.OrderedDict()
+        for case in cases:
+            if (pattern and pattern not in case.name and
+                    case.name != REFERENCE):
+                continue
+            seconds = min(timeit.repeat(case.func, number=case.number,
+                                        repeat=repeat)) / case.number
+            results[case.name] = seconds
+            if progress is not None:
+                progress(case.name, seconds)
+        return results
+    finally:
+        ndjson.close()
+
+
+def compare(baseline, current, threshold):
+    """Compares results with a baseline.
+
+    Ratios are of seconds relative to the REFERENCE case of each result,
+    of plain seconds if either result has no REFERENCE.
+
+    :param dict baseline: Baseline seconds per call by case name.
+    :param dict current: Current seconds per call by case name.
+    :param float threshold: Relative slowdown reported as regression.
+    :rtype: list[tuple]
+    :return: (name, baseline, current, ratio, regressed) tuples for cases
+             present in both results.
+    """
+
+    scale = 1.
+    if REFERENCE in baseline and REFERENCE in current:
+        scale = baseline[REFERENCE] / current[REFERENCE]
+    res = []
+    for name, seconds in current.items():
+        if name not in baseline or name == REFERENCE:
+            continue
+        ratio = seconds * scale / baseline[name]
+        res.append((name, baseline[name], seconds, ratio,
+                    ratio > 1 + threshold))
+    return res
+
+
+def dump(results, path):
+    with open(path, 'w') as f:
+        json.dump({'results': results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['results']
@@ -9,23 +9,25 @@ setup(
     author_email='vburenin@gmail.net',
     maintainer='Volodymyr Burenin',
     maintainer_email='vburenin@gmail.com',
-    packages=find_packages(".", exclude=("test_*",)),
+    packages=find_packages(".", exclude=("test_*", "benchmarks")),
+    python_requires='>=3.7',
     install_requires=[],
-    tests_require=['nose', 'nosexcover'],
-    test_suite='nose.collector',
+    tests_require=['pytest', 'pytest-cov'],
     extras_require={
-        'test': ['nose', 'nosexcover'],
+        'test': ['pytest', 'pytest-cov'],
     },
     url='https://github.com/vburenin/xjpath',
     license='MIT',
     classifiers=['License :: OSI Approved :: MIT License',
                  'Development Status :: 5 - Production/Stable',
                  'Intended Audience :: Developers',
-                 'Programming Language :: Python :: 2.6',
-                 'Programming Language :: Python :: 2.7',
-                 'Programming Language :: Python :: 3.2',
-                 'Programming Language :: Python :: 3.3',
-                 'Programming Language :: Python :: 3.4',
+                 'Programming Language :: Python :: 3',
+                 'Programming Language :: Python :: 3 :: Only',
+                 'Programming Language :: Python :: 3.7',
+                 'Programming Language :: Python :: 3.8',
+                 'Programming Language :: Python :: 3.9',
+                 'Programming Language :: Python :: 3.10',
+                 'Programming Language :: Python :: 3.11',
                  'Topic :: Software Development :: Libraries :: Python Modules',
                  ],
 )
@@ -1,4 +1,28 @@
+from xjpath.adaptive import AdaptivePath
+from xjpath.aggregation import aggregate
+from xjpath.codegen import compile_function
+from xjpath.collection import XJPathCollection
+from xjpath.column import Column
+from xjpath.column import lookup_column
+from xjpath.lazy import LazyDocument
+from xjpath.observe import TrackedDocument
+from xjpath.record import ErrorSummary
+from xjpath.record import RecordSpec
+from xjpath.stream import iter_stream
+from xjpath.stream import stream_lookup
+from xjpath.xjpath import apply_updates
+from xjpath.xjpath import cache_clear
+from xjpath.xjpath import cache_info
+from xjpath.xjpath import compile
+from xjpath.xjpath import CompiledPath
+from xjpath.xjpath import extract_many
+from xjpath.xjpath import iter_lookup
+from xjpath.xjpath import path_delete
 from xjpath.xjpath import path_lookup
+from xjpath.xjpath import path_set
+from xjpath.xjpath import path_setdefault
+from xjpath.xjpath import PathSet
+from xjpath.xjpath import set_cache_size
 from xjpath.xjpath import strict_path_lookup
 from xjpath.xjpath import validate_path
 from xjpath.xjpath import XJPath
@@ -6,4 +30,11 @@ from xjpath.xjpath import XJPathError
 
 
 __all__ = ['path_lookup', 'strict_path_lookup', 'XJPathError',
-           'validate_path', 'XJPath']
+           'validate_path', 'XJPath', 'compile', 'CompiledPath',
+           'cache_info', 'cache_clear', 'set_cache_size', 'PathSet',
+           'extract_many', 'Column', 'lookup_column',
+           'stream_lookup', 'iter_stream', 'iter_lookup',
+           'compile_function', 'XJPathCollection', 'path_set',
+           'path_setdefault', 'path_delete', 'apply_updates',
+           'LazyDocument', 'RecordSpec', 'ErrorSummary', 'aggregate',
+           'TrackedDocument', 'AdaptivePath']
@@ -0,0 +1,340 @@
+"""Lookups specialized to the shape of the documents a path is applied to.
+
+An AdaptivePath looks its first documents up with the generic engine and
+records the exact types of values met at every step. Once warmup lookups
+agree on a single container type per step, a lookup function is generated
+for that shape: a dictionary step becomes a subscript guarded by a
+``type(v) is dict`` check, an array index a subscript of a list, and so
+on. Type postfixes checked by the guards are not checked again:
+
+>>> path = AdaptivePath('orders.*.total%')
+>>> for doc in docs:
+...     total, exists = path.lookup(doc)
+>>> path.info()
+AdaptiveInfo(specializations=1, deopts=0, state='specialized')
+
+A document that does not fit the recorded shape fails a guard, and the
+lookup is deoptimized: it is redone by the generic engine, the specialized
+function is dropped and the shape is recorded again. After max_deopts
+deoptimizations the path stays generic. Results are the same as those of
+path_lookup in all states.
+
+Paths with '**' markers, documents of unstable shape and lookups with
+create_dict_path are never specialized.
+"""
+
+import collections
+import itertools
+import threading
+
+from xjpath.codegen import _Writer
+from xjpath.xjpath import _INDEX
+from xjpath.xjpath import _KEY
+from xjpath.xjpath import _SLICE
+from xjpath.xjpath import _strict_result
+from xjpath.xjpath import _WILDCARD
+from xjpath.xjpath import compile as compile_path
+from xjpath.xjpath import XJPathError
+
+
+AdaptiveInfo = collections.namedtuple(
+    'AdaptiveInfo', ('specializations', 'deopts', 'state'))
+AdaptiveInfo.__doc__ = """Counters of an AdaptivePath.
+
+:ivar int specializations: Number of generated lookup functions.
+:ivar int deopts: Number of lookups that failed a guard.
+:ivar str state: 'warmup', 'specialized' or 'generic'.
+"""
+
+# Returned by specialized functions when a document fails a guard.
+_DEOPT = object()
+
+# Elements of a marker whose shape is recorded, per lookup.
+_SAMPLE = 64
+
+# Container types every step kind is specialized for.
+_CONTAINERS = {
+    _KEY: (dict,),
+    _INDEX: (list, tuple),
+    _WILDCARD: (list, dict),
+    _SLICE: (list, tuple),
+}
+
+
+def _record(data_obj, steps, pos, shape):
+    """Adds exact types of values met by the steps to the shape.
+
+    :param data_obj: A value the step at pos applies to.
+    :param tuple steps: Compiled path steps.
+    :param int pos: Index of the step.
+    :param list shape: A set of types for every position of steps and one
+                       for found values.
+    """
+
+    steps_len = len(steps)
+    while pos < steps_len:
+        kind, key, _ = steps[pos]
+        cls = type(data_obj)
+        shape[pos].add(cls)
+        pos += 1
+        if cls not in _CONTAINERS[kind]:
+            return
+        if kind == _KEY:
+            if key not in data_obj:
+                return
+            data_obj = data_obj[key]
+        elif kind == _INDEX:
+            try:
+                data_obj = data_obj[key]
+            except IndexError:
+                return
+        else:
+            if kind == _SLICE:
+                items = data_obj[key]
+            elif cls is dict:
+                items = data_obj.values()
+            else:
+                items = data_obj
+            if key is not None and kind == _WILDCARD:
+                items = filter(key.match, items)
+            for item in itertools.islice(items, _SAMPLE):
+                _record(item, steps, pos, shape)
+            return
+    shape[pos].add(type(data_obj))
+
+
+def _write_guarded(writer, steps, shape, pos, depth, on_miss, on_found):
+    """Writes code applying steps from pos on to a variable v<pos>.
+
+    Every step is guarded by the single type recorded for it, positions
+    never reached while recording deoptimize.
+
+    :rtype: bool
+    :return: False if a step has several or unsupported types.
+    """
+
+    line = writer.line
+    deopt = 'return _DEOPT'
+    steps_len = len(steps)
+    for pos in range(pos, steps_len):
+        kind, key, val_type = steps[pos]
+        cur = 'v%d' % pos
+        nxt = 'v%d' % (pos + 1)
+        types = shape[pos]
+        if not types:
+            line(depth, deopt)
+            return True
+        if len(types) > 1:
+            return False
+        cls, = types
+        if cls not in _CONTAINERS[kind]:
+            # Scalars, or a type such as defaultdict whose lookups may
+            # differ from those of the engine.
+            return False
+        line(depth, 'if type(%s) is not %s:' % (cur, writer.const(cls)))
+        line(depth + 1, deopt)
+        if kind == _KEY or kind == _INDEX:
+            line(depth, 'try:')
+            line(depth + 1, '%s = %s[%r]' % (nxt, cur, key))
+            line(depth, 'except %s:' % (
+                'KeyError' if kind == _KEY else 'IndexError'))
+            # A typed index of an empty array raises in the engine.
+            line(depth + 1, deopt if kind == _INDEX and val_type else
+                 on_miss)
+            continue
+        if kind == _SLICE:
+            items = '%s[%s]' % (cur, writer.const(key))
+        elif cls is dict:
+            items = '%s.values()' % cur
+        else:
+            items = cur
+        if key is not None and kind == _WILDCARD:
+            items = 'filter(%s, %s)' % (writer.const(key.match), items)
+        if pos + 1 == steps_len and val_type is None:
+            line(depth, on_found('tuple(%s)' % items))
+            return True
+        res = 'res%d' % pos
+        line(depth, '%s = []' % res)
+        line(depth, 'for %s in %s:' % (nxt, items))
+        if not _write_guarded(writer, steps, shape, pos + 1, depth + 1,
+                              'continue',
+                              lambda value: '%s.append(%s)' % (res, value)):
+            return False
+        line(depth, on_found('tuple(%s)' % res))
+        return True
+    _write_value_guard(writer, steps, shape, depth)
+    line(depth, on_found('v%d' % steps_len))
+    return True
+
+
+def _write_value_guard(writer, steps, shape, depth):
+    """Writes a type check of a found value of a typed last step."""
+
+    val_type = steps[-1][2] if steps else None
+    if val_type is None:
+        return
+    found = 'v%d' % len(steps)
+    types = shape[len(steps)]
+    if len(types) == 1:
+        cls, = types
+        writer.line(depth, 'if type(%s) is not %s:' %
+                    (found, writer.const(cls)))
+    else:
+        writer.line(depth, 'if not isinstance(%s, %s):' %
+                    (found, writer.const(val_type)))
+    writer.line(depth + 1, 'return _DEOPT')
+
+
+def _specialize(path, shape):
+    """Generates a lookup function for the shape.
+
+    :rtype: callable|None
+    :return: A function returning a (value, exists) tuple or _DEOPT, None
+             if the shape is not stable.
+    """
+
+    writer = _Writer()
+    writer.namespace['_DEOPT'] = _DEOPT
+    if not _write_guarded(writer, path.steps, shape, 0, 1,
+                          'return None, False',
+                          lambda value: 'return %s, True' % value):
+        return None
+    # Constants are bound as defaults to be read as local variables.
+    names = ['type', '_DEOPT'] + [name for name in writer.namespace
+                                  if name.startswith('_c')]
+    writer.lines.insert(0, 'def lookup(v0, %s):' % ', '.join(
+        '%s=%s' % (name, name) for name in names))
+    source = '\n'.join(writer.lines) + '\n'
+    try:
+        code = compile(source, '<xjpath adaptive %s>' % path.path, 'exec')
+    except (SyntaxError, RuntimeError, MemoryError):
+        return None
+    exec(code, writer.namespace)
+    return writer.namespace['lookup']
+
+
+class AdaptivePath(object):
+    """A compiled path specializing itself to the shape of documents."""
+
+    def __init__(self, xj_path, warmup=8, max_deopts=4):
+        """
+        :param str|CompiledPath xj_path: A XJPath expression.
+        :param int warmup: Number of lookups recorded before specializing.
+        :param int max_deopts: Number of deoptimizations after which the
+                               path stays generic.
+        """
+
+        if warmup < 1:
+            raise XJPathError('Warmup must be positive', (warmup,))
+        self._path = compile_path(xj_path)
+        self._warmup = warmup
+        self._max_deopts = max_deopts
+        self._lock = threading.Lock()
+        self._func = None
+        self._shape = None
+        self._recorded = 0
+        self._specializations = 0
+        self._deopts = 0
+        if all(kind in _CONTAINERS for kind, _, _ in self._path.steps):
+            self._reset_shape()
+
+    def __repr__(self):
+        return 'AdaptivePath(%r)' % self._path.path
+
+    @property
+    def path(self):
+        """The CompiledPath looked up."""
+        return self._path
+
+    def _reset_shape(self):
+        self._shape = [set() for _ in range(len(self._path.steps) + 1)]
+        self._recorded = 0
+
+    def _observe(self, data_obj):
+        """Records the shape of a document, specializes after warmup."""
+
+        with self._lock:
+            if self._shape is None or self._func is not None:
+                return
+            _record(data_obj, self._path.steps, 0, self._shape)
+            self._recorded += 1
+            if self._recorded < self._warmup:
+                return
+            func = _specialize(self._path, self._shape)
+            if func is None:
+                # Types differ between documents, stay generic.
+                self._shape = None
+                return
+            self._specializations += 1
+            self._func = func
+
+    def _deoptimize(self, func):
+        with self._lock:
+            if self._func is not func:
+                return
+            self._deopts += 1
+            self._func = None
+            if self._deopts >= self._max_deopts:
+                self._shape = None
+            else:
+                self._reset_shape()
+
+    def lookup(self, data_obj, create_dict_path=False):
+        """Looks up the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param bool create_dict_path: Create an element if type is specified.
+        :return: A tuple where 0 value is an extracted value and a second
+                 field that tells if value either was found or not found.
+        """
+
+        func = self._func
+        if func is not None and not create_dict_path:
+            res = func(data_obj)
+            if res is not _DEOPT:
+                return res
+            self._deoptimize(func)
+        res = self._path.lookup(data_obj, create_dict_path)
+        if self._shape is not None and not create_dict_path:
+            self._observe(data_obj)
+        return res
+
+    def strict_lookup(self, data_obj, force_type=None):
+        """Looks up the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param type force_type: A type that excepted to be.
+        :return: Returns result or throws an exception if value is not found.
+        """
+
+        value, exists = self.lookup(data_obj)
+        return _strict_result(value, exists, self._path.path, force_type)
+
+    def get(self, data_obj, default=None):
+        """Looks up the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param default: A value to return if path cannot be resolved.
+        :return: Found value or default.
+        """
+
+        try:
+            value, exists = self.lookup(data_obj)
+        except (XJPathError, TypeError):
+            return default
+        return value if exists else default
+
+    def info(self):
+        """Returns counters of specializations and deoptimizations.
+
+        :rtype: AdaptiveInfo
+        """
+
+        with self._lock:
+            if self._func is not None:
+                state = 'specialized'
+            elif self._shape is not None:
+                state = 'warmup'
+            else:
+                state = 'generic'
+            return AdaptiveInfo(self._specializations, self._deopts, state)
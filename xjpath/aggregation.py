@@ -0,0 +1,113 @@
+"""Aggregates of values matched by XJPath expressions.
+
+aggregate reduces values matched by a path while the path is walked.
+Values of nested '*', '**' and slice markers are visited one at a time,
+no tuples are built, and the memory used does not depend on the number
+of values:
+
+>>> doc = {'orders': [{'total': 1.5}, {'total': 4.}, {'total': 2.}]}
+>>> aggregate(doc, 'orders.*.total%', 'sum')
+7.5
+>>> aggregate(doc, 'orders.*.total%', 'top', k=2)
+[4.0, 2.0]
+
+Supported functions are count, sum, min, max, avg, any, all, top and
+bottom. min, max and avg of no values are None. top and bottom keep the k
+largest or smallest values in a bounded heap. lookup_column computes an
+aggregate per document with its aggregate argument.
+"""
+
+import collections
+import heapq
+import itertools
+
+from xjpath.xjpath import _iter_walk
+from xjpath.xjpath import _WILDCARD
+from xjpath.xjpath import compile
+from xjpath.xjpath import XJPathError
+
+
+def _count(values):
+    counter = itertools.count()
+    # Consumes the values without a Python level loop.
+    collections.deque(zip(values, counter), maxlen=0)
+    return next(counter)
+
+
+def _avg(values):
+    total = 0
+    count = 0
+    for value in values:
+        total += value
+        count += 1
+    return total / count if count else None
+
+
+# Functions taking an iterator of values, top and bottom also take k.
+_FUNCTIONS = {
+    'count': _count,
+    'sum': sum,
+    'min': lambda values: min(values, default=None),
+    'max': lambda values: max(values, default=None),
+    'avg': _avg,
+    'any': any,
+    'all': all,
+    'top': lambda values, k: heapq.nlargest(k, values),
+    'bottom': lambda values, k: heapq.nsmallest(k, values),
+}
+
+_TOP_K = frozenset(('top', 'bottom'))
+
+
+def _reduce_function(func, k):
+    """Returns a callable reducing an iterator of values."""
+
+    try:
+        reduce = _FUNCTIONS[func]
+    except (KeyError, TypeError):
+        raise XJPathError('Unknown aggregate function', (func,))
+    if func in _TOP_K:
+        if k is None or k < 0:
+            raise XJPathError('Aggregate function needs k', (func, k))
+        return lambda values: reduce(values, k)
+    if k is not None:
+        raise XJPathError('Aggregate function does not take k', (func, k))
+    return reduce
+
+
+def _count_elements(containers):
+    return sum(len(value) for value in containers
+               if isinstance(value, (list, dict)))
+
+
+def _aggregator(path, func, k=None):
+    """Returns a callable aggregating values of a path in a document.
+
+    :param CompiledPath path: A compiled path.
+    :param str func: Name of the aggregate function.
+    :param int|None k: Number of values kept by top and bottom.
+    :rtype: callable
+    """
+
+    reduce = _reduce_function(func, k)
+    steps = path.steps
+    if (func == 'count' and steps and steps[-1][0] == _WILDCARD and
+            steps[-1][1] is None):
+        # Elements of the last '*' are counted by their containers.
+        steps = steps[:-1]
+        return lambda data_obj: _count_elements(
+            _iter_walk(data_obj, steps, True))
+    return lambda data_obj: reduce(_iter_walk(data_obj, steps, True))
+
+
+def aggregate(data_obj, xj_path, func, k=None):
+    """Aggregates values matched by a xj path in the data_obj.
+
+    :param dict|list data_obj: An object to look into.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param str func: count, sum, min, max, avg, any, all, top or bottom.
+    :param int|None k: Number of values returned by top and bottom.
+    :return: The aggregate of matched values.
+    """
+
+    return _aggregator(compile(xj_path), func, k)(data_obj)
@@ -0,0 +1,166 @@
+"""asyncio helpers applying XJPath to asynchronous document sources.
+
+Documents of an async iterator are grouped into batches and looked up a
+batch at a time, so the event loop is blocked for one batch at most, or
+not at all if batches are handed to an executor. Only a bounded number of
+batches is in flight, and the source is not read while the window is
+full:
+
+>>> async for value, exists in aio.lookup_stream(docs, 'user.id'):
+...     print(value)
+
+With a sequence of paths every result is a tuple of (value, exists)
+tuples as returned by PathSet.lookup. A large document can be looked up
+in an executor with path_lookup:
+
+>>> value, exists = await aio.path_lookup(doc, 'records.*.id')
+"""
+
+import asyncio
+import collections
+import functools
+import time
+
+from xjpath.xjpath import _LRUCache
+from xjpath.xjpath import compile
+from xjpath.xjpath import CompiledPath
+from xjpath.xjpath import PathSet
+
+
+BatchStats = collections.namedtuple(
+    'BatchStats', ('index', 'size', 'seconds', 'latency'))
+BatchStats.__doc__ = """Timings of a batch of documents.
+
+:ivar int index: Number of the batch in the source order.
+:ivar int size: Number of documents in the batch.
+:ivar float seconds: Time spent looking the batch up.
+:ivar float latency: Time from the batch being read to its results being
+                     ready, including waiting for an executor.
+"""
+
+# Path sets are rebuilt from path strings in executor processes.
+_path_sets = _LRUCache(PathSet, 64)
+
+
+def _path_spec(paths):
+    """Returns a picklable description of paths to look up.
+
+    :param str|CompiledPath|PathSet|iterable paths: Paths to look up.
+    :rtype: str|tuple[str]
+    """
+
+    if isinstance(paths, str):
+        return compile(paths).path
+    if isinstance(paths, CompiledPath):
+        return paths.path
+    if isinstance(paths, PathSet):
+        return tuple(path.path for path in paths.paths)
+    return tuple(compile(path).path for path in paths)
+
+
+def _lookup_batch(spec, docs):
+    """Looks paths up in every document of a batch.
+
+    :param str|tuple[str] spec: A path or a tuple of paths.
+    :param list docs: Documents to look into.
+    :rtype: tuple[list, float]
+    :return: Results in the order of documents and seconds spent.
+    """
+
+    start = time.perf_counter()
+    if isinstance(spec, str):
+        lookup = compile(spec).lookup
+    else:
+        lookup = _path_sets(spec).lookup
+    res = [lookup(doc) for doc in docs]
+    return res, time.perf_counter() - start
+
+
+async def _batches(source, batch_size):
+    batch = []
+    async for doc in source:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _run_batch(loop, executor, spec, batch, index, on_batch):
+    start = time.perf_counter()
+    if executor is None:
+        res, seconds = _lookup_batch(spec, batch)
+    else:
+        res, seconds = await loop.run_in_executor(
+            executor, _lookup_batch, spec, batch)
+    if on_batch is not None:
+        on_batch(BatchStats(index, len(batch), seconds,
+                            time.perf_counter() - start))
+    return res
+
+
+async def lookup_stream(source, paths, batch_size=256, concurrency=1,
+                        executor=None, on_batch=None):
+    """Yields lookup results for documents of an async iterator.
+
+    Results are yielded in the order of documents. Without an executor
+    batches are looked up in the event loop and control is given back to
+    it after every batch.
+
+    :param async_iterable source: Documents to look into.
+    :param str|CompiledPath|PathSet|iterable paths: A path, or a sequence
+                                                   of paths or a PathSet.
+    :param int batch_size: Number of documents looked up at a time.
+    :param int concurrency: Maximum number of batches in flight.
+    :param concurrent.futures.Executor|None executor: Where to look
+                                                      batches up.
+    :param callable|None on_batch: Called with BatchStats of every batch.
+    :rtype: __async_generator
+    :return: (value, exists) tuples for a single path, otherwise tuples
+             of them in the order of paths.
+    """
+
+    if batch_size < 1:
+        raise ValueError('Batch size must be positive')
+    if concurrency < 1:
+        raise ValueError('Concurrency must be positive')
+
+    spec = _path_spec(paths)
+    loop = asyncio.get_running_loop()
+    pending = collections.deque()
+    try:
+        index = 0
+        async for batch in _batches(source, batch_size):
+            if len(pending) >= concurrency:
+                for res in await pending.popleft():
+                    yield res
+            pending.append(asyncio.ensure_future(_run_batch(
+                loop, executor, spec, batch, index, on_batch)))
+            index += 1
+            if executor is None:
+                await asyncio.sleep(0)
+        while pending:
+            for res in await pending.popleft():
+                yield res
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def path_lookup(data_obj, xj_path, executor=None):
+    """Looks up a xj path in the data_obj without blocking the event loop.
+
+    :param dict|list data_obj: An object to look into.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param concurrent.futures.Executor|None executor: Where to look the
+                                                      path up, default
+                                                      executor of the loop
+                                                      if None.
+    :return: A tuple where 0 value is an extracted value and a second
+             field that tells if value either was found or not found.
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(compile(xj_path).lookup, data_obj))
@@ -0,0 +1,391 @@
+"""Command line interface of XJPath lookups.
+
+    python -m xjpath.xjpath [-i INPUT] [-o OUTPUT] [-m] [-j JOBS] [-s] path
+    python -m xjpath.xjpath [-m] [-f FORMAT] -p NAME=PATH [-p NAME=PATH ...]
+
+In multiple lines mode the input is read in large chunks split on line
+boundaries. With more than one job chunks are handed to a process pool
+and every worker parses and evaluates its lines on its own core. In
+stream mode a single document is scanned without building it in memory.
+
+With -p fields all paths are looked up in one pass over every document,
+and every document becomes a CSV or TSV row or a NDJSON object. Rows of a
+chunk are formatted together and written with a single write call.
+"""
+
+import argparse
+import collections
+from concurrent import futures
+import csv
+import functools
+import io
+import json
+import sys
+
+from xjpath.stream import iter_stream
+from xjpath.xjpath import compile
+from xjpath.xjpath import PathSet
+from xjpath.xjpath import validate_path
+from xjpath.xjpath import XJPathError
+
+
+ON_ERROR_SKIP = 'skip'
+ON_ERROR_FAIL = 'fail'
+
+FORMAT_CSV = 'csv'
+FORMAT_TSV = 'tsv'
+FORMAT_NDJSON = 'ndjson'
+
+MISSING_NULL = 'null'
+MISSING_SKIP = 'skip'
+MISSING_ERROR = 'error'
+
+_OUTPUT_BUFFER_SIZE = 1 << 20
+
+_worker_path = None
+_worker_on_error = None
+
+
+def _dump_xjpath(obj, path):
+    """Looks a compiled path up as XJPath does and dumps the value.
+
+    Errors name the source path expression.
+    """
+
+    try:
+        value, exists = path.lookup(obj)
+    except (XJPathError, TypeError) as e:
+        raise IndexError('Path error: %s' % path.path, *e.args)
+    if not exists:
+        raise IndexError('Path does not exist %s' % path.path)
+    return json.dumps(value)
+
+
+def _csv_cell(value, null):
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return null
+    if isinstance(value, (bool, dict, list, tuple)):
+        return json.dumps(value)
+    return value
+
+
+class _Fields(object):
+    """Named paths looked up in one pass and formatted as rows."""
+
+    def __init__(self, fields, output_format=FORMAT_NDJSON,
+                 missing=MISSING_NULL, null=''):
+        """
+        :param list[tuple[str, str]] fields: Pairs of a name and a path.
+        :param str output_format: csv, tsv or ndjson.
+        :param str missing: What to do with a missing path: write null,
+                            skip the document or raise IndexError.
+        :param str null: Text of null and missing values in CSV and TSV.
+        """
+
+        self.fields = list(fields)
+        self.names = [name for name, _ in self.fields]
+        self.output_format = output_format
+        self.missing = missing
+        self.null = null
+        self._paths = PathSet(path for _, path in self.fields)
+
+    def __reduce__(self):
+        return (_Fields, (self.fields, self.output_format, self.missing,
+                         self.null))
+
+    def row(self, data_obj):
+        """Looks up all fields in the data_obj.
+
+        :rtype: list|None
+        :return: Values of fields, None if the document is skipped.
+        """
+
+        try:
+            res = self._paths.lookup(data_obj)
+        except (XJPathError, TypeError) as e:
+            raise IndexError('Path error', *e.args)
+        values = [value for value, _ in res]
+        if self.missing != MISSING_NULL:
+            for (_, exists), name in zip(res, self.names):
+                if not exists:
+                    if self.missing == MISSING_SKIP:
+                        return None
+                    raise IndexError('Path does not exist', name)
+        return values
+
+    def _writer(self, buf):
+        if self.output_format == FORMAT_TSV:
+            return csv.writer(buf, dialect='excel-tab', lineterminator='\n')
+        return csv.writer(buf, lineterminator='\n')
+
+    def header(self):
+        """Returns the header line of CSV and TSV output."""
+
+        if self.output_format == FORMAT_NDJSON:
+            return ''
+        buf = io.StringIO()
+        self._writer(buf).writerow(self.names)
+        return buf.getvalue()
+
+    def format(self, rows):
+        """Formats rows as a single string."""
+
+        if self.output_format == FORMAT_NDJSON:
+            names = self.names
+            res = [json.dumps(dict(zip(names, values))) for values in rows]
+            if res:
+                res.append('')
+            return '\n'.join(res)
+        null = self.null
+        buf = io.StringIO()
+        self._writer(buf).writerows(
+            [_csv_cell(value, null) for value in values] for values in rows)
+        return buf.getvalue()
+
+
+def _process_lines(chunk, path, on_error):
+    """Looks up a path in every JSON line of a chunk.
+
+    :param str chunk: Newline-delimited JSON objects.
+    :param CompiledPath|_Fields path: A path or fields to look up.
+    :param str on_error: What to do with broken lines, skip or fail.
+    :rtype: str
+    :return: Newline-delimited JSON results or formatted rows of fields.
+    :raise: ValueError or IndexError of the first broken line with results
+            of lines before it in the partial_output attribute.
+    """
+
+    fields = path if isinstance(path, _Fields) else None
+    res = []
+    for line in chunk.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if fields is None:
+                res.append(_dump_xjpath(json.loads(line), path))
+                continue
+            values = fields.row(json.loads(line))
+            if values is not None:
+                res.append(values)
+        except (ValueError, IndexError) as e:
+            if on_error == ON_ERROR_FAIL:
+                e.partial_output = _format_results(res, fields)
+                raise
+    return _format_results(res, fields)
+
+
+def _format_results(res, fields):
+    if fields is not None:
+        return fields.format(res)
+    if res:
+        res.append('')
+    return '\n'.join(res)
+
+
+def _write_result(output_file, get_result):
+    """Writes a chunk result, or results before a broken line of it."""
+
+    try:
+        res = get_result()
+    except (ValueError, IndexError) as e:
+        output_file.write(getattr(e, 'partial_output', ''))
+        raise
+    output_file.write(res)
+
+
+def _init_worker(path, on_error):
+    global _worker_path, _worker_on_error
+    _worker_path = path if isinstance(path, _Fields) else compile(path)
+    _worker_on_error = on_error
+
+
+def _process_chunk(chunk):
+    return _process_lines(chunk, _worker_path, _worker_on_error)
+
+
+def read_chunks(input_file, chunk_size):
+    """Reads a file in chunks that end on a line boundary.
+
+    :param file input_file: A file to read.
+    :param int chunk_size: Approximate size of a chunk in characters.
+    :rtype: __generator[str]
+    """
+
+    while True:
+        chunk = input_file.read(chunk_size)
+        if not chunk:
+            return
+        if not chunk.endswith('\n'):
+            chunk += input_file.readline()
+        yield chunk
+
+
+def _write_parallel(chunks, output_file, args):
+    """Evaluates chunks in a process pool and writes their results.
+
+    At most two chunks per job are in flight, so the input is not read
+    faster than workers process it.
+    """
+
+    window = args.jobs * 2
+    with futures.ProcessPoolExecutor(args.jobs, initializer=_init_worker,
+                                     initargs=(args.fields or args.path,
+                                               args.on_error)) as executor:
+        if args.unordered:
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= window:
+                    done, pending = futures.wait(
+                        pending, return_when=futures.FIRST_COMPLETED)
+                    for future in done:
+                        _write_result(output_file, future.result)
+                pending.add(executor.submit(_process_chunk, chunk))
+            for future in futures.as_completed(pending):
+                _write_result(output_file, future.result)
+        else:
+            pending = collections.deque()
+            for chunk in chunks:
+                if len(pending) >= window:
+                    _write_result(output_file, pending.popleft().result)
+                pending.append(executor.submit(_process_chunk, chunk))
+            while pending:
+                _write_result(output_file, pending.popleft().result)
+
+
+def _make_parser():
+    parser = argparse.ArgumentParser(
+        description='JSON data structure lookup. This utility performs a XJPath'
+        ' lookup on a given data structure and writes the result as JSON.')
+    parser.add_argument('-i', '--input-file', default=None,
+                        help='Path to JSON data structure. Default is STDIN.')
+    parser.add_argument('-o', '--output-file', default=None,
+                        help='Where to write XJPath result. Default is STDOUT.')
+    parser.add_argument('-m', '--multiple-lines', action='store_true',
+                        help='Expect multiple newline-deliminated JSON objects.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes for multiple lines '
+                        'mode. Default is 1.')
+    parser.add_argument('--chunk-size', type=int, default=1 << 20,
+                        help='Approximate size of input chunks in multiple '
+                        'lines and stream modes. Default is 1MiB.')
+    parser.add_argument('--unordered', action='store_true',
+                        help='Allow results of parallel jobs to be written '
+                        'in any order.')
+    parser.add_argument('--on-error', choices=(ON_ERROR_SKIP, ON_ERROR_FAIL),
+                        default=ON_ERROR_FAIL,
+                        help='Skip or fail on lines that are not valid JSON '
+                        'or miss the path in multiple lines mode. '
+                        'Default is fail.')
+    parser.add_argument('-s', '--stream', action='store_true',
+                        help='Scan a single JSON document without loading it '
+                        'into memory. Every value matched by "*" markers is '
+                        'written on its own line.')
+    parser.add_argument('-p', '--field', action='append', default=[],
+                        dest='field_specs', metavar='NAME=PATH',
+                        help='A named XJPath expression, may be repeated. All '
+                        'fields are looked up in one pass over a document and '
+                        'written as a row.')
+    parser.add_argument('-f', '--format',
+                        choices=(FORMAT_NDJSON, FORMAT_CSV, FORMAT_TSV),
+                        default=FORMAT_NDJSON, dest='output_format',
+                        help='Format of rows of fields. Default is ndjson.')
+    parser.add_argument('--missing',
+                        choices=(MISSING_NULL, MISSING_SKIP, MISSING_ERROR),
+                        default=MISSING_NULL,
+                        help='Write null for a missing field, skip the '
+                        'document or handle it as an error, see --on-error. '
+                        'Default is null.')
+    parser.add_argument('--null', default='',
+                        help='Text written for null values in CSV and TSV '
+                        'rows. Default is an empty string.')
+    parser.add_argument('--no-header', action='store_true',
+                        help='Do not write the header line of CSV and TSV '
+                        'rows.')
+    parser.add_argument('path', type=str, nargs='?',
+                        help='XJPath expression to apply to data structure.')
+    return parser
+
+
+def _parse_field(spec):
+    """Splits a NAME=PATH field argument, a path alone is its own name."""
+
+    name, sep, path = spec.partition('=')
+    if not sep or not name or '[' in name:
+        return spec, spec
+    return name, path
+
+
+def main(argv=None):
+    parser = _make_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error('number of jobs must be positive')
+    if args.chunk_size < 1:
+        parser.error('chunk size must be positive')
+
+    if args.stream and args.multiple_lines:
+        parser.error('--stream cannot be used with --multiple-lines')
+
+    args.fields = None
+    if args.field_specs:
+        if args.path is not None:
+            parser.error('a path cannot be used with --field')
+        if args.stream:
+            parser.error('--stream cannot be used with --field')
+        fields = [_parse_field(spec) for spec in args.field_specs]
+        try:
+            for _, path in fields:
+                validate_path(path)
+        except XJPathError as e:
+            parser.error('invalid field path %s: %s' % (path, e))
+        args.fields = _Fields(fields, args.output_format, args.missing,
+                              args.null)
+    elif args.path is None:
+        parser.error('a path or --field is required')
+
+    if args.input_file is None:
+        input_file = sys.stdin.buffer if args.stream else sys.stdin
+    else:
+        input_file = open(args.input_file, 'rb' if args.stream else 'r')
+    output_file = (sys.stdout if args.output_file is None
+                   else open(args.output_file, 'w',
+                             buffering=_OUTPUT_BUFFER_SIZE))
+
+    with input_file, output_file:
+        if args.fields is not None and not args.no_header:
+            output_file.write(args.fields.header())
+
+        if args.stream:
+            for value in iter_stream(input_file, args.path,
+                                     args.chunk_size):
+                output_file.write(json.dumps(value))
+                output_file.write('\n')
+            return
+
+        if not args.multiple_lines:
+            doc = json.load(input_file)
+            if args.fields is None:
+                output_file.write(_dump_xjpath(doc, compile(args.path)))
+                output_file.write('\n')
+                return
+            values = args.fields.row(doc)
+            if values is not None:
+                output_file.write(args.fields.format([values]))
+            return
+
+        chunks = read_chunks(input_file, args.chunk_size)
+        if args.jobs == 1:
+            path = args.fields or compile(args.path)
+            for chunk in chunks:
+                _write_result(output_file, functools.partial(
+                    _process_lines, chunk, path, args.on_error))
+            return
+
+        _write_parallel(chunks, output_file, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Compiles XJPath expressions into specialized Python functions.
+
+Every step of a compiled path is turned into straight-line Python code:
+keys become dictionary lookups, array indexes become index operations and
+'*', '**' and slice markers become loops. Generated functions behave
+exactly like path_lookup, including create_dict_path and error messages:
+
+>>> lookup = compile_function('a.b.@last.c#')
+>>> lookup({'a': {'b': [{'c': 1}, {'c': 2}]}})
+(2, True)
+
+Functions are cached per path expression. Paths that cannot be turned into
+a Python function, for example ones with too many nested '*' markers, fall
+back to CompiledPath.lookup.
+"""
+
+from xjpath.xjpath import _BAD_INDEX
+from xjpath.xjpath import _BAD_PREDICATE
+from xjpath.xjpath import _check_index_type
+from xjpath.xjpath import _check_key_type
+from xjpath.xjpath import _descendant_type
+from xjpath.xjpath import _DESCENDANT
+from xjpath.xjpath import _dict_element
+from xjpath.xjpath import _INDEX
+from xjpath.xjpath import _iter_descendants
+from xjpath.xjpath import _KEY
+from xjpath.xjpath import _LRUCache
+from xjpath.xjpath import _single_array_element
+from xjpath.xjpath import _SLICE
+from xjpath.xjpath import _slice_items
+from xjpath.xjpath import compile as compile_path
+from xjpath.xjpath import XJPathError
+
+
+_INDENT = '    '
+
+
+class _Writer(object):
+    """Accumulates lines of generated source and its constants."""
+
+    def __init__(self):
+        self.lines = []
+        self.namespace = {
+            'XJPathError': XJPathError,
+            '_check_index_type': _check_index_type,
+            '_check_key_type': _check_key_type,
+            '_dict_element': _dict_element,
+            '_iter_descendants': _iter_descendants,
+            '_single_array_element': _single_array_element,
+            '_slice_items': _slice_items,
+        }
+
+    def line(self, depth, text):
+        self.lines.append(_INDENT * depth + text)
+
+    def const(self, value):
+        """Returns a name the value is available under in generated code."""
+
+        name = '_c%d' % len(self.namespace)
+        self.namespace[name] = value
+        return name
+
+
+def _write_steps(writer, steps, pos, depth, on_miss, on_found):
+    """Writes code applying steps from pos on to a variable v<pos>.
+
+    :param _Writer writer: Source writer.
+    :param tuple steps: Compiled path steps.
+    :param int pos: Index of the first step to write.
+    :param int depth: Indentation level.
+    :param str on_miss: Statement executed when a value is missing.
+    :param callable on_found: Returns a statement for a found value
+                              expression.
+    """
+
+    line = writer.line
+    for pos in range(pos, len(steps)):
+        kind, key, val_type = steps[pos]
+        cur = 'v%d' % pos
+        nxt = 'v%d' % (pos + 1)
+        if kind == _KEY:
+            key_name = repr(key)
+            if val_type is None:
+                line(depth, 'if %s not in %s:' % (key_name, cur))
+                line(depth + 1, on_miss)
+                line(depth, '%s = %s[%s]' % (nxt, cur, key_name))
+                continue
+            type_name = writer.const(val_type)
+            line(depth, 'if %s in %s:' % (key_name, cur))
+            line(depth + 1, '%s = %s[%s]' % (nxt, cur, key_name))
+            line(depth + 1, 'if not isinstance(%s, %s):' % (nxt, type_name))
+            line(depth + 2, '_check_key_type(%s, %s, %s)' %
+                 (key_name, nxt, type_name))
+            line(depth, 'else:')
+            line(depth + 1, '%s, exists = _dict_element(%s, %s, %s, '
+                 'create_dict_path)' % (nxt, cur, key_name, type_name))
+            line(depth + 1, 'if not exists:')
+            line(depth + 2, on_miss)
+        elif kind == _INDEX:
+            type_name = writer.const(val_type)
+            line(depth, 'if %s and isinstance(%s, (list, tuple)):' %
+                 (cur, cur))
+            line(depth + 1, 'try:')
+            line(depth + 2, '%s = %s[%d]' % (nxt, cur, key))
+            line(depth + 1, 'except IndexError:')
+            line(depth + 2, on_miss)
+            if val_type is not None:
+                line(depth + 1, 'if not isinstance(%s, %s):' %
+                     (nxt, type_name))
+                line(depth + 2, '_check_index_type(%d, %s, %s)' %
+                     (key, nxt, type_name))
+            line(depth, 'else:')
+            if val_type is not None:
+                line(depth + 1, '_single_array_element(%s, %d, %s)' %
+                     (cur, key, type_name))
+            line(depth + 1, on_miss)
+        elif kind == _BAD_INDEX or kind == _BAD_PREDICATE:
+            line(depth, 'raise XJPathError(*%s)' % writer.const(key))
+            return
+        else:
+            items = 'items%d' % pos
+            if kind == _DESCENDANT:
+                line(depth, 'if not isinstance(%s, (dict, list)):' % cur)
+                line(depth + 1, on_miss)
+                line(depth, '%s = _iter_descendants(%s, %r, %s)' %
+                     (items, cur, key,
+                      writer.const(_descendant_type(steps[pos + 1:]))))
+                line(depth, 'if create_dict_path:')
+                line(depth + 1, '%s = tuple(%s)' % (items, items))
+            elif kind == _SLICE:
+                line(depth, 'if not isinstance(%s, (list, tuple)):' % cur)
+                line(depth + 1, on_miss)
+                line(depth, '%s = _slice_items(%s, %s, %s)' %
+                     (items, cur, writer.const(key), writer.const(val_type)))
+            else:
+                line(depth, 'if isinstance(%s, list):' % cur)
+                line(depth + 1, '%s = %s' % (items, cur))
+                line(depth, 'elif isinstance(%s, dict):' % cur)
+                line(depth + 1, '%s = %s.values()' % (items, cur))
+                line(depth, 'else:')
+                line(depth + 1, on_miss)
+                if key is not None:
+                    line(depth, '%s = filter(%s, %s)' %
+                         (items, writer.const(key.match), items))
+            if pos + 1 == len(steps):
+                line(depth, on_found('tuple(%s)' % items))
+                return
+            res = 'res%d' % pos
+            line(depth, '%s = []' % res)
+            line(depth, 'for %s in %s:' % (nxt, items))
+            _write_steps(writer, steps, pos + 1, depth + 1, 'continue',
+                         lambda value: '%s.append(%s)' % (res, value))
+            line(depth, on_found('tuple(%s)' % res))
+            return
+    line(depth, on_found('v%d' % len(steps)))
+
+
+def generate_source(xj_path):
+    """Generates source of a lookup function for a xj path.
+
+    :param str|CompiledPath xj_path: A XJPath expression.
+    :rtype: tuple[str, dict]
+    :return: Function source and a namespace of constants it refers to.
+    """
+
+    path = compile_path(xj_path)
+    writer = _Writer()
+    writer.line(0, 'def lookup(v0, create_dict_path=False):')
+    _write_steps(writer, path.steps, 0, 1, 'return None, False',
+                 lambda value: 'return %s, True' % value)
+    return '\n'.join(writer.lines) + '\n', writer.namespace
+
+
+def _build_function(xj_path):
+    path = compile_path(xj_path)
+    source, namespace = generate_source(path)
+    try:
+        code = compile(source, '<xjpath %s>' % path.path, 'exec')
+    except (SyntaxError, RuntimeError, MemoryError):
+        return path.lookup
+    exec(code, namespace)
+    return namespace['lookup']
+
+
+_function_cache = _LRUCache(_build_function, 1024)
+
+
+def compile_function(xj_path):
+    """Returns a specialized lookup function for a xj path.
+
+    The function takes a data object and an optional create_dict_path
+    flag and returns the same (value, exists) tuple as path_lookup.
+
+    :param str|CompiledPath xj_path: A XJPath expression.
+    :rtype: callable
+    """
+
+    path = compile_path(xj_path)
+    return _function_cache(path.path)
@@ -0,0 +1,295 @@
+"""In-memory collection of documents with indexes on XJPath expressions.
+
+Indexes are declared on paths and kept up to date when documents are
+added, replaced or removed, so queries do not scan the collection:
+
+>>> docs = XJPathCollection()
+>>> docs.add_index('spec.owner.id')
+>>> docs.add_index('spec.replicas#', ordered=True)
+>>> doc_id = docs.add({'spec': {'owner': {'id': 'u1'}, 'replicas': 3}})
+>>> docs.find('spec.owner.id', 'u1')
+[0]
+>>> docs.find_range('spec.replicas#', 2, 5)
+[0]
+
+Paths with '*' markers build multi-valued indexes where a document is
+found by any of the matched values. Documents are indexed at the time they
+are added, so a document changed in place has to be passed to replace().
+"""
+
+import bisect
+
+from xjpath.xjpath import compile
+from xjpath.xjpath import XJPathError
+
+
+# Compares greater than any document id, used as a bisect bound.
+_MAX_ID = float('inf')
+
+
+def _index_values(path, doc):
+    """Returns a set of hashable values matched by a path in a document.
+
+    Documents where the lookup fails are treated as missing the path.
+    """
+
+    try:
+        values = list(path.iter_lookup(doc, flatten=True))
+    except (XJPathError, TypeError):
+        return frozenset()
+    res = set()
+    for value in values:
+        try:
+            res.add(value)
+        except TypeError:
+            pass
+    return res
+
+
+def _order_group(value):
+    """Returns a group of mutually comparable values or None."""
+
+    if isinstance(value, (int, float)):
+        # NaN is not ordered against other numbers.
+        return float if value == value else None
+    if isinstance(value, str):
+        return str
+    return None
+
+
+class _HashIndex(object):
+    """Maps values to sets of document ids."""
+
+    def __init__(self, path):
+        self.path = path
+        self._ids = {}
+        self._doc_values = {}
+
+    def insert(self, doc_id, doc):
+        values = _index_values(self.path, doc)
+        if not values:
+            return
+        self._doc_values[doc_id] = values
+        for value in values:
+            ids = self._ids.get(value)
+            if ids is None:
+                ids = self._ids[value] = set()
+            ids.add(doc_id)
+
+    def delete(self, doc_id):
+        for value in self._doc_values.pop(doc_id, ()):
+            ids = self._ids[value]
+            ids.discard(doc_id)
+            if not ids:
+                del self._ids[value]
+
+    def find(self, value):
+        try:
+            return sorted(self._ids.get(value, ()))
+        except TypeError:
+            return []
+
+
+class _OrderedIndex(_HashIndex):
+    """A hash index with sorted lists of (value, doc id) entries.
+
+    Numbers and strings are ordered separately, other values are
+    available for equality queries only.
+    """
+
+    def __init__(self, path):
+        super(_OrderedIndex, self).__init__(path)
+        self._entries = {float: [], str: []}
+
+    def insert(self, doc_id, doc):
+        super(_OrderedIndex, self).insert(doc_id, doc)
+        for value in self._doc_values.get(doc_id, ()):
+            group = _order_group(value)
+            if group is not None:
+                bisect.insort(self._entries[group], (value, doc_id))
+
+    def delete(self, doc_id):
+        for value in self._doc_values.get(doc_id, ()):
+            group = _order_group(value)
+            if group is not None:
+                entries = self._entries[group]
+                del entries[bisect.bisect_left(entries, (value, doc_id))]
+        super(_OrderedIndex, self).delete(doc_id)
+
+    def find_range(self, low, high, include_low, include_high):
+        bound = low if low is not None else high
+        group = _order_group(bound)
+        if group is None:
+            raise XJPathError('Range bounds must be numbers or strings',
+                              (low, high))
+        if high is not None and _order_group(high) is not group:
+            raise XJPathError('Range bounds must be of the same type',
+                              (low, high))
+        entries = self._entries[group]
+
+        if low is None:
+            start = 0
+        elif include_low:
+            start = bisect.bisect_left(entries, (low,))
+        else:
+            start = bisect.bisect_right(entries, (low, _MAX_ID))
+        if high is None:
+            end = len(entries)
+        elif include_high:
+            end = bisect.bisect_right(entries, (high, _MAX_ID))
+        else:
+            end = bisect.bisect_left(entries, (high,))
+
+        res = []
+        seen = set()
+        for _, doc_id in entries[start:end]:
+            if doc_id not in seen:
+                seen.add(doc_id)
+                res.append(doc_id)
+        return res
+
+
+class XJPathCollection(object):
+    """Documents addressed by integer ids with indexes on xj paths."""
+
+    def __init__(self, docs=()):
+        """Creates a collection.
+
+        :param iterable docs: Documents to add.
+        """
+
+        self._docs = {}
+        self._indexes = {}
+        self._next_id = 0
+        for doc in docs:
+            self.add(doc)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def __getitem__(self, doc_id):
+        return self._docs[doc_id]
+
+    def __iter__(self):
+        return iter(sorted(self._docs))
+
+    @property
+    def indexes(self):
+        """Paths of declared indexes."""
+
+        return tuple(sorted(self._indexes))
+
+    def add_index(self, xj_path, ordered=False):
+        """Declares an index on a path and indexes existing documents.
+
+        :param str|CompiledPath xj_path: A path to index.
+        :param bool ordered: Keep values sorted to support range queries.
+        """
+
+        path = compile(xj_path)
+        index = _OrderedIndex(path) if ordered else _HashIndex(path)
+        for doc_id, doc in self._docs.items():
+            index.insert(doc_id, doc)
+        self._indexes[path.path] = index
+
+    def drop_index(self, xj_path):
+        """Removes an index.
+
+        :param str|CompiledPath xj_path: An indexed path.
+        """
+
+        self._get_index(xj_path)
+        del self._indexes[compile(xj_path).path]
+
+    def add(self, doc):
+        """Adds a document.
+
+        :param dict|list doc: A document.
+        :rtype: int
+        :return: Id of the document.
+        """
+
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = doc
+        for index in self._indexes.values():
+            index.insert(doc_id, doc)
+        return doc_id
+
+    def replace(self, doc_id, doc):
+        """Replaces a document keeping its id.
+
+        :param int doc_id: Id of an existing document.
+        :param dict|list doc: A new document.
+        :raise KeyError: If there is no such document.
+        """
+
+        if doc_id not in self._docs:
+            raise KeyError(doc_id)
+        for index in self._indexes.values():
+            index.delete(doc_id)
+            index.insert(doc_id, doc)
+        self._docs[doc_id] = doc
+
+    def remove(self, doc_id):
+        """Removes a document.
+
+        :param int doc_id: Id of an existing document.
+        :return: The removed document.
+        :raise KeyError: If there is no such document.
+        """
+
+        doc = self._docs.pop(doc_id)
+        for index in self._indexes.values():
+            index.delete(doc_id)
+        return doc
+
+    def _get_index(self, xj_path):
+        try:
+            return self._indexes[compile(xj_path).path]
+        except KeyError:
+            raise XJPathError('Path is not indexed', (xj_path,))
+
+    def find(self, xj_path, value):
+        """Finds documents where an indexed path has a value.
+
+        :param str|CompiledPath xj_path: An indexed path.
+        :param value: A value to look for.
+        :rtype: list[int]
+        :return: Ids of found documents in ascending order.
+        """
+
+        return self._get_index(xj_path).find(value)
+
+    def find_range(self, xj_path, low=None, high=None, include_low=True,
+                   include_high=True):
+        """Finds documents where an indexed path has a value in a range.
+
+        :param str|CompiledPath xj_path: A path with an ordered index.
+        :param int|float|str|None low: Lower bound or None for no bound.
+        :param int|float|str|None high: Upper bound or None for no bound.
+        :param bool include_low: Include values equal to the lower bound.
+        :param bool include_high: Include values equal to the upper bound.
+        :rtype: list[int]
+        :return: Ids of found documents ordered by the matched value.
+        """
+
+        index = self._get_index(xj_path)
+        if not isinstance(index, _OrderedIndex):
+            raise XJPathError('Path does not have an ordered index',
+                              (xj_path,))
+        if low is None and high is None:
+            raise XJPathError('At least one range bound is required')
+        return index.find_range(low, high, include_low, include_high)
+
+    def documents(self, doc_ids):
+        """Returns documents for a list of ids.
+
+        :param iterable doc_ids: Document ids, as returned by find().
+        :rtype: list
+        """
+
+        return [self._docs[doc_id] for doc_id in doc_ids]
@@ -0,0 +1,137 @@
+"""Batch lookups of a single XJPath expression over many documents.
+
+lookup_column evaluates one compiled path across a sequence of documents
+and returns the found values as a column together with a validity mask.
+Paths ending with '#' or '%' type postfix produce a compact array.array,
+or a NumPy array if NumPy is installed:
+
+>>> docs = [{'m': {'latency': .5}}, {}, {'m': {'latency': 1.5}}]
+>>> col = lookup_column(docs, 'm.latency%')
+>>> col.values
+array('d', [0.5, 0.0, 1.5])
+>>> list(col.mask)
+[1, 0, 1]
+"""
+
+import array
+import collections
+
+from xjpath.aggregation import _aggregator
+from xjpath.xjpath import compile
+from xjpath.xjpath import XJPathError
+
+
+Column = collections.namedtuple('Column', ('values', 'mask'))
+
+# Array type codes used for type postfixes of the last path key.
+_TYPECODES = {
+    int: 'q',
+    float: 'd',
+}
+
+# Array type codes of aggregates that do not depend on the path type.
+_AGGREGATE_TYPECODES = {
+    'count': 'q',
+    'avg': 'd',
+    'any': None,
+    'all': None,
+    'top': None,
+    'bottom': None,
+}
+
+
+def _resolve_typecode(path, dtype, func=None):
+    """Picks an array type code from dtype or a path type postfix.
+
+    :param CompiledPath path: A compiled path.
+    :param str|type|None dtype: array type code or int/float type.
+    :param str|None func: Name of an aggregate function.
+    :rtype: str|None
+    """
+
+    if dtype is None:
+        if func in _AGGREGATE_TYPECODES:
+            return _AGGREGATE_TYPECODES[func]
+        if not path.steps:
+            return None
+        return _TYPECODES.get(path.steps[-1][2])
+    if isinstance(dtype, str):
+        return dtype
+    try:
+        return _TYPECODES[dtype]
+    except KeyError:
+        raise XJPathError('Unsupported column type', (dtype,))
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def lookup_column(docs, xj_path, default=None, dtype=None, use_numpy=None,
+                  aggregate=None, k=None):
+    """Looks up a xj path in every document of a sequence.
+
+    :param iterable docs: Documents to look into.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param default: A value to store for documents missing the path. It is
+                    zero for typed columns by default.
+    :param str|type|None dtype: array type code or int/float type of the
+                                column. By default it is taken from the
+                                '#' or '%' postfix of the path.
+    :param bool|None use_numpy: Return NumPy arrays for typed columns.
+                                By default NumPy is used if installed.
+    :param str|None aggregate: Store an aggregate of values matched in
+                               every document instead of the found value,
+                               see xjpath.aggregation.
+    :param int|None k: Number of values kept by top and bottom aggregates.
+    :rtype: Column
+    :return: Column of found values and a mask where 1 marks documents
+             where the path exists and 0 the missing ones. Untyped columns
+             are returned as lists. For aggregates 0 marks documents where
+             the aggregate is None.
+    """
+
+    path = compile(xj_path)
+    lookup = path.lookup
+    if aggregate is not None:
+        reduce = _aggregator(path, aggregate, k)
+
+        def lookup(doc):
+            value = reduce(doc)
+            return value, value is not None
+
+    typecode = _resolve_typecode(path, dtype, aggregate)
+    mask = bytearray()
+    mask_append = mask.append
+
+    if typecode is None:
+        values = []
+    else:
+        values = array.array(typecode)
+        if default is None:
+            default = 0.0 if typecode in 'fd' else 0
+    values_append = values.append
+
+    for doc in docs:
+        value, exists = lookup(doc)
+        if not exists:
+            value = default
+        try:
+            values_append(value)
+        except (TypeError, OverflowError) as e:
+            raise XJPathError('Value cannot be stored in a column',
+                              (path.path, typecode) + e.args)
+        mask_append(exists)
+
+    if typecode is not None and use_numpy is not False:
+        numpy = _import_numpy()
+        if numpy is not None:
+            return Column(numpy.frombuffer(values, dtype=typecode),
+                          numpy.frombuffer(mask, dtype=bool))
+        if use_numpy:
+            raise XJPathError('NumPy is not installed')
+    return Column(values, mask)
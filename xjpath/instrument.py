@@ -0,0 +1,197 @@
+"""Opt-in instrumentation of XJPath lookups.
+
+When enabled every lookup through a compiled path, including path_lookup,
+strict_path_lookup and XJPath, is timed and accounted per path expression.
+When disabled lookups only check that no instrumentation is installed.
+
+>>> from xjpath import instrument
+>>> recorder = instrument.enable()
+>>> xjpath.path_lookup({'a': [1, 2]}, 'a.*')
+((1, 2), True)
+>>> instrument.snapshot()['a.*'].fanout_max
+2
+>>> instrument.disable()
+"""
+
+import bisect
+import collections
+import threading
+import time
+
+from xjpath.xjpath import _MARKERS
+from xjpath.xjpath import _set_instrumentation
+from xjpath.xjpath import _walk
+from xjpath.xjpath import XJPathError
+
+
+HIT = 'hit'
+MISS = 'miss'
+ERROR = 'error'
+
+# Upper bounds of latency histogram buckets in seconds. The last bucket
+# counts everything slower than the last bound.
+DEFAULT_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1)
+
+LookupEvent = collections.namedtuple(
+    'LookupEvent', ('path', 'seconds', 'outcome', 'fanout'))
+
+
+class PathStats(object):
+    """Counters of lookups of a single path expression.
+
+    :ivar int calls: Number of lookups.
+    :ivar float total_time: Cumulative lookup time in seconds.
+    :ivar list[int] latency: Lookup counts per latency bucket.
+    :ivar int hits: Lookups that found a value.
+    :ivar int misses: Lookups that found nothing.
+    :ivar int errors: Lookups that raised XJPathError or TypeError.
+    :ivar int fanout_total: Number of values collected by '*' markers.
+    :ivar int fanout_max: Largest number of values of a single lookup.
+    """
+
+    __slots__ = ('calls', 'total_time', 'latency', 'hits', 'misses',
+                 'errors', 'fanout_total', 'fanout_max')
+
+    def __init__(self, buckets_count):
+        self.calls = 0
+        self.total_time = 0.
+        self.latency = [0] * buckets_count
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.fanout_total = 0
+        self.fanout_max = 0
+
+    def copy(self):
+        res = PathStats(0)
+        for name in self.__slots__:
+            setattr(res, name, getattr(self, name))
+        res.latency = list(self.latency)
+        return res
+
+    def __repr__(self):
+        return ('PathStats(calls=%d, total_time=%f, hits=%d, misses=%d, '
+                'errors=%d, fanout_max=%d)' %
+                (self.calls, self.total_time, self.hits, self.misses,
+                 self.errors, self.fanout_max))
+
+
+class Instrumentation(object):
+    """Collects lookup statistics per path expression."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, sink=None,
+                 clock=time.perf_counter):
+        """
+        :param tuple[float] buckets: Latency bucket bounds in seconds.
+        :param callable|None sink: Called with a LookupEvent per lookup.
+        :param callable clock: Returns current time in seconds.
+        """
+
+        self.buckets = tuple(sorted(buckets))
+        self.sink = sink
+        self._clock = clock
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def observe(self, path, data_obj, create_dict_path):
+        """Looks up a compiled path recording its statistics."""
+
+        start = self._clock()
+        try:
+            value, exists = _walk(data_obj, path.steps, create_dict_path)
+        except (XJPathError, TypeError):
+            self.record(path, self._clock() - start, ERROR)
+            raise
+        seconds = self._clock() - start
+        if not exists:
+            self.record(path, seconds, MISS)
+        elif isinstance(value, tuple) and any(step[0] in _MARKERS
+                                              for step in path.steps):
+            self.record(path, seconds, HIT, len(value))
+        else:
+            self.record(path, seconds, HIT)
+        return value, exists
+
+    def record(self, path, seconds, outcome, fanout=None):
+        """Accounts a single lookup.
+
+        :param CompiledPath path: A looked up path.
+        :param float seconds: Lookup time.
+        :param str outcome: HIT, MISS or ERROR.
+        :param int|None fanout: Number of values collected by '*'.
+        """
+
+        with self._lock:
+            stats = self._stats.get(path.path)
+            if stats is None:
+                stats = self._stats[path.path] = PathStats(
+                    len(self.buckets) + 1)
+            stats.calls += 1
+            stats.total_time += seconds
+            stats.latency[bisect.bisect_left(self.buckets, seconds)] += 1
+            if outcome == HIT:
+                stats.hits += 1
+            elif outcome == MISS:
+                stats.misses += 1
+            else:
+                stats.errors += 1
+            if fanout is not None:
+                stats.fanout_total += fanout
+                stats.fanout_max = max(stats.fanout_max, fanout)
+        if self.sink is not None:
+            self.sink(LookupEvent(path.path, seconds, outcome, fanout))
+
+    def snapshot(self):
+        """Returns a copy of statistics.
+
+        :rtype: dict[str, PathStats]
+        """
+
+        with self._lock:
+            return dict((path, stats.copy())
+                        for path, stats in self._stats.items())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_current = None
+
+
+def enable(buckets=DEFAULT_BUCKETS, sink=None):
+    """Installs a new instrumentation for all lookups.
+
+    :param tuple[float] buckets: Latency bucket bounds in seconds.
+    :param callable|None sink: Called with a LookupEvent per lookup.
+    :rtype: Instrumentation
+    """
+
+    global _current
+    _current = Instrumentation(buckets, sink)
+    _set_instrumentation(_current)
+    return _current
+
+
+def disable():
+    """Removes the installed instrumentation."""
+
+    global _current
+    _current = None
+    _set_instrumentation(None)
+
+
+def snapshot():
+    """Returns statistics of the installed instrumentation.
+
+    :rtype: dict[str, PathStats]
+    """
+
+    return {} if _current is None else _current.snapshot()
+
+
+def reset():
+    """Drops statistics of the installed instrumentation."""
+
+    if _current is not None:
+        _current.reset()
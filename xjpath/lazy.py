@@ -0,0 +1,325 @@
+"""JSON documents decoded lazily from raw bytes.
+
+A LazyDocument wraps JSON text in bytes, a memoryview or an mmap and can
+be passed to path_lookup, strict_path_lookup and XJPath instead of a
+decoded object. Only values reached by a path are decoded. The first time
+a step goes into an object or an array, offsets of its members are
+indexed and the index is reused by later lookups. Members the path does
+not go into are skipped, so memory stays proportional to what is looked
+up:
+
+>>> doc = LazyDocument.from_file('export.json')
+>>> xjpath.path_lookup(doc, 'meta.version')
+('1.2', True)
+>>> xjpath.XJPath(doc)['records.@-1.id']
+42
+
+Key, index, '*' and slice steps are followed by the index, and a key or
+an index step that does not fit the container type is a miss without
+decoding it. The value at any other step, such as '**' or a '*' marker
+with a predicate, is decoded and looked into as a regular object. If an
+object has duplicate keys, the last one is used, as json.loads does.
+"""
+
+import array
+import json
+import mmap
+
+from xjpath.stream import _ARRAY_END
+from xjpath.stream import _ARRAY_START
+from xjpath.stream import _COLON
+from xjpath.stream import _COMMA
+from xjpath.stream import _FLAT_RE
+from xjpath.stream import _OBJECT_END
+from xjpath.stream import _OBJECT_START
+from xjpath.stream import _QUOTE
+from xjpath.stream import _SCALAR_END_RE
+from xjpath.stream import _Scanner
+from xjpath.stream import _SIMPLE_STRING_RE
+from xjpath.stream import _STRING_TAIL_RE
+from xjpath.stream import _WHITESPACE_RE
+from xjpath.xjpath import _check_index_type
+from xjpath.xjpath import _check_key_type
+from xjpath.xjpath import _INDEX
+from xjpath.xjpath import _KEY
+from xjpath.xjpath import _SLICE
+from xjpath.xjpath import _StepsLookup
+from xjpath.xjpath import _walk
+from xjpath.xjpath import _WILDCARD
+from xjpath.xjpath import XJPathError
+
+
+def _error(msg, pos):
+    return XJPathError('Invalid JSON: %s' % msg, (pos,))
+
+
+def _value_end(buf, pos):
+    """Returns the offset right after the value that starts at pos."""
+
+    char = buf[pos]
+    if char == _QUOTE:
+        m = _STRING_TAIL_RE.match(buf, pos + 1)
+        if m is None:
+            raise _error('unterminated string', pos)
+        return m.end()
+    if char != _OBJECT_START and char != _ARRAY_START:
+        m = _SCALAR_END_RE.search(buf, pos)
+        return len(buf) if m is None else m.start()
+    match = _FLAT_RE.match
+    end = len(buf)
+    depth = 0
+    while True:
+        pos = match(buf, pos).end()
+        if pos == end:
+            raise _error('unexpected end', pos)
+        char = buf[pos]
+        if char == _QUOTE:
+            raise _error('unterminated string', pos)
+        pos += 1
+        if char == _OBJECT_START or char == _ARRAY_START:
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _next_char(buf, pos):
+    """Skips whitespaces, returns the position and code of a character."""
+
+    pos = _WHITESPACE_RE.match(buf, pos).end()
+    if pos == len(buf):
+        raise _error('unexpected end', pos)
+    return pos, buf[pos]
+
+
+def _index_object(buf, pos):
+    """Indexes the object at pos.
+
+    :rtype: tuple[dict, int]
+    :return: Mapping of a key to an offset of its value and the end of
+             the object.
+    """
+
+    index = {}
+    pos, char = _next_char(buf, pos + 1)
+    if char == _OBJECT_END:
+        return index, pos + 1
+    while True:
+        if char != _QUOTE:
+            raise _error('expected object key', pos)
+        m = _SIMPLE_STRING_RE.match(buf, pos)
+        if m is not None:
+            key = m.group(1).decode('utf-8')
+            end = m.end()
+        else:
+            end = _value_end(buf, pos)
+            key = json.loads(bytes(buf[pos:end]).decode('utf-8'))
+        pos, char = _next_char(buf, end)
+        if char != _COLON:
+            raise _error('expected :', pos)
+        pos, char = _next_char(buf, pos + 1)
+        index[key] = pos
+        pos, char = _next_char(buf, _value_end(buf, pos))
+        if char == _OBJECT_END:
+            return index, pos + 1
+        if char != _COMMA:
+            raise _error('expected , or }', pos)
+        pos, char = _next_char(buf, pos + 1)
+
+
+def _index_array(buf, pos):
+    """Indexes the array at pos.
+
+    :rtype: tuple[array.array, int]
+    :return: Offsets of elements and the end of the array.
+    """
+
+    index = array.array('q')
+    pos, char = _next_char(buf, pos + 1)
+    if char == _ARRAY_END:
+        return index, pos + 1
+    append = index.append
+    while True:
+        append(pos)
+        pos, char = _next_char(buf, _value_end(buf, pos))
+        if char == _ARRAY_END:
+            return index, pos + 1
+        if char != _COMMA:
+            raise _error('expected , or ]', pos)
+        pos = _WHITESPACE_RE.match(buf, pos + 1).end()
+
+
+class LazyDocument(_StepsLookup):
+    """JSON text looked up without decoding the whole document."""
+
+    __slots__ = ('_buf', '_root', '_indexes', '_view', '_mmap')
+
+    def __init__(self, source):
+        """
+        :param bytes|bytearray|memoryview|mmap|str source: JSON text. It
+            must not change while the document is used.
+        """
+
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        self._view = None
+        if isinstance(source, mmap.mmap):
+            # A view makes the scanner treat mmap as a buffer, not a file.
+            source = self._view = memoryview(source)
+        self._buf = source
+        self._mmap = None
+        self._indexes = {}
+        scanner = _Scanner(source)
+        if scanner.peek() < 0:
+            raise XJPathError('Invalid JSON: empty document', (0,))
+        self._root = scanner.tell()
+
+    @classmethod
+    def from_file(cls, file_name):
+        """Memory maps a JSON file.
+
+        :param str file_name: A path to the file.
+        :rtype: LazyDocument
+        """
+
+        with open(file_name, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        doc = cls(buf)
+        doc._mmap = buf
+        return doc
+
+    def close(self):
+        """Releases a mmap source, a file opened by from_file is unmapped."""
+
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def decode(self):
+        """Decodes the whole document."""
+
+        return self._decode(self._root)
+
+    @property
+    def indexed_containers(self):
+        """Number of objects and arrays indexed so far."""
+
+        return len(self._indexes)
+
+    def _decode(self, pos):
+        scanner = _Scanner(self._buf)
+        scanner.seek(pos)
+        return scanner.read_value()
+
+    def _probe(self, pos):
+        """Returns the value at pos, or an empty one of a container type."""
+
+        char = self._buf[pos]
+        if char == _OBJECT_START:
+            return {}
+        if char == _ARRAY_START:
+            return []
+        return self._decode(pos)
+
+    def _index(self, pos):
+        """Returns offsets of members of the container at pos.
+
+        :rtype: dict|array.array
+        :return: Mapping of a key to an offset for an object, offsets of
+                 elements for an array.
+        """
+
+        index = self._indexes.get(pos)
+        if index is not None:
+            return index
+        if self._buf[pos] == _OBJECT_START:
+            index = _index_object(self._buf, pos)[0]
+        else:
+            index = _index_array(self._buf, pos)[0]
+        self._indexes[pos] = index
+        return index
+
+    def lookup_steps(self, steps, create_dict_path):
+        if create_dict_path:
+            raise XJPathError('LazyDocument is read only')
+        return self._walk_at(self._root, steps, 0)
+
+    def _walk_at(self, pos, steps, step_pos):
+        """Looks up steps from step_pos on in the value at pos."""
+
+        buf = self._buf
+        while step_pos < len(steps):
+            kind, key, val_type = steps[step_pos]
+            char = buf[pos]
+            if kind == _KEY and char == _OBJECT_START:
+                child = self._index(pos).get(key)
+                if child is None:
+                    return None, False
+                if val_type is not None:
+                    _check_key_type(key, self._probe(child), val_type)
+            elif kind == _INDEX and char == _ARRAY_START and self._index(pos):
+                try:
+                    child = self._index(pos)[key]
+                except IndexError:
+                    return None, False
+                if val_type is not None:
+                    _check_index_type(key, self._probe(child), val_type)
+            elif ((kind == _WILDCARD and key is None and
+                   (char == _OBJECT_START or char == _ARRAY_START)) or
+                  (kind == _SLICE and char == _ARRAY_START)):
+                return self._walk_items(pos, steps, step_pos), True
+            elif kind == _KEY and char == _ARRAY_START:
+                # Only a string element may equal the key, _walk fails to
+                # use it as an index then. The array is not kept indexed.
+                strings = [self._decode(child)
+                           for child in _index_array(buf, pos)[0]
+                           if buf[child] == _QUOTE]
+                return _walk(strings, steps[step_pos:], False)
+            elif kind == _INDEX and (char == _OBJECT_START or
+                                     char == _ARRAY_START):
+                # An object or an empty array, only the type matters.
+                return _walk(self._probe(pos), steps[step_pos:], False)
+            else:
+                # Other steps need the decoded value.
+                return _walk(self._decode(pos), steps[step_pos:], False)
+            pos = child
+            step_pos += 1
+        return self._decode(pos), True
+
+    def _walk_items(self, pos, steps, step_pos):
+        """Looks up the rest of steps in every element a marker matches."""
+
+        kind, key, val_type = steps[step_pos]
+        index = self._index(pos)
+        if kind == _SLICE:
+            indexes = range(*key.indices(len(index)))
+            children = [index[idx] for idx in indexes]
+        elif isinstance(index, dict):
+            children = index.values()
+        else:
+            children = index
+        last = step_pos + 1 == len(steps)
+        res = []
+        for num, child in enumerate(children):
+            # Element types are checked as elements are reached, as _walk
+            # does, so errors of earlier elements are raised first.
+            if val_type is not None:
+                _check_index_type(indexes[num], self._probe(child),
+                                  val_type)
+            if last:
+                res.append(self._decode(child))
+                continue
+            value, exists = self._walk_at(child, steps, step_pos + 1)
+            if exists:
+                res.append(value)
+        return tuple(res)
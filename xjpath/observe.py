@@ -0,0 +1,325 @@
+"""Documents notifying subscribers about changes of watched paths.
+
+A TrackedDocument wraps a data structure, changes it through path_set,
+path_delete and the other write functions, and records which paths were
+written. Subscriptions watch XJPath expressions, '*' and the other
+markers included. After a write, or a batch of writes, only subscriptions
+whose paths may intersect a written path are looked up again, and their
+callbacks get a Change if the value differs:
+
+>>> doc = TrackedDocument({'services': {'web': {'port': 80}}})
+>>> sub = doc.subscribe('services.*.port', print)
+>>> with doc.batch():
+...     doc.set('services.web.port', 8080)
+...     doc.set('services.api', {'port': 9000})
+Change(path='services.*.port', old=((80,), True), new=((8080, 9000), True))
+
+Subscriptions are kept in a prefix tree of their leading plain keys, so
+the cost of a write depends on the written path and the subscriptions it
+reaches, not on the number of subscriptions. Watched values are kept as
+copies; a write to a plain path copies only the containers along it, not
+the whole watched value. Changes made to the data structure directly have
+to be reported with mark_changed, with the path that was changed.
+"""
+
+import collections
+import contextlib
+import copy
+
+from xjpath.xjpath import _INDEX
+from xjpath.xjpath import _KEY
+from xjpath.xjpath import _WILDCARD
+from xjpath.xjpath import apply_updates
+from xjpath.xjpath import compile
+from xjpath.xjpath import path_delete
+from xjpath.xjpath import path_set
+from xjpath.xjpath import path_setdefault
+
+
+Change = collections.namedtuple('Change', ('path', 'old', 'new'))
+Change.__doc__ = """A change of a subscribed path.
+
+:ivar str path: The subscribed path.
+:ivar tuple old: (value, exists) result before the change.
+:ivar tuple new: (value, exists) result after the change.
+"""
+
+
+def _snapshot(res):
+    """Copies containers of a lookup result, they may change in place."""
+
+    value, exists = res
+    if isinstance(value, (dict, list, tuple)):
+        return copy.deepcopy(value), exists
+    return res
+
+
+def _plain_keys(steps):
+    """Returns (kind, key) pairs of steps, None if a step is not a plain
+    key or index."""
+
+    keys = []
+    for kind, key, _ in steps:
+        if kind != _KEY and kind != _INDEX:
+            return None
+        keys.append((kind, key))
+    return keys
+
+
+def _sync(old, live, keys):
+    """Copies a snapshot, updated from the live value along keys only.
+
+    Containers off the keys are shared with the old snapshot, so a write
+    costs the size of the written value, not of the whole snapshot.
+
+    :param old: A snapshot of the value.
+    :param live: The value after a write.
+    :param list keys: (kind, key) pairs of the written path relative to
+                      the value.
+    """
+
+    if keys:
+        (kind, key), rest = keys[0], keys[1:]
+        if kind == _KEY and type(old) is dict and type(live) is dict:
+            new = dict(old)
+            if key not in live:
+                new.pop(key, None)
+            elif key in old:
+                new[key] = _sync(old[key], live[key], rest)
+            else:
+                new[key] = _snapshot((live[key], True))[0]
+            return new
+        if (kind == _INDEX and type(old) is list and type(live) is list and
+                len(old) == len(live)):
+            if not -len(live) <= key < len(live):
+                return old
+            new = list(old)
+            new[key] = _sync(old[key], live[key], rest)
+            return new
+    return _snapshot((live, True))[0]
+
+
+def _steps_intersect(steps, written):
+    """Tells if a value at steps may change when written steps change.
+
+    :param tuple steps: Steps of a subscribed path.
+    :param tuple written: Steps of a written path.
+    """
+
+    for (kind, key, _), (written_kind, written_key, _) in zip(steps,
+                                                              written):
+        if kind == _KEY and written_kind == _KEY:
+            if key != written_key:
+                return False
+        elif kind == _WILDCARD and key is None and written_kind in (
+                _KEY, _INDEX):
+            continue
+        elif (kind == _KEY) != (written_kind == _KEY) and _INDEX in (
+                kind, written_kind):
+            # A dict key and an array index never address the same value.
+            return False
+        else:
+            # Predicates, descendants, slices and indexes that elements
+            # shift under.
+            return True
+    return True
+
+
+class Subscription(object):
+    """A watched path of a TrackedDocument."""
+
+    __slots__ = ('path', 'callback', 'result', '_node')
+
+    def __init__(self, path, callback, node):
+        #: The watched CompiledPath.
+        self.path = path
+        self.callback = callback
+        #: The last (value, exists) result of the path.
+        self.result = None
+        self._node = node
+
+    def cancel(self):
+        """Stops notifications of the subscription."""
+
+        if self._node is not None:
+            self._node.subs.remove(self)
+            self._node = None
+
+
+class _SubNode(object):
+    """A node of the subscriptions prefix tree."""
+
+    __slots__ = ('children', 'subs')
+
+    def __init__(self):
+        self.children = {}
+        self.subs = []
+
+    def iter_subs(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            for sub in node.subs:
+                yield sub
+            stack.extend(node.children.values())
+
+
+def _leading_keys(steps):
+    keys = []
+    for kind, key, _ in steps:
+        if kind != _KEY:
+            break
+        keys.append(key)
+    return keys
+
+
+class TrackedDocument(object):
+    """A data structure changed through writes that notify subscribers."""
+
+    def __init__(self, data):
+        """
+        :param dict|list data: The tracked data structure.
+        """
+
+        self.data = data
+        self._root = _SubNode()
+        self._pending = None
+
+    def subscribe(self, xj_path, callback):
+        """Watches a path.
+
+        :param str|CompiledPath xj_path: A path to watch.
+        :param callable callback: Called with a Change when the value at
+                                  the path changes.
+        :rtype: Subscription
+        """
+
+        path = compile(xj_path)
+        node = self._root
+        for key in _leading_keys(path.steps):
+            node = node.children.setdefault(key, _SubNode())
+        sub = Subscription(path, callback, node)
+        sub.result = _snapshot(path.lookup(self.data))
+        node.subs.append(sub)
+        return sub
+
+    def _candidates(self, steps):
+        """Yields subscriptions that may intersect written steps."""
+
+        node = self._root
+        for key in _leading_keys(steps):
+            for sub in node.subs:
+                yield sub
+            node = node.children.get(key)
+            if node is None:
+                return
+        for sub in node.iter_subs():
+            yield sub
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Delays notifications until the end of a with block.
+
+        Subscriptions reached by several writes are looked up once.
+        """
+
+        if self._pending is not None:
+            yield
+            return
+        self._pending = []
+        try:
+            yield
+        finally:
+            written, self._pending = self._pending, None
+            self._notify(written)
+
+    def mark_changed(self, xj_path):
+        """Reports a change made to the data structure directly.
+
+        :param str|CompiledPath xj_path: The changed path.
+        """
+
+        self._written([compile(xj_path)])
+
+    def _written(self, paths):
+        if self._pending is not None:
+            self._pending.extend(paths)
+        else:
+            self._notify(paths)
+
+    def _notify(self, paths):
+        affected = collections.OrderedDict()
+        for path in dict.fromkeys(paths):
+            steps = path.steps
+            for sub in self._candidates(steps):
+                if _steps_intersect(sub.path.steps, steps):
+                    affected.setdefault(id(sub), (sub, []))[1].append(path)
+        changes = []
+        for sub, written in affected.values():
+            res = sub.path.lookup(self.data)
+            snapshot = self._update_snapshot(sub, res, written)
+            if snapshot != sub.result:
+                changes.append((sub, Change(sub.path.path, sub.result,
+                                            res)))
+                sub.result = snapshot
+        for sub, change in changes:
+            sub.callback(change)
+
+    @staticmethod
+    def _update_snapshot(sub, res, written):
+        """Returns a snapshot of a new result of a subscription.
+
+        Values of plain paths are copied along written plain paths only,
+        other results are copied whole.
+        """
+
+        value, exists = res
+        old_value, old_exists = sub.result
+        sub_keys = _plain_keys(sub.path.steps)
+        if not (exists and old_exists) or sub_keys is None:
+            return _snapshot(res)
+        for path in written:
+            keys = _plain_keys(path.steps)
+            if keys is None or keys[:len(sub_keys)] != sub_keys:
+                return _snapshot(res)
+            old_value = _sync(old_value, value, keys[len(sub_keys):])
+        return old_value, True
+
+    def set(self, xj_path, value):
+        """Sets a value as path_set does and notifies subscribers."""
+
+        path = compile(xj_path)
+        try:
+            return path_set(self.data, path, value)
+        finally:
+            self._written([path])
+
+    def setdefault(self, xj_path, default=None):
+        """Sets a missing value as path_setdefault does."""
+
+        path = compile(xj_path)
+        try:
+            return path_setdefault(self.data, path, default)
+        finally:
+            self._written([path])
+
+    def delete(self, xj_path):
+        """Deletes values as path_delete does and notifies subscribers."""
+
+        path = compile(xj_path)
+        try:
+            return path_delete(self.data, path)
+        finally:
+            self._written([path])
+
+    def apply_updates(self, updates):
+        """Applies (path, value) updates as apply_updates does.
+
+        Subscribers are notified once for all updates.
+        """
+
+        updates = [(compile(path), value) for path, value in updates]
+        try:
+            return apply_updates(self.data, updates)
+        finally:
+            self._written([path for path, _ in updates])
@@ -0,0 +1,142 @@
+"""Parallel lookups of '*' paths in a single large document.
+
+parallel_lookup splits elements matched by the first '*' or slice marker
+of a path into ranges and looks the rest of the path up in every range in
+a pool of forked processes. Workers read the document from memory shared
+with the parent copy-on-write, so only ranges and found values are sent
+between processes. Results are merged in the original order and equal
+those of path_lookup:
+
+>>> value, exists = parallel_lookup(doc, 'records.*.attrs.*.value',
+...                                 workers=8)
+
+Forking a pool costs tens of milliseconds, so markers matching fewer than
+min_size elements are looked up serially, as are paths without a marker,
+with '**' as the first marker, and platforms without fork. See
+benchmarks/bench_parallel.py for where the pool breaks even.
+"""
+
+from concurrent import futures
+import multiprocessing
+import os
+
+from xjpath.xjpath import _check_index_type
+from xjpath.xjpath import _MARKERS
+from xjpath.xjpath import _SLICE
+from xjpath.xjpath import _walk
+from xjpath.xjpath import _WILDCARD
+from xjpath.xjpath import compile
+
+
+DEFAULT_MIN_SIZE = 100000
+
+# Chunks per worker, more chunks balance uneven elements better.
+_CHUNKS_PER_WORKER = 4
+
+# Elements and the rest of the path of a worker, set by _init_worker.
+_worker_state = None
+
+
+def _init_worker(items, indexes, step, rest):
+    global _worker_state
+    _worker_state = (items, indexes, step, rest)
+
+
+def _lookup_range(start, stop):
+    """Looks the rest of the path up in a range of elements.
+
+    :rtype: list
+    :return: Found values in the order of elements.
+    """
+
+    items, indexes, step, rest = _worker_state
+    kind, key, val_type = step
+    res = []
+    append = res.append
+    for pos in range(start, stop):
+        if indexes is None:
+            item = items[pos]
+            if key is not None and not key.match(item):
+                continue
+        else:
+            idx = indexes[pos]
+            item = items[idx]
+            _check_index_type(idx, item, val_type)
+        value, exists = _walk(item, rest, False)
+        if exists:
+            append(value)
+    return res
+
+
+def _marker_items(value, step):
+    """Returns elements a marker step matches in the value.
+
+    :rtype: tuple
+    :return: A sequence of elements and indexes of selected ones for a
+             slice, None if the value has no elements to match.
+    """
+
+    kind, key, _ = step
+    if kind == _WILDCARD:
+        if isinstance(value, list):
+            return value, None
+        if isinstance(value, dict):
+            return list(value.values()), None
+    elif kind == _SLICE and isinstance(value, (list, tuple)):
+        return value, range(*key.indices(len(value)))
+    return None
+
+
+def parallel_lookup(data_obj, xj_path, workers=None,
+                    min_size=DEFAULT_MIN_SIZE):
+    """Looks up a xj path in the data_obj with a pool of processes.
+
+    :param dict|list data_obj: An object to look into.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param int|None workers: Number of processes, the number of CPUs if
+                             None.
+    :param int min_size: Minimum number of elements of the first marker
+                         looked up in parallel.
+    :return: A tuple where 0 value is an extracted value and a second
+             field that tells if value either was found or not found.
+    """
+
+    path = compile(xj_path)
+    steps = path.steps
+    if workers is None:
+        workers = os.cpu_count() or 1
+    for pos, step in enumerate(steps):
+        if step[0] in _MARKERS:
+            break
+    else:
+        return path.lookup(data_obj)
+
+    if (workers < 2 or step[0] not in (_WILDCARD, _SLICE) or
+            pos + 1 == len(steps) or
+            'fork' not in multiprocessing.get_all_start_methods()):
+        return path.lookup(data_obj)
+
+    value, exists = _walk(data_obj, steps[:pos], False)
+    if not exists:
+        return value, exists
+    matched = _marker_items(value, step)
+    if matched is None:
+        return None, False
+    items, indexes = matched
+    size = len(items) if indexes is None else len(indexes)
+    if size < min_size:
+        return path.lookup(data_obj)
+
+    chunk = -(-size // (workers * _CHUNKS_PER_WORKER))
+    # Forked workers get initargs without pickling, each pool its own.
+    with futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(items, indexes, step, steps[pos + 1:])) as executor:
+        pending = [executor.submit(_lookup_range, start,
+                                   min(start + chunk, size))
+                   for start in range(0, size, chunk)]
+        res = []
+        for future in pending:
+            res.extend(future.result())
+    return tuple(res), True
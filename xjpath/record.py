@@ -0,0 +1,210 @@
+"""Extraction of flat typed records from documents.
+
+RecordSpec compiles an ordered mapping of field names to XJPath
+expressions into a single extractor. All paths are looked up in one
+traversal of a document, and every document becomes a compact row:
+
+>>> spec = RecordSpec([('id', 'id#'), ('name', ('user.name$', '')),
+...                    ('tags', 'tags.*')], row_type='namedtuple')
+>>> spec.row({'id': 1, 'user': {}, 'tags': ['a', 'b']})
+Record(id=1, name='', tags=('a', 'b'))
+
+A field is either a path or a tuple of a path and a default used when the
+path does not exist. Type postfixes of a path are checked as usual, but a
+mismatch does not stop the extraction: the field gets its default and the
+error is counted in an ErrorSummary:
+
+>>> errors = ErrorSummary()
+>>> rows = list(spec.iter_rows(docs, errors))
+>>> errors.counts
+Counter({'id': 2})
+"""
+
+import collections
+import keyword
+
+from xjpath.xjpath import _walk_trie
+from xjpath.xjpath import PathSet
+from xjpath.xjpath import XJPathError
+
+
+class ErrorSummary(object):
+    """Type mismatches found while extracting records, per field."""
+
+    def __init__(self):
+        #: Number of mismatches of every field.
+        self.counts = collections.Counter()
+        #: The first error message of every field.
+        self.messages = {}
+
+    def add(self, field, error):
+        """Counts an error of a field.
+
+        :param str field: A field name.
+        :param XJPathError|TypeError error: The lookup error.
+        """
+
+        self.counts[field] += 1
+        if field not in self.messages:
+            self.messages[field] = str(error)
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self.counts))
+
+
+class _SlotsRecord(object):
+    """Base class of records built for the 'slots' row type."""
+
+    __slots__ = ()
+    _fields = ()
+
+    def __iter__(self):
+        for name in self._fields:
+            yield getattr(self, name)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % (name, getattr(self, name)) for name in self._fields))
+
+
+def _slots_class(names):
+    """Builds a class with __slots__ and a positional constructor."""
+
+    lines = ['def __init__(self, %s):' % ', '.join(names)]
+    lines.extend('    self.%s = %s' % (name, name) for name in names)
+    if not names:
+        lines.append('    pass')
+    namespace = {}
+    exec('\n'.join(lines) + '\n', namespace)
+    return type('Record', (_SlotsRecord,), {
+        '__slots__': tuple(names),
+        '__init__': namespace['__init__'],
+        '_fields': tuple(names),
+    })
+
+
+def _row_factory(row_type, names):
+    """Returns a callable building a row from a sequence of values."""
+
+    if row_type in ('namedtuple', 'slots'):
+        for name in names:
+            if (not isinstance(name, str) or not name.isidentifier() or
+                    keyword.iskeyword(name) or name.startswith('_')):
+                raise XJPathError('Invalid field name for a %s row' %
+                                  row_type, (name,))
+        if row_type == 'namedtuple':
+            return collections.namedtuple('Record', names)._make
+        cls = _slots_class(names)
+        return lambda values: cls(*values)
+    if row_type is tuple:
+        return tuple
+    if callable(row_type):
+        return lambda values: row_type(*values)
+    raise XJPathError('Unsupported row type', (row_type,))
+
+
+class RecordSpec(object):
+    """An ordered set of fields extracted from documents as rows."""
+
+    def __init__(self, fields, row_type=tuple):
+        """
+        :param dict|iterable fields: Ordered mapping, or a sequence of
+            pairs, of a field name to a path or to a (path, default) tuple.
+        :param type|str|callable row_type: tuple, 'namedtuple', 'slots' for
+            instances of a class with __slots__, or a callable taking field
+            values as positional arguments.
+        """
+
+        if isinstance(fields, dict):
+            fields = fields.items()
+        names = []
+        paths = []
+        defaults = []
+        for name, path in fields:
+            default = None
+            if isinstance(path, tuple):
+                path, default = path
+            names.append(name)
+            paths.append(path)
+            defaults.append(default)
+        if len(set(names)) != len(names):
+            raise XJPathError('Duplicate field names', tuple(names))
+        self.names = tuple(names)
+        self.defaults = tuple(defaults)
+        self._paths = PathSet(paths)
+        self._slots = tuple(range(len(names)))
+        self._make = _row_factory(row_type, self.names)
+
+    @property
+    def paths(self):
+        """Compiled paths in the order of fields."""
+
+        return self._paths.paths
+
+    def __len__(self):
+        return len(self.names)
+
+    def _checked_values(self, data_obj, errors):
+        """Looks fields up one by one to attribute type errors to them."""
+
+        values = []
+        for name, path, default in zip(self.names, self._paths.paths,
+                                       self.defaults):
+            try:
+                value, exists = path.lookup(data_obj)
+            except (XJPathError, TypeError) as e:
+                if errors is not None:
+                    errors.add(name, e)
+                exists = False
+            values.append(value if exists else default)
+        return values
+
+    def row(self, data_obj, errors=None):
+        """Extracts a row from the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param ErrorSummary|None errors: Where to count type mismatches.
+        :return: A row of the spec row type.
+        """
+
+        found = {}
+        try:
+            _walk_trie(self._paths._root, data_obj, found)
+        except (XJPathError, TypeError):
+            return self._make(self._checked_values(data_obj, errors))
+        return self._make(map(found.get, self._slots, self.defaults))
+
+    def iter_rows(self, docs, errors=None):
+        """Yields a row for every document.
+
+        :param iterable docs: Documents to look into.
+        :param ErrorSummary|None errors: Where to count type mismatches.
+        :rtype: __generator
+        """
+
+        root = self._paths._root
+        slots = self._slots
+        defaults = self.defaults
+        make = self._make
+        for doc in docs:
+            found = {}
+            try:
+                _walk_trie(root, doc, found)
+            except (XJPathError, TypeError):
+                yield make(self._checked_values(doc, errors))
+                continue
+            yield make(map(found.get, slots, defaults))
@@ -0,0 +1,606 @@
+"""XJPath lookups over JSON text without loading the whole document.
+
+The document is read by an incremental scanner from a binary or text file
+object, or from a bytes-like object such as mmap. Only values selected by
+a path are decoded, everything else is skipped by the scanner:
+
+>>> with open('export.json', 'rb') as f:
+...     stream_lookup(f, 'meta.version')
+('1.2', True)
+
+Values matched by '*' markers are yielded one by one:
+
+>>> with open('export.json', 'rb') as f:
+...     for record_id in iter_stream(f, 'records.*.id'):
+...         print(record_id)
+
+If an object has duplicate keys, the last one is used, as json.loads
+does. So an object is skipped to its end before its values are looked
+into: the scanner moves back to them in a buffer or a seekable binary
+file, other file objects keep the raw text of matched values until the
+object ends.
+"""
+
+import collections
+import io
+import json
+import mmap
+import re
+import sys
+
+from xjpath.xjpath import _BAD_INDEX
+from xjpath.xjpath import _BAD_PREDICATE
+from xjpath.xjpath import _check_index_type
+from xjpath.xjpath import _check_key_type
+from xjpath.xjpath import _DESCENDANT
+from xjpath.xjpath import _INDEX
+from xjpath.xjpath import _iter_walk
+from xjpath.xjpath import _KEY
+from xjpath.xjpath import _single_array_element
+from xjpath.xjpath import _SLICE
+from xjpath.xjpath import _walk
+from xjpath.xjpath import compile
+from xjpath.xjpath import XJPathError
+
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE_RE = re.compile(br'[ \t\n\r]*')
+_STRING_TAIL_RE = re.compile(br'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_SIMPLE_STRING_RE = re.compile(br'"([^"\\]*)"')
+_NUMBER_RE = re.compile(br'-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?')
+# Text up to the next bracket or unterminated string, complete strings
+# included.
+_FLAT_RE = re.compile(
+    br'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.S)
+_SCALAR_END_RE = re.compile(br'[,\]}: \t\n\r]')
+
+# Characters are compared as integers, so bytes, mmap and memoryview
+# buffers are handled the same way.
+_END = -1
+_QUOTE = ord('"')
+_COMMA = ord(',')
+_COLON = ord(':')
+_OBJECT_START = ord('{')
+_OBJECT_END = ord('}')
+_ARRAY_START = ord('[')
+_ARRAY_END = ord(']')
+_CONTAINER_START = frozenset((_OBJECT_START, _ARRAY_START))
+_WHITESPACE = frozenset(b' \t\n\r')
+_SCALAR_END = frozenset(b',]}: \t\n\r')
+
+
+class _Scanner(object):
+    """Incremental JSON scanner over a file object or a buffer.
+
+    The scanner keeps only a window of the input in memory. Positions
+    given out by mark() are absolute, so parts of the window needed for
+    decoding are kept until they are released.
+    """
+
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        # The file position of the input start, if the input can be read
+        # again.
+        self._start = None
+        if hasattr(source, 'read') and not isinstance(source, io.BytesIO):
+            self._file = source
+            self._buf = b''
+            if isinstance(source, mmap.mmap) or (
+                    isinstance(source, (io.RawIOBase, io.BufferedIOBase)) and
+                    source.seekable()):
+                self._start = source.tell()
+        else:
+            if isinstance(source, io.BytesIO):
+                source = source.getbuffer()
+            self._file = None
+            self._buf = source
+            self._start = 0
+        self._source = source
+        self._chunk_size = chunk_size
+        self._pos = 0
+        self._offset = 0
+        self._keep = None
+
+    def tell(self):
+        """Returns the absolute position in the input."""
+
+        return self._offset + self._pos
+
+    @property
+    def can_seek(self):
+        """Tells if seek can move back to input read before."""
+
+        return self._start is not None
+
+    def seek(self, pos):
+        """Moves to an absolute position.
+
+        A position out of the window is read again from a seekable file.
+        """
+
+        if self._offset <= pos <= self._offset + len(self._buf):
+            self._pos = pos - self._offset
+            return
+        self._source.seek(self._start + pos)
+        self._file = self._source
+        self._buf = b''
+        self._offset = pos
+        self._pos = 0
+
+    def _more(self):
+        """Reads the next chunk. Returns False at the end of input."""
+
+        if self._file is None:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._file = None
+            return False
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf-8')
+        drop = self._pos
+        if self._keep is not None:
+            drop = min(drop, self._keep - self._offset)
+        self._buf = self._buf[drop:] + chunk
+        self._pos -= drop
+        self._offset += drop
+        return True
+
+    def _error(self, msg):
+        return XJPathError('Invalid JSON: %s' % msg,
+                           (self._offset + self._pos,))
+
+    def peek(self):
+        """Skips whitespaces and returns the next character code or _END."""
+
+        buf = self._buf
+        pos = self._pos
+        if pos < len(buf):
+            char = buf[pos]
+            if char not in _WHITESPACE:
+                return char
+        while True:
+            self._pos = _WHITESPACE_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._more():
+                return _END
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error('expected %s' % chr(char))
+        self._pos += 1
+
+    def mark(self):
+        """Starts keeping input from the current position.
+
+        :return: A token for raw().
+        """
+
+        prev_keep = self._keep
+        if prev_keep is None:
+            self._keep = self._offset + self._pos
+        return prev_keep, self._offset + self._pos
+
+    def raw(self, token):
+        """Returns input from the mark() position up to the current one."""
+
+        prev_keep, start = token
+        self._keep = prev_keep
+        return bytes(self._buf[start - self._offset:self._pos])
+
+    def _scalar_ends(self, end):
+        """Tells if a scalar token ends at the end position."""
+
+        if end < len(self._buf):
+            return self._buf[end] in _SCALAR_END
+        return self._file is None
+
+    def skip_string(self):
+        while True:
+            m = _STRING_TAIL_RE.match(self._buf, self._pos + 1)
+            if m is not None:
+                self._pos = m.end()
+                return
+            if not self._more():
+                raise self._error('unterminated string')
+
+    def skip_value(self):
+        char = self.peek()
+        if char == _QUOTE:
+            self.skip_string()
+        elif char in _CONTAINER_START:
+            depth = 0
+            match = _FLAT_RE.match
+            buf = self._buf
+            pos = self._pos
+            while True:
+                pos = match(buf, pos).end()
+                if pos == len(buf):
+                    self._pos = pos
+                    if not self._more():
+                        raise self._error('unexpected end')
+                    buf = self._buf
+                    pos = self._pos
+                    continue
+                char = buf[pos]
+                if char == _QUOTE:
+                    self._pos = pos
+                    self.skip_string()
+                    buf = self._buf
+                    pos = self._pos
+                    continue
+                pos += 1
+                if char == _OBJECT_START or char == _ARRAY_START:
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self._pos = pos
+                        return
+        elif char != _END:
+            while True:
+                m = _SCALAR_END_RE.search(self._buf, self._pos)
+                if m is not None:
+                    self._pos = m.start()
+                    return
+                self._pos = len(self._buf)
+                if not self._more():
+                    return
+        else:
+            raise self._error('unexpected end')
+
+    def read_value(self):
+        """Decodes the value at the current position."""
+
+        char = self.peek()
+        if char == _QUOTE:
+            m = _SIMPLE_STRING_RE.match(self._buf, self._pos)
+            if m is not None:
+                self._pos = m.end()
+                return m.group(1).decode('utf-8')
+        elif char not in _CONTAINER_START:
+            m = _NUMBER_RE.match(self._buf, self._pos)
+            if m is not None and self._scalar_ends(m.end()):
+                self._pos = m.end()
+                if m.group(1) is None and m.group(2) is None:
+                    return int(m.group())
+                return float(m.group())
+
+        token = self.mark()
+        self.skip_value()
+        raw = self.raw(token)
+        try:
+            return json.loads(raw.decode('utf-8'))
+        except ValueError as e:
+            raise self._error(str(e))
+
+    def read_raw_value(self):
+        """Returns undecoded text of the value at the current position."""
+
+        self.peek()
+        token = self.mark()
+        self.skip_value()
+        return self.raw(token)
+
+    def iter_object(self):
+        """Yields keys of the object at the current position.
+
+        The caller has to consume the value after every key.
+        """
+
+        self.expect(_OBJECT_START)
+        if self.peek() == _OBJECT_END:
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != _QUOTE:
+                raise self._error('expected object key')
+            key = self.read_value()
+            self.expect(_COLON)
+            yield key
+            char = self.peek()
+            if char == _COMMA:
+                self._pos += 1
+            elif char == _OBJECT_END:
+                self._pos += 1
+                return
+            else:
+                raise self._error('expected , or }')
+
+    def iter_array(self):
+        """Yields indexes of elements of the array at the current position.
+
+        The caller has to consume the element after every yield.
+        """
+
+        self.expect(_ARRAY_START)
+        if self.peek() == _ARRAY_END:
+            self._pos += 1
+            return
+        idx = 0
+        while True:
+            yield idx
+            idx += 1
+            char = self.peek()
+            if char == _COMMA:
+                self._pos += 1
+            elif char == _ARRAY_END:
+                self._pos += 1
+                return
+            else:
+                raise self._error('expected , or ]')
+
+
+def _placeholder(char):
+    """Returns an empty container of the type that starts with char."""
+
+    return {} if char == _OBJECT_START else []
+
+
+def _object_values(scanner, key=None):
+    """Scans the object at the scanner, values are looked into later.
+
+    Like json.loads, the last of duplicate keys is kept in the place of
+    the first one.
+
+    :param str|None key: The only key to keep, all of them if None.
+    :rtype: dict
+    :return: Mapping of a key to the position of its value, or to its raw
+             text if the scanner cannot seek.
+    """
+
+    values = {}
+    can_seek = scanner.can_seek
+    for member in scanner.iter_object():
+        if key is not None and member != key:
+            scanner.skip_value()
+        elif can_seek:
+            values[member] = scanner.tell()
+            scanner.skip_value()
+        else:
+            values[member] = scanner.read_raw_value()
+    return values
+
+
+def _value_scanners(scanner, values):
+    """Yields a scanner positioned at every value of _object_values.
+
+    The values have to be consumed one by one, afterwards the scanner is
+    back at the end of the object.
+    """
+
+    if not scanner.can_seek:
+        for raw in values.values():
+            yield _Scanner(raw)
+        return
+    end = scanner.tell()
+    for pos in values.values():
+        scanner.seek(pos)
+        yield scanner
+    scanner.seek(end)
+
+
+def _item_scanners(scanner, char):
+    """Yields a scanner positioned at every element of a container.
+
+    Elements of an array are read in place, values of an object after
+    the object is scanned, see _object_values.
+    """
+
+    if char == _ARRAY_START:
+        for _ in scanner.iter_array():
+            yield scanner
+    else:
+        for item_scanner in _value_scanners(scanner,
+                                            _object_values(scanner)):
+            yield item_scanner
+
+
+def _element_matches(scanner, idx, val_type, steps, pos, flatten):
+    """Yields values matched by steps from pos on in an array element.
+
+    :param _Scanner scanner: A scanner positioned at the element.
+    :param int idx: Index of the element used in error messages.
+    :param type|None val_type: Expected type of the element.
+    """
+
+    value_char = scanner.peek()
+    if value_char in _CONTAINER_START:
+        _check_index_type(idx, _placeholder(value_char), val_type)
+        for value in _matches(scanner, steps, pos, flatten):
+            yield value
+    else:
+        value = scanner.read_value()
+        _check_index_type(idx, value, val_type)
+        value, exists = _walk(value, steps[pos:], False)
+        if exists:
+            yield value
+
+
+def _slice_matches(scanner, array_slice, val_type, steps, pos, flatten):
+    """Yields values matched in array elements selected by a slice.
+
+    Elements are streamed if the slice does not count from the end of the
+    array, otherwise raw text of the elements is kept until the array
+    ends.
+    """
+
+    start, stop, step = array_slice.start, array_slice.stop, array_slice.step
+    if (step or 1) > 0 and (start or 0) >= 0 and (stop is None or stop >= 0):
+        selected = range(start or 0, stop if stop is not None else
+                         sys.maxsize, step or 1)
+        for idx in scanner.iter_array():
+            if idx in selected:
+                for value in _element_matches(scanner, idx, val_type,
+                                              steps, pos, flatten):
+                    yield value
+            else:
+                scanner.skip_value()
+        return
+    if (step or 1) > 0 and start is not None and start < 0 and (
+            stop is None or stop < 0):
+        # Only the tail of the array may be selected.
+        elements = collections.deque(maxlen=-start)
+    else:
+        elements = []
+    for _ in scanner.iter_array():
+        elements.append(scanner.read_raw_value())
+    elements = list(elements)
+    for idx in range(*array_slice.indices(len(elements))):
+        for value in _element_matches(_Scanner(elements[idx]), idx, val_type,
+                                      steps, pos, flatten):
+            yield value
+
+
+def _matches(scanner, steps, pos, flatten):
+    """Yields values matched by steps from pos on at the scanner position.
+
+    :param _Scanner scanner: A scanner positioned at a value.
+    :param tuple steps: Compiled path steps.
+    :param int pos: Index of the first step to apply.
+    :param bool flatten: Yield every value matched by '*' markers if True,
+                         otherwise yield a single tuple like path_lookup.
+    """
+
+    if pos == len(steps):
+        yield scanner.read_value()
+        return
+
+    char = scanner.peek()
+    kind, key, val_type = steps[pos]
+    if char not in _CONTAINER_START or (char == _ARRAY_START and kind == _KEY):
+        # Nothing to stream, scalar results do not depend on flatten.
+        value, exists = _walk(scanner.read_value(), steps[pos:], False)
+        if exists:
+            yield value
+        return
+
+    if kind == _KEY:
+        for value_scanner in _value_scanners(
+                scanner, _object_values(scanner, key)):
+            value_char = value_scanner.peek()
+            if value_char in _CONTAINER_START:
+                _check_key_type(key, _placeholder(value_char), val_type)
+                for value in _matches(value_scanner, steps, pos + 1,
+                                      flatten):
+                    yield value
+            else:
+                value = value_scanner.read_value()
+                _check_key_type(key, value, val_type)
+                value, exists = _walk(value, steps[pos + 1:], False)
+                if exists:
+                    yield value
+    elif kind == _INDEX:
+        if char == _OBJECT_START:
+            scanner.skip_value()
+            _single_array_element({}, key, val_type)
+            return
+        if key >= 0:
+            count = 0
+            for idx in scanner.iter_array():
+                count += 1
+                if idx != key:
+                    scanner.skip_value()
+                    continue
+                for value in _element_matches(scanner, key, val_type, steps,
+                                              pos + 1, flatten):
+                    yield value
+            if not count:
+                _single_array_element([], key, val_type)
+            return
+        # A negative index is known only at the end of the array.
+        tail = collections.deque(maxlen=-key)
+        for _ in scanner.iter_array():
+            tail.append(scanner.read_raw_value())
+        if not tail:
+            _single_array_element([], key, val_type)
+        if len(tail) < -key:
+            return
+        for value in _element_matches(_Scanner(tail[0]), key, val_type,
+                                      steps, pos + 1, flatten):
+            yield value
+    elif kind == _SLICE:
+        if char == _OBJECT_START:
+            scanner.skip_value()
+        elif flatten:
+            for value in _slice_matches(scanner, key, val_type, steps,
+                                        pos + 1, True):
+                yield value
+        else:
+            yield tuple(_slice_matches(scanner, key, val_type, steps,
+                                       pos + 1, False))
+    elif kind == _BAD_INDEX or kind == _BAD_PREDICATE:
+        raise XJPathError(*key)
+    elif kind == _DESCENDANT:
+        # Any nested container may match, so the whole value is decoded.
+        value = scanner.read_value()
+        if flatten:
+            for value in _iter_walk(value, steps[pos:], True):
+                yield value
+        else:
+            value, exists = _walk(value, steps[pos:], False)
+            if exists:
+                yield value
+    elif key is not None:
+        # Elements have to be decoded one by one to evaluate a predicate.
+        rest = steps[pos + 1:]
+        res = []
+        for item_scanner in _item_scanners(scanner, char):
+            item = item_scanner.read_value()
+            if not key.match(item):
+                continue
+            if flatten:
+                for value in _iter_walk(item, rest, True):
+                    yield value
+            else:
+                value, exists = _walk(item, rest, False)
+                if exists:
+                    res.append(value)
+        if not flatten:
+            yield tuple(res)
+    else:
+        items = _item_scanners(scanner, char)
+        if flatten:
+            for item_scanner in items:
+                for value in _matches(item_scanner, steps, pos + 1, True):
+                    yield value
+        else:
+            res = []
+            for item_scanner in items:
+                res.extend(_matches(item_scanner, steps, pos + 1, False))
+            yield tuple(res)
+
+
+def stream_lookup(source, xj_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Looks up a xj path in a JSON document read from the source.
+
+    :param file|bytes|mmap source: A file object or a bytes-like object.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param int chunk_size: Size of chunks read from a file object.
+    :return: A tuple where 0 value is an extracted value and a second
+             field that tells if value either was found or not found.
+    """
+
+    steps = compile(xj_path).steps
+    scanner = _Scanner(source, chunk_size)
+    for value in _matches(scanner, steps, 0, False):
+        return value, True
+    return None, False
+
+
+def iter_stream(source, xj_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields values matched by a xj path in a JSON document.
+
+    Values matched by every '*' marker are yielded one by one instead of
+    being collected into tuples.
+
+    :param file|bytes|mmap source: A file object or a bytes-like object.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param int chunk_size: Size of chunks read from a file object.
+    :rtype: __generator
+    """
+
+    steps = compile(xj_path).steps
+    scanner = _Scanner(source, chunk_size)
+    return _matches(scanner, steps, 0, True)
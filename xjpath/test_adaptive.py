@@ -0,0 +1,99 @@
+import collections
+import unittest
+
+import xjpath
+from xjpath import adaptive
+from xjpath.testing import outcome
+from xjpath.testing import SHAPE_DOCS as DOCS
+from xjpath.testing import SHAPE_PATHS as PATHS
+
+
+ORDERS = {'orders': [{'id': i, 'total': i * 1.5, 'tags': ['a', 'b']}
+                     for i in range(5)]}
+
+
+class TestAdaptivePath(unittest.TestCase):
+
+    def test_matches_path_lookup(self):
+        for path in PATHS:
+            for warm_doc in DOCS:
+                # Specialized to the shape of warm_doc, every other
+                # document either fits the shape or is deoptimized.
+                lookup = adaptive.AdaptivePath(path, warmup=1,
+                                               max_deopts=len(DOCS) + 1)
+                outcome(lookup.lookup, warm_doc)
+                for doc in DOCS:
+                    self.assertEqual(outcome(xjpath.path_lookup, doc, path),
+                                     outcome(lookup.lookup, doc),
+                                     (path, warm_doc, doc))
+
+    def test_specialization_and_deopts(self):
+        path = adaptive.AdaptivePath('orders.*.total%', warmup=3,
+                                     max_deopts=2)
+        self.assertEqual((0, 0, 'warmup'), path.info())
+        for _ in range(3):
+            self.assertEqual(((0., 1.5, 3., 4.5, 6.), True),
+                             path.lookup(ORDERS))
+        self.assertEqual((1, 0, 'specialized'), path.info())
+        self.assertEqual(((2.5,), True),
+                         path.lookup({'orders': [{'total': 2.5}, {}]}))
+        self.assertEqual((1, 0, 'specialized'), path.info())
+
+        # A type error is raised by the engine, and not recorded.
+        with self.assertRaises(xjpath.XJPathError):
+            path.lookup({'orders': [{'total': 1}]})
+        self.assertEqual((1, 1, 'warmup'), path.info())
+        for _ in range(3):
+            path.lookup(ORDERS)
+        self.assertEqual((2, 1, 'specialized'), path.info())
+
+        # A dict of orders fails the guard of '*'.
+        self.assertEqual(((1.,), True),
+                         path.lookup({'orders': {'x': {'total': 1.}}}))
+        self.assertEqual((2, 2, 'generic'), path.info())
+        self.assertEqual(((0., 1.5, 3., 4.5, 6.), True),
+                         path.lookup(ORDERS))
+        self.assertEqual((2, 2, 'generic'), path.info())
+
+    def test_unstable_shapes_stay_generic(self):
+        path = adaptive.AdaptivePath('a.b', warmup=2)
+        path.lookup({'a': {'b': 1}})
+        path.lookup({'a': [1]})
+        self.assertEqual((0, 0, 'generic'), path.info())
+
+        path = adaptive.AdaptivePath('orders.**.id', warmup=1)
+        self.assertEqual(((0, 1, 2, 3, 4), True), path.lookup(ORDERS))
+        self.assertEqual((0, 0, 'generic'), path.info())
+
+        doc = collections.defaultdict(dict, a={})
+        path = adaptive.AdaptivePath('a.b', warmup=1)
+        self.assertEqual((None, False), path.lookup(doc))
+        self.assertEqual((0, 0, 'generic'), path.info())
+        self.assertNotIn('b', doc['a'])
+
+    def test_create_dict_path_is_generic(self):
+        path = adaptive.AdaptivePath('a.b{}', warmup=1)
+        path.lookup({'a': {'b': {}}})
+        self.assertEqual('specialized', path.info().state)
+        doc = {'a': {}}
+        self.assertEqual(({}, True), path.lookup(doc, True))
+        self.assertEqual({'a': {'b': {}}}, doc)
+        self.assertEqual((1, 0, 'specialized'), path.info())
+
+    def test_strict_lookup_and_get(self):
+        path = adaptive.AdaptivePath('orders.@last.tags.@0$', warmup=1)
+        self.assertEqual('a', path.strict_lookup(ORDERS))
+        self.assertEqual('a', path.strict_lookup(ORDERS, str))
+        self.assertEqual('a', path.get(ORDERS))
+        self.assertEqual(0, path.get({'orders': []}, 0))
+        self.assertRaises(xjpath.XJPathError, path.strict_lookup, {})
+        self.assertEqual(xjpath.compile('orders.@last.tags.@0$'), path.path)
+
+    def test_bad_input(self):
+        self.assertRaises(xjpath.XJPathError, adaptive.AdaptivePath, None)
+        self.assertRaises(xjpath.XJPathError, adaptive.AdaptivePath, 'a',
+                          warmup=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
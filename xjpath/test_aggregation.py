@@ -0,0 +1,64 @@
+import unittest
+
+import xjpath
+from xjpath.aggregation import aggregate
+
+
+DOC = {'orders': [{'total': 1.5, 'items': [{'q': 1}, {'q': 2}]},
+                  {'total': 4., 'items': []},
+                  {'total': 2., 'items': [{'q': 3}, {'x': 0}]},
+                  {'items': 'none'}],
+       'hosts': {'a': {'cpu': 3}, 'b': {'cpu': 7}}}
+
+
+class TestAggregation(unittest.TestCase):
+
+    def test_functions(self):
+        path = 'orders.*.total%'
+        self.assertEqual(3, aggregate(DOC, path, 'count'))
+        self.assertEqual(7.5, aggregate(DOC, path, 'sum'))
+        self.assertEqual(1.5, aggregate(DOC, path, 'min'))
+        self.assertEqual(4., aggregate(DOC, path, 'max'))
+        self.assertEqual(2.5, aggregate(DOC, path, 'avg'))
+        self.assertTrue(aggregate(DOC, path, 'any'))
+        self.assertTrue(aggregate(DOC, path, 'all'))
+        self.assertEqual([4., 2.], aggregate(DOC, path, 'top', k=2))
+        self.assertEqual([1.5], aggregate(DOC, path, 'bottom', k=1))
+        self.assertEqual(10, aggregate(DOC, 'hosts.*.cpu#', 'sum'))
+        self.assertEqual(2, aggregate(DOC, 'hosts.*', 'count'))
+        self.assertEqual(4, aggregate(DOC, 'orders.*.items.*', 'count'))
+
+    def test_nested_markers_are_flattened(self):
+        path = 'orders.*.items.@0:.q'
+        self.assertEqual(list(xjpath.iter_lookup(DOC, path, flatten=True)),
+                         [1, 2, 3])
+        self.assertEqual(6, aggregate(DOC, path, 'sum'))
+        self.assertEqual(3, aggregate(DOC, 'orders.**.q', 'count'))
+        self.assertEqual(2, aggregate(DOC, 'orders.*[total>1.5]', 'count'))
+
+    def test_no_values(self):
+        for path in ('missing.*', 'orders.*.missing', 'orders.@10:'):
+            self.assertEqual(0, aggregate(DOC, path, 'count'))
+            self.assertEqual(0, aggregate(DOC, path, 'sum'))
+            self.assertIsNone(aggregate(DOC, path, 'min'))
+            self.assertIsNone(aggregate(DOC, path, 'avg'))
+            self.assertFalse(aggregate(DOC, path, 'any'))
+            self.assertEqual([], aggregate(DOC, path, 'top', k=3))
+
+    def test_path_without_markers(self):
+        self.assertEqual(1, aggregate(DOC, 'hosts.a.cpu', 'count'))
+        self.assertEqual(0, aggregate(DOC, 'hosts.c', 'count'))
+
+    def test_errors(self):
+        with self.assertRaises(xjpath.XJPathError):
+            aggregate(DOC, 'orders.*.total$', 'sum')
+        with self.assertRaises(xjpath.XJPathError):
+            aggregate(DOC, 'orders.*', 'median')
+        with self.assertRaises(xjpath.XJPathError):
+            aggregate(DOC, 'orders.*.total', 'top')
+        with self.assertRaises(xjpath.XJPathError):
+            aggregate(DOC, 'orders.*.total', 'sum', k=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+from concurrent import futures
+import unittest
+
+import xjpath
+from xjpath import aio
+
+
+async def _source(docs, delay=0):
+    for doc in docs:
+        if delay:
+            await asyncio.sleep(delay)
+        yield doc
+
+
+async def _collect(agen):
+    return [res async for res in agen]
+
+
+class TestAio(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.docs = [{'id': i, 'tags': ['t%d' % i]} for i in range(10)]
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_lookup_stream_single_path(self):
+        stats = []
+        res = self.run_async(_collect(aio.lookup_stream(
+            _source(self.docs), 'id', batch_size=3, on_batch=stats.append)))
+        self.assertEqual([(i, True) for i in range(10)], res)
+        self.assertEqual([0, 1, 2, 3], [s.index for s in stats])
+        self.assertEqual([3, 3, 3, 1], [s.size for s in stats])
+        self.assertTrue(all(s.latency >= s.seconds >= 0 for s in stats))
+
+    def test_lookup_stream_path_set(self):
+        paths = xjpath.PathSet(['tags.@0', 'missing'])
+        res = self.run_async(_collect(aio.lookup_stream(
+            _source(self.docs[:2]), paths)))
+        self.assertEqual([(('t0', True), (None, False)),
+                          (('t1', True), (None, False))], res)
+
+    def test_lookup_stream_executor_keeps_order(self):
+        with futures.ThreadPoolExecutor(3) as executor:
+            res = self.run_async(_collect(aio.lookup_stream(
+                _source(self.docs, .001), ['id', 'tags.*[=t5]'],
+                batch_size=2, concurrency=3, executor=executor)))
+        self.assertEqual([((i, True), (('t5',) if i == 5 else (), True))
+                          for i in range(10)], res)
+
+    def test_lookup_stream_backpressure(self):
+        read = []
+
+        async def source():
+            for doc in self.docs:
+                read.append(doc['id'])
+                yield doc
+
+        async def first():
+            agen = aio.lookup_stream(source(), 'id', batch_size=2,
+                                     concurrency=2)
+            res = await agen.__anext__()
+            await agen.aclose()
+            return res
+
+        self.assertEqual((0, True), self.run_async(first()))
+        self.assertLess(len(read), len(self.docs))
+
+    def test_lookup_stream_errors(self):
+        with self.assertRaises(xjpath.XJPathError):
+            self.run_async(_collect(aio.lookup_stream(
+                _source(self.docs), 'id$')))
+        with self.assertRaises(ValueError):
+            self.run_async(_collect(aio.lookup_stream(
+                _source(self.docs), 'id', batch_size=0)))
+
+    def test_path_lookup(self):
+        res = self.run_async(aio.path_lookup({'a': [1, 2]}, 'a.@-1:'))
+        self.assertEqual(((2,), True), res)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from xjpath import cli
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.tmp_dir, 'input.json')
+        self.output_file = os.path.join(self.tmp_dir, 'output.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_lines(self, lines):
+        with open(self.input_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def run_cli(self, *args):
+        cli.main(['-i', self.input_file, '-o', self.output_file] +
+                 list(args))
+        with open(self.output_file) as f:
+            return [json.loads(line) for line in f]
+
+    def run_cli_text(self, *args):
+        cli.main(['-i', self.input_file, '-o', self.output_file] +
+                 list(args))
+        with open(self.output_file) as f:
+            return f.read()
+
+    def test_single_document(self):
+        with open(self.input_file, 'w') as f:
+            json.dump({'a': [{'b': 1}, {'b': 2}]}, f)
+        self.assertEqual([[1, 2]], self.run_cli('a.*.b'))
+
+    def test_multiple_lines(self):
+        self.write_lines([json.dumps({'a': i}) for i in range(10)] + [''])
+        self.assertEqual(list(range(10)), self.run_cli('-m', 'a'))
+
+    def test_multiple_lines_small_chunks(self):
+        self.write_lines([json.dumps({'a': i}) for i in range(100)])
+        self.assertEqual(list(range(100)),
+                         self.run_cli('-m', '--chunk-size', '7', 'a'))
+
+    def test_parallel_jobs_keep_order(self):
+        self.write_lines([json.dumps({'a': i}) for i in range(1000)])
+        self.assertEqual(list(range(1000)),
+                         self.run_cli('-m', '-j', '2', '--chunk-size', '100',
+                                      'a'))
+
+    def test_parallel_jobs_unordered(self):
+        self.write_lines([json.dumps({'a': i}) for i in range(1000)])
+        res = self.run_cli('-m', '-j', '2', '--chunk-size', '100',
+                           '--unordered', 'a')
+        self.assertEqual(list(range(1000)), sorted(res))
+
+    def test_on_error(self):
+        self.write_lines(['{"a": 1}', 'not json', '{"b": 2}', '{"a": 3}'])
+        self.assertEqual([1, 3], self.run_cli('-m', '--on-error', 'skip',
+                                              'a'))
+        with self.assertRaises(ValueError):
+            self.run_cli('-m', 'a')
+        with self.assertRaises(IndexError):
+            self.run_cli('-m', '-j', '2', '--on-error', 'fail', 'b')
+
+    def test_fail_writes_results_before_broken_line(self):
+        self.write_lines(['{"a": 1}', '{"a": 2}', '{"b": 3}', '{"a": 4}'])
+        for jobs in ('1', '2'):
+            with self.assertRaises(IndexError) as ctx:
+                self.run_cli('-m', '-j', jobs, 'a')
+            self.assertEqual(('Path does not exist a',), ctx.exception.args)
+            with open(self.output_file) as f:
+                self.assertEqual([1, 2], [json.loads(line) for line in f])
+
+    def test_stream(self):
+        with open(self.input_file, 'w') as f:
+            json.dump({'a': [{'b': 1}, {'b': 2}], 'c': {'d': [3]}}, f)
+        self.assertEqual([1, 2], self.run_cli('-s', 'a.*.b'))
+        self.assertEqual([[3]], self.run_cli('--stream', 'c.d'))
+
+    def test_fields(self):
+        self.write_lines([
+            json.dumps({'id': 1, 'u': {'name': 'a,b'}, 'tags': ['x']}),
+            json.dumps({'id': 2, 'u': {}, 'tags': []}),
+            json.dumps({'id': 3, 'u': {'name': 'c'}, 'ok': True})])
+        fields = ['-m', '-p', 'id=id', '-p', 'name=u.name', '-p',
+                  'tags=tags.*', '-p', 'tags.*[=x]']
+        self.assertEqual(
+            [{'id': 1, 'name': 'a,b', 'tags': ['x'], 'tags.*[=x]': ['x']},
+             {'id': 2, 'name': None, 'tags': [], 'tags.*[=x]': []},
+             {'id': 3, 'name': 'c', 'tags': None, 'tags.*[=x]': None}],
+            self.run_cli(*fields))
+        self.assertEqual(
+            'id,name,tags,tags.*[=x]\n1,"a,b","[""x""]","[""x""]"\n'
+            '2,,[],[]\n3,c,,\n',
+            self.run_cli_text(*fields + ['-f', 'csv']))
+        self.assertEqual(
+            '1\ta,b\n2\t-\n3\tc\n',
+            self.run_cli_text('-m', '-p', 'id=id', '-p', 'n=u.name', '-f',
+                              'tsv', '--no-header', '--null', '-'))
+        self.assertEqual(
+            '1\ta,b\n3\tc\n',
+            self.run_cli_text('-m', '-p', 'id=id', '-p', 'n=u.name', '-f',
+                              'tsv', '--no-header', '--missing', 'skip',
+                              '-j', '2', '--chunk-size', '10'))
+        with self.assertRaises(IndexError):
+            self.run_cli('-m', '-p', 'n=u.name', '--missing', 'error')
+        self.assertEqual([{'n': 'a,b'}, {'n': 'c'}], self.run_cli(
+            '-m', '-p', 'n=u.name', '--missing', 'error',
+            '--on-error', 'skip'))
+        self.assertEqual([{'ok': True}], self.run_cli(
+            '-m', '-p', 'ok=ok', '--missing', 'skip'))
+
+    def test_fields_errors(self):
+        self.write_lines([json.dumps({'id': 'x'}), json.dumps({'id': 2})])
+        with self.assertRaises(IndexError):
+            self.run_cli('-m', '-p', 'id=id#')
+        self.assertEqual([{'id': 2}], self.run_cli(
+            '-m', '-p', 'id=id#', '--on-error', 'skip'))
+        with open(self.input_file, 'w') as f:
+            json.dump({'id': 1}, f)
+        self.assertEqual('id\n1\n', self.run_cli_text('-p', 'id', '-f',
+                                                         'csv'))
+        for args in (['id', '-p', 'id'], ['-s', '-p', 'id'], [],
+                     ['-p', 'id=@x']):
+            with self.assertRaises(SystemExit):
+                self.run_cli(*args)
+
+
+if __name__ == '__main__':
+    unittest.main()
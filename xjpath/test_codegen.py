@@ -0,0 +1,49 @@
+import copy
+import itertools
+import unittest
+
+import xjpath
+from xjpath import codegen
+from xjpath.testing import outcome
+from xjpath.testing import SHAPE_DOCS as DOCS
+from xjpath.testing import SHAPE_PATHS as PATHS
+
+
+class TestCodegen(unittest.TestCase):
+
+    def test_matches_path_lookup(self):
+        for path in PATHS:
+            func = codegen.compile_function(path)
+            for doc, create in itertools.product(DOCS, (False, True)):
+                # Compares documents too, create may change them.
+                expected_doc, res_doc = copy.deepcopy(doc), copy.deepcopy(doc)
+                expected = outcome(xjpath.path_lookup, expected_doc, path,
+                                   create)
+                res = outcome(func, res_doc, create)
+                self.assertEqual((expected, expected_doc), (res, res_doc),
+                                 (path, doc, create))
+
+    def test_function_cache(self):
+        func = codegen.compile_function('a.b.@last')
+        self.assertIs(func,
+                      codegen.compile_function(xjpath.compile('a.b.@last')))
+        self.assertEqual(((1, 2), True), func({'a': {'b': [0, (1, 2)]}}))
+
+    def test_generate_source(self):
+        source, namespace = codegen.generate_source('a.*.b#')
+        self.assertTrue(source.startswith('def lookup('))
+        self.assertIn('for ', source)
+        self.assertIn(int, namespace.values())
+
+    def test_too_deep_nesting_falls_back(self):
+        path = '.'.join(['*'] * 40)
+        doc = [[[[1]]], [[[2], []]]]
+        func = codegen.compile_function(path)
+        self.assertEqual(xjpath.path_lookup(doc, path), func(doc))
+
+    def test_bad_input(self):
+        self.assertRaises(xjpath.XJPathError, codegen.compile_function, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
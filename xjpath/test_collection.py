@@ -0,0 +1,110 @@
+import random
+import unittest
+
+import xjpath
+from xjpath.collection import XJPathCollection
+
+
+DOCS = [
+    {'spec': {'owner': {'id': 'u1'}, 'replicas': 3, 'tags': ['a', 'b']}},
+    {'spec': {'owner': {'id': 'u2'}, 'replicas': 1.5, 'tags': ['b']}},
+    {'spec': {'owner': {'id': 'u1'}, 'replicas': 'many', 'tags': []}},
+    {'spec': {'owner': 'nobody', 'tags': [['x'], 'a', 'a']}},
+    [],
+]
+
+
+class TestCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.docs = XJPathCollection(DOCS)
+        self.docs.add_index('spec.owner.id')
+        self.docs.add_index('spec.replicas', ordered=True)
+        self.docs.add_index('spec.tags.*')
+
+    def test_find(self):
+        self.assertEqual([0, 2], self.docs.find('spec.owner.id', 'u1'))
+        self.assertEqual([], self.docs.find('spec.owner.id', 'u3'))
+        self.assertEqual([], self.docs.find('spec.owner.id', ['u1']))
+        self.assertEqual([0, 3], self.docs.find('spec.tags.*', 'a'))
+        self.assertEqual([0, 1], self.docs.find('spec.tags.*', 'b'))
+        self.assertEqual([2], self.docs.find('spec.replicas', 'many'))
+        self.assertEqual([DOCS[1]], self.docs.documents(
+            self.docs.find(xjpath.compile('spec.owner.id'), 'u2')))
+
+    def test_find_range(self):
+        find_range = self.docs.find_range
+        self.assertEqual([1, 0], find_range('spec.replicas', 1))
+        self.assertEqual([1], find_range('spec.replicas', 1, 3,
+                                         include_high=False))
+        self.assertEqual([0], find_range('spec.replicas', 1.5,
+                                         include_low=False))
+        self.assertEqual([1], find_range('spec.replicas', high=2))
+        self.assertEqual([2], find_range('spec.replicas', 'a', 'z'))
+        self.assertRaises(xjpath.XJPathError, find_range, 'spec.replicas')
+        self.assertRaises(xjpath.XJPathError, find_range, 'spec.replicas',
+                          1, 'z')
+        self.assertRaises(xjpath.XJPathError, find_range, 'spec.tags.*', 'a')
+
+    def test_add_replace_remove(self):
+        doc_id = self.docs.add({'spec': {'owner': {'id': 'u2'},
+                                         'replicas': 2}})
+        self.assertEqual(5, doc_id)
+        self.assertEqual([1, 5], self.docs.find('spec.owner.id', 'u2'))
+        self.assertEqual([1, 5, 0], self.docs.find_range('spec.replicas', 0))
+
+        self.docs.replace(1, {'spec': {'owner': {'id': 'u1'},
+                                       'replicas': 10}})
+        self.assertEqual([5], self.docs.find('spec.owner.id', 'u2'))
+        self.assertEqual([0, 1, 2], self.docs.find('spec.owner.id', 'u1'))
+        self.assertEqual([5, 0, 1], self.docs.find_range('spec.replicas', 0))
+        self.assertEqual([0], self.docs.find('spec.tags.*', 'b'))
+
+        self.assertEqual(DOCS[0], self.docs.remove(0))
+        self.assertEqual([1, 2], self.docs.find('spec.owner.id', 'u1'))
+        self.assertEqual([5, 1], self.docs.find_range('spec.replicas', 0))
+        self.assertEqual([3], self.docs.find('spec.tags.*', 'a'))
+        self.assertEqual(5, len(self.docs))
+        self.assertNotIn(0, self.docs)
+        self.assertEqual([1, 2, 3, 4, 5], list(self.docs))
+
+        self.assertRaises(KeyError, self.docs.remove, 0)
+        self.assertRaises(KeyError, self.docs.replace, 0, {})
+
+    def test_indexes(self):
+        self.assertEqual(('spec.owner.id', 'spec.replicas', 'spec.tags.*'),
+                         self.docs.indexes)
+        self.docs.drop_index('spec.tags.*')
+        self.assertRaises(xjpath.XJPathError, self.docs.find,
+                          'spec.tags.*', 'a')
+        self.assertRaises(xjpath.XJPathError, self.docs.drop_index,
+                          'spec.tags.*')
+
+    def test_matches_scan(self):
+        rnd = random.Random(1)
+        docs = XJPathCollection()
+        docs.add_index('v.*', ordered=True)
+        for _ in range(300):
+            if len(docs) and rnd.random() < .3:
+                docs.remove(rnd.choice(list(docs)))
+            elif len(docs) and rnd.random() < .3:
+                docs.replace(rnd.choice(list(docs)),
+                             {'v': [rnd.randint(0, 9) for _ in range(3)]})
+            else:
+                docs.add({'v': [rnd.randint(0, 9) for _ in range(3)]})
+        for value in range(10):
+            self.assertEqual([i for i in docs if value in docs[i]['v']],
+                             docs.find('v.*', value))
+            self.assertEqual(sorted(i for i in docs
+                                    if any(3 <= v < value
+                                           for v in docs[i]['v'])),
+                             sorted(docs.find_range('v.*', 3, value,
+                                                    include_high=False)))
+
+    def test_typed_path(self):
+        self.docs.add_index('spec.owner{}.id$')
+        self.assertEqual([0, 2], self.docs.find('spec.owner{}.id$', 'u1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
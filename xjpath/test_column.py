@@ -0,0 +1,77 @@
+import array
+import unittest
+
+import xjpath
+from xjpath import column
+
+
+class TestLookupColumn(unittest.TestCase):
+
+    docs = [{'m': {'lat': .5, 'n': 1}}, {}, {'m': {'lat': 1.5, 'n': 3}}]
+
+    def test_float_column_from_type_postfix(self):
+        col = xjpath.lookup_column(self.docs, 'm.lat%', use_numpy=False)
+        self.assertIsInstance(col.values, array.array)
+        self.assertEqual('d', col.values.typecode)
+        self.assertEqual([.5, 0., 1.5], list(col.values))
+        self.assertEqual([1, 0, 1], list(col.mask))
+
+    def test_int_column_with_default(self):
+        col = xjpath.lookup_column(self.docs, 'm.n#', default=-1,
+                                   use_numpy=False)
+        self.assertEqual('q', col.values.typecode)
+        self.assertEqual([1, -1, 3], list(col.values))
+
+    def test_explicit_dtype(self):
+        col = xjpath.lookup_column(self.docs, 'm.n', dtype=float,
+                                   use_numpy=False)
+        self.assertEqual([1., 0., 3.], list(col.values))
+        col = xjpath.lookup_column(self.docs, 'm.n', dtype='i',
+                                   use_numpy=False)
+        self.assertEqual('i', col.values.typecode)
+
+    def test_untyped_column_is_a_list(self):
+        col = xjpath.lookup_column(self.docs, 'm.*')
+        self.assertEqual([(.5, 1), None, (1.5, 3)], col.values)
+        self.assertEqual([1, 0, 1], list(col.mask))
+
+    def test_aggregate_columns(self):
+        docs = [{'o': [{'t': 1.5}, {'t': 2.}]}, {'o': []}, {}]
+        col = xjpath.lookup_column(docs, 'o.*.t%', aggregate='sum',
+                                   use_numpy=False)
+        self.assertEqual('d', col.values.typecode)
+        self.assertEqual([3.5, 0., 0.], list(col.values))
+        col = xjpath.lookup_column(docs, 'o.*', aggregate='count',
+                                   use_numpy=False)
+        self.assertEqual('q', col.values.typecode)
+        self.assertEqual([2, 0, 0], list(col.values))
+        col = xjpath.lookup_column(docs, 'o.*.t', aggregate='max',
+                                   dtype=float, use_numpy=False)
+        self.assertEqual([2., 0., 0.], list(col.values))
+        self.assertEqual([1, 0, 0], list(col.mask))
+        col = xjpath.lookup_column(docs, 'o.*.t', aggregate='top', k=1)
+        self.assertEqual([[2.], [], []], col.values)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.lookup_column(docs, 'o.*', aggregate='median')
+
+    def test_type_errors(self):
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.lookup_column([{'a': 'str'}], 'a#')
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.lookup_column([{'a': 'str'}], 'a', dtype=int)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.lookup_column([{'a': 1}], 'a', dtype=str)
+
+    def test_numpy_arrays(self):
+        numpy = column._import_numpy()
+        if numpy is None:
+            with self.assertRaises(xjpath.XJPathError):
+                xjpath.lookup_column(self.docs, 'm.lat%', use_numpy=True)
+            return
+        col = xjpath.lookup_column(self.docs, 'm.lat%')
+        self.assertEqual([.5, 0., 1.5], col.values.tolist())
+        self.assertEqual([True, False, True], col.mask.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
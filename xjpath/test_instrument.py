@@ -0,0 +1,65 @@
+import unittest
+
+import xjpath
+from xjpath import instrument
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.recorder = instrument.enable(buckets=(1e-3, 1.),
+                                          sink=self.events.append)
+
+    def tearDown(self):
+        instrument.disable()
+
+    def test_counts_hits_misses_and_errors(self):
+        d = {'a': {'b': 1}}
+        xjpath.path_lookup(d, 'a.b')
+        xjpath.XJPath(d).get('a.c')
+        xjpath.compile('a.b').get(d)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.strict_path_lookup(d, 'a.b$')
+        stats = instrument.snapshot()
+        self.assertEqual(2, stats['a.b'].calls)
+        self.assertEqual(2, stats['a.b'].hits)
+        self.assertEqual(1, stats['a.c'].misses)
+        self.assertEqual(1, stats['a.b$'].errors)
+        self.assertEqual(2, sum(stats['a.b'].latency))
+        self.assertEqual(['hit', 'miss', 'hit', 'error'],
+                         [e.outcome for e in self.events])
+
+    def test_wildcard_fanout(self):
+        xjpath.path_lookup({'a': [1, 2, 3]}, 'a.*')
+        xjpath.path_lookup({'a': [1]}, 'a.*')
+        xjpath.path_lookup({'a': (1, 2)}, 'a')
+        stats = instrument.snapshot()
+        self.assertEqual(4, stats['a.*'].fanout_total)
+        self.assertEqual(3, stats['a.*'].fanout_max)
+        self.assertEqual(0, stats['a'].fanout_total)
+        self.assertEqual(3, self.events[0].fanout)
+
+    def test_latency_buckets(self):
+        times = iter([0., .0005, 1., 1.5, 2., 5.])
+        recorder = instrument.Instrumentation((1e-3, 1.), clock=times.__next__)
+        path = xjpath.compile('a')
+        for _ in range(3):
+            recorder.observe(path, {'a': 1}, False)
+        self.assertEqual([1, 1, 1], recorder.snapshot()['a'].latency)
+        self.assertAlmostEqual(3.5005, recorder.snapshot()['a'].total_time)
+
+    def test_snapshot_reset_and_disable(self):
+        xjpath.path_lookup({}, 'a')
+        snap = instrument.snapshot()
+        instrument.reset()
+        self.assertEqual(1, snap['a'].calls)
+        self.assertEqual({}, instrument.snapshot())
+        instrument.disable()
+        xjpath.path_lookup({}, 'a')
+        self.assertEqual({}, instrument.snapshot())
+        self.assertEqual({}, self.recorder.snapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import xjpath
+from xjpath.lazy import LazyDocument
+from xjpath.testing import JSON_DOC as DOC
+from xjpath.testing import JSON_PATHS as PATHS
+from xjpath.testing import outcome
+
+
+def _run(doc, path):
+    return outcome(xjpath.path_lookup, doc, path)
+
+
+class TestLazyDocument(unittest.TestCase):
+
+    def test_matches_path_lookup(self):
+        text = json.dumps(DOC, indent=1).encode()
+        paths = PATHS + ['meta.version#', 'records.@0{}', 'records.@:1()',
+                         'records.*[id=2].tags', 'records.@5.id', '.']
+        for source in (text, memoryview(text), bytearray(text)):
+            doc = LazyDocument(source)
+            for path in paths:
+                self.assertEqual(_run(DOC, path), _run(doc, path), path)
+
+    def test_slice_element_types_are_checked_in_order(self):
+        data = {'a': [{'b': 1}, 'x', {'b': 2}]}
+        doc = LazyDocument(json.dumps(data).encode())
+        for path in ('a.@:{}.b.c', 'a.@:{}.b', 'a.@1:{}'):
+            self.assertEqual(_run(data, path), _run(doc, path), path)
+
+    def test_indexes_only_touched_containers(self):
+        doc = LazyDocument(json.dumps(DOC).encode())
+        self.assertEqual(0, doc.indexed_containers)
+        self.assertEqual('1.2', xjpath.strict_path_lookup(
+            doc, 'meta.version'))
+        # The root and meta, not the arrays next to them.
+        self.assertEqual(2, doc.indexed_containers)
+        xjpath.path_lookup(doc, 'meta.v\\.v')
+        self.assertEqual(2, doc.indexed_containers)
+        self.assertEqual((1, 2), xjpath.strict_path_lookup(
+            doc, 'records.*.id'))
+        self.assertEqual(6, doc.indexed_containers)
+
+    def test_mismatched_steps_are_not_decoded(self):
+        data = {'a': ['x', {'y': 1}], 'o': {'k': [1]}, 'e': []}
+        doc = LazyDocument(json.dumps(data).encode())
+        with mock.patch.object(LazyDocument, '_decode', autospec=True,
+                               side_effect=LazyDocument._decode) as decode:
+            for path in ('a.y', 'a.y{}', 'o.@0', 'o.@0#', 'o.k.@5', 'e.@0',
+                         'e.@0$', 'a.x'):
+                self.assertEqual(_run(data, path), _run(doc, path), path)
+        # Only the string element of 'a', compared with the key of each of
+        # the three key steps on it.
+        self.assertEqual(3, decode.call_count)
+
+    def test_duplicate_keys_and_xjpath(self):
+        doc = LazyDocument('{"a": 1, "b": [true], "a": 2}')
+        xj = xjpath.XJPath(doc)
+        self.assertEqual(2, xj['a'])
+        self.assertEqual({'a': 2, 'b': [True]}, xj['.'])
+        self.assertIsNone(xj.get('b.@1'))
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_lookup(doc, 'c{}', True)
+        with self.assertRaises(xjpath.XJPathError):
+            LazyDocument(b'  ')
+        for text in (b'{"a": [1, }', b'{"a" 1}', b'[1 2]', b'{"a": "b'):
+            with self.assertRaises(xjpath.XJPathError):
+                xjpath.path_lookup(LazyDocument(text), 'a.@0')
+
+    def test_from_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json',
+                                         delete=False) as f:
+            json.dump(DOC, f)
+        try:
+            with LazyDocument.from_file(f.name) as doc:
+                self.assertEqual(DOC, doc.decode())
+                self.assertEqual((('c',), True), xjpath.path_lookup(
+                    doc, 'records.@-1.tags.@-1:'))
+        finally:
+            os.remove(f.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
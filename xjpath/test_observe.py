@@ -0,0 +1,126 @@
+import unittest
+
+import xjpath
+from xjpath.observe import Change
+from xjpath.observe import TrackedDocument
+
+
+class TestTrackedDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = TrackedDocument({
+            'services': {'web': {'port': 80, 'hosts': ['a']},
+                         'db': {'port': 5432, 'hosts': []}},
+            'limits': {'rate': 10}})
+        self.changes = []
+
+    def watch(self, path):
+        return self.doc.subscribe(path, self.changes.append)
+
+    def test_changes_of_watched_paths(self):
+        self.watch('services.*.port')
+        self.watch('services.web')
+        self.watch('limits.rate')
+        self.doc.set('services.web.port', 8080)
+        self.assertEqual([
+            Change('services.*.port', ((80, 5432), True),
+                   ((8080, 5432), True)),
+            Change('services.web',
+                   ({'port': 80, 'hosts': ['a']}, True),
+                   ({'port': 8080, 'hosts': ['a']}, True))], self.changes)
+        del self.changes[:]
+        self.doc.set('limits.rate', 10)
+        self.assertEqual([], self.changes)
+        self.doc.delete('limits')
+        self.assertEqual([Change('limits.rate', (10, True), (None, False))],
+                         self.changes)
+
+    def test_only_intersecting_paths_are_looked_up(self):
+        looked_up = []
+        for path in ('services.web.port', 'services.*.hosts.*', 'limits',
+                     'services.*[port>100].hosts', '**1', 'services.@0'):
+            sub = self.watch(path)
+            sub.path = _CountingPath(sub.path, looked_up)
+        self.doc.set('services.web.hosts.@0', 'b')
+        self.assertEqual(['**1', 'services.*.hosts.*',
+                          'services.*[port>100].hosts'], sorted(looked_up))
+        changes = dict((change.path, change) for change in self.changes)
+        self.assertEqual(['**1', 'services.*.hosts.*'], sorted(changes))
+        self.assertEqual(((('a',), ()), True),
+                         changes['services.*.hosts.*'].old)
+        self.assertEqual(((('b',), ()), True),
+                         changes['services.*.hosts.*'].new)
+
+    def test_batch_and_mark_changed(self):
+        self.watch('services.*.port')
+        with self.doc.batch():
+            self.doc.set('services.web.port', 81)
+            with self.doc.batch():
+                self.doc.set('services.api', {'port': 9000})
+            self.doc.apply_updates([('services.db.port', 1),
+                                    ('services.db.port', 5432)])
+            self.assertEqual([], self.changes)
+        self.assertEqual([Change('services.*.port', ((80, 5432), True),
+                                 ((81, 5432, 9000), True))], self.changes)
+        del self.changes[:]
+        self.doc.data['services']['db']['port'] = 1
+        self.assertEqual([], self.changes)
+        self.doc.mark_changed('services.db')
+        self.assertEqual(((81, 1, 9000), True), self.changes[0].new)
+
+    def test_apply_updates_through_slices(self):
+        doc = TrackedDocument({'checks': [{'ok': False}, {'ok': False}]})
+        doc.subscribe('checks.*.ok', self.changes.append)
+        doc.apply_updates([('checks.@:1.ok', True), ('limit', 1)])
+        self.assertEqual([Change('checks.*.ok', ((False, False), True),
+                                 ((True, False), True))], self.changes)
+
+    def test_snapshots_copy_written_values_only(self):
+        sub = self.watch('services')
+        db = sub.result[0]['db']
+        self.doc.set('services.web.hosts.@0', 'b')
+        self.doc.set('services.web.hosts.@0', 'c')
+        self.assertIs(db, sub.result[0]['db'])
+        self.assertIs(db, self.changes[0].old[0]['db'])
+        self.assertEqual(['a'], self.changes[0].old[0]['web']['hosts'])
+        self.assertEqual(['b'], self.changes[1].old[0]['web']['hosts'])
+        self.doc.data['services']['web']['hosts'].append('d')
+        self.doc.data['services']['db']['port'] = 1
+        self.doc.mark_changed('services.web.hosts')
+        self.doc.mark_changed('services.db.port')
+        self.assertEqual(['c', 'd'], sub.result[0]['web']['hosts'])
+        self.assertEqual(1, sub.result[0]['db']['port'])
+        self.assertEqual(self.doc.data['services'], sub.result[0])
+        self.assertIsNot(self.doc.data['services']['web'],
+                         sub.result[0]['web'])
+
+    def test_cancel_and_errors(self):
+        sub = self.watch('limits.*')
+        self.doc.setdefault('limits.burst', 5)
+        self.assertEqual(1, len(self.changes))
+        sub.cancel()
+        sub.cancel()
+        self.doc.set('limits.burst', 6)
+        self.assertEqual(1, len(self.changes))
+        self.watch('limits.rate')
+        with self.assertRaises(xjpath.XJPathError):
+            self.doc.set('limits.rate.@0', 1)
+        self.assertEqual(1, len(self.changes))
+
+
+class _CountingPath(object):
+    """Records lookups of a compiled path."""
+
+    def __init__(self, path, looked_up):
+        self.path = path.path
+        self.steps = path.steps
+        self._path = path
+        self._looked_up = looked_up
+
+    def lookup(self, data_obj):
+        self._looked_up.append(self.path)
+        return self._path.lookup(data_obj)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import multiprocessing
+import threading
+import unittest
+from unittest import mock
+
+import xjpath
+from xjpath import parallel
+
+
+DOC = {'records': [{'id': i, 'tags': ['t%d' % j for j in range(i % 3)],
+                    'attrs': {'a': {'v': i}, 'b': {'v': -i}}}
+                   for i in range(50)],
+       'by_name': {'n%d' % i: {'id': i} for i in range(20)},
+       'scalar': 1}
+
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(),
+                     'fork is not available')
+class TestParallelLookup(unittest.TestCase):
+
+    def check(self, path, workers=2):
+        self.assertEqual(
+            xjpath.path_lookup(DOC, path),
+            parallel.parallel_lookup(DOC, path, workers=workers,
+                                     min_size=1))
+
+    def test_same_results_as_path_lookup(self):
+        for path in ('records.*.id', 'records.*.id#', 'records.*.tags.*',
+                     'records.*.attrs.*.v', 'records.*.missing',
+                     'records.*[id>40].id', 'records.@10:20.id',
+                     'records.@::-7.id#', 'records.@:{}.id',
+                     'records[].@:.tags.*',
+                     'by_name.*.id', 'by_name.*[id<3].id'):
+            self.check(path)
+            self.check(path, workers=3)
+
+    def test_serial_fallbacks(self):
+        with mock.patch.object(parallel, '_lookup_range') as lookup_range:
+            for path in ('records.*', 'records.@1.id', 'records.**.id',
+                         'missing.*.id', 'scalar.*.id'):
+                self.check(path)
+            # Fewer elements than min_size.
+            self.assertEqual(
+                xjpath.path_lookup(DOC, 'records.@5:.id'),
+                parallel.parallel_lookup(DOC, 'records.@5:.id', workers=2,
+                                         min_size=46))
+            self.assertEqual(
+                xjpath.path_lookup(DOC, 'records.*.id'),
+                parallel.parallel_lookup(DOC, 'records.*.id', workers=1,
+                                         min_size=1))
+            self.assertFalse(lookup_range.called)
+
+    def test_errors(self):
+        for path in ('records.*.id$', 'scalar$.*.id', 'records.@:$.id'):
+            with self.assertRaises(xjpath.XJPathError):
+                parallel.parallel_lookup(DOC, path, workers=2, min_size=1)
+        self.assertIsNone(parallel._worker_state)
+
+    def test_concurrent_lookups(self):
+        paths = ['records.*.id', 'by_name.*.id', 'records.@::2.attrs.*.v']
+        res = {}
+
+        def run(path):
+            res[path] = parallel.parallel_lookup(DOC, path, workers=2,
+                                                 min_size=1)
+
+        threads = [threading.Thread(target=run, args=(path,))
+                   for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            dict((path, xjpath.path_lookup(DOC, path)) for path in paths),
+            res)
@@ -0,0 +1,94 @@
+import collections
+import unittest
+
+import xjpath
+from xjpath.record import ErrorSummary
+from xjpath.record import RecordSpec
+
+
+FIELDS = [('id', 'id#'),
+          ('name', ('user.name$', '')),
+          ('tags', 'tags.*'),
+          ('first_tag', 'tags.@0$')]
+
+DOCS = [{'id': 1, 'user': {'name': 'a'}, 'tags': ['x', 'y']},
+        {'id': 2, 'user': {}, 'tags': []},
+        {'id': '3', 'user': {'name': 3}, 'tags': ['z']},
+        {'user': 'b', 'tags': [1]}]
+
+
+class TestRecordSpec(unittest.TestCase):
+
+    def test_tuple_rows(self):
+        spec = RecordSpec(FIELDS)
+        self.assertEqual(('id', 'name', 'tags', 'first_tag'), spec.names)
+        self.assertEqual(4, len(spec))
+        errors = ErrorSummary()
+        rows = list(spec.iter_rows(DOCS, errors))
+        self.assertEqual([(1, 'a', ('x', 'y'), 'x'),
+                          (2, '', (), None),
+                          (None, '', ('z',), 'z'),
+                          (None, '', (1,), None)], rows)
+        self.assertEqual({'id': 1, 'name': 2, 'first_tag': 2},
+                         dict(errors.counts))
+        self.assertIn('"int"', errors.messages['id'])
+        self.assertTrue(errors)
+
+    def test_rows_match_lookups(self):
+        spec = RecordSpec(collections.OrderedDict(FIELDS))
+        for doc in DOCS[:2]:
+            expected = []
+            for path, (_, field) in zip(spec.paths, FIELDS):
+                default = field[1] if isinstance(field, tuple) else None
+                expected.append(path.get(doc, default))
+            self.assertEqual(tuple(expected), spec.row(doc))
+
+    def test_row_types(self):
+        doc = DOCS[0]
+        row = RecordSpec(FIELDS, 'namedtuple').row(doc)
+        self.assertEqual('a', row.name)
+        self.assertEqual((1, 'a', ('x', 'y'), 'x'), row)
+
+        spec = RecordSpec(FIELDS, 'slots')
+        row = spec.row(doc)
+        self.assertEqual(('x', 'y'), row.tags)
+        self.assertFalse(hasattr(row, '__dict__'))
+        self.assertEqual([1, 'a', ('x', 'y'), 'x'], list(row))
+        self.assertEqual(row, spec.row(dict(doc)))
+        self.assertNotEqual(row, spec.row(DOCS[1]))
+        self.assertIn("name='a'", repr(row))
+
+        row = RecordSpec(FIELDS, lambda *values: list(values)).row(doc)
+        self.assertEqual([1, 'a', ('x', 'y'), 'x'], row)
+
+    def test_errors_without_summary(self):
+        spec = RecordSpec([('a', 'a.b{}'), ('c', ('c', 0))])
+        self.assertEqual((None, 0), spec.row({'a': []}))
+        self.assertEqual(({}, 1), spec.row({'a': {'b': {}}, 'c': 1}))
+
+    def test_scalars_inside_paths(self):
+        spec = RecordSpec(FIELDS)
+        errors = ErrorSummary()
+        docs = [{'id': 2, 'user': 5, 'tags': 7}, DOCS[0]]
+        self.assertEqual([(2, '', None, None), (1, 'a', ('x', 'y'), 'x')],
+                         list(spec.iter_rows(docs, errors)))
+        self.assertEqual({'name': 1, 'first_tag': 1},
+                         dict(errors.counts))
+        self.assertEqual((2, '', None, None), spec.row(docs[0]))
+
+    def test_invalid_specs(self):
+        with self.assertRaises(xjpath.XJPathError):
+            RecordSpec([('a', 'a'), ('a', 'b')])
+        for name in ('1a', 'class', '_a', 'a b'):
+            with self.assertRaises(xjpath.XJPathError):
+                RecordSpec([(name, 'a')], 'slots')
+            with self.assertRaises(xjpath.XJPathError):
+                RecordSpec([(name, 'a')], 'namedtuple')
+        with self.assertRaises(xjpath.XJPathError):
+            RecordSpec([('a', 'a')], 'dict')
+        self.assertEqual(('a',), RecordSpec([('a b', 'a')]).row(
+            {'a': 'a'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
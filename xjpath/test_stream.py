@@ -0,0 +1,98 @@
+import io
+import json
+import mmap
+import tempfile
+import unittest
+
+import xjpath
+from xjpath import stream
+from xjpath.testing import JSON_DOC as DOC
+from xjpath.testing import JSON_PATHS as PATHS
+from xjpath.testing import outcome
+
+
+class TestStream(unittest.TestCase):
+
+    def test_stream_lookup_matches_path_lookup(self):
+        text = json.dumps(DOC, indent=1)
+        for chunk_size in (1, 7, 1 << 16):
+            for path in PATHS:
+                res = stream.stream_lookup(io.BytesIO(text.encode()), path,
+                                           chunk_size)
+                self.assertEqual(xjpath.path_lookup(DOC, path), res,
+                                 (path, chunk_size))
+
+    def test_stream_lookup_text_file(self):
+        res = stream.stream_lookup(io.StringIO(json.dumps(DOC)),
+                                   'records.@0.attrs.x', 3)
+        self.assertEqual(('a"b\\c', True), res)
+
+    def test_stream_lookup_type_errors(self):
+        data = json.dumps(DOC).encode()
+        with self.assertRaises(xjpath.XJPathError):
+            stream.stream_lookup(data, 'meta.version#')
+        with self.assertRaises(xjpath.XJPathError):
+            stream.stream_lookup(data, 'records{}')
+        with self.assertRaises(xjpath.XJPathError):
+            stream.stream_lookup(data, 'records.@-1[]')
+
+    def test_stream_lookup_skips_other_values(self):
+        data = b'{"meta": {"version": 1}, "records": [not json at all]}'
+        self.assertEqual((1, True),
+                         stream.stream_lookup(io.BytesIO(data),
+                                              'meta.version', 4))
+        with self.assertRaises(xjpath.XJPathError):
+            stream.stream_lookup(io.BytesIO(data), 'records.*')
+
+    def test_duplicate_keys_keep_the_last_one(self):
+        text = ('{"a": {"x": 1}, "b": [1], "a": {"x": 2, "y": [3], "x": 4},'
+                ' "c": {"k": 1, "j": 2, "k": 3}}')
+        data = json.loads(text)
+        paths = ['a.x', 'a', 'a.x#', 'a.y.@0', 'a.*', 'c.*', '*',
+                 'c.*[>1]', '*.x', 'c.k$']
+        with tempfile.TemporaryFile() as f:
+            f.write(b' ' + text.encode())
+            for path in paths:
+                expected = outcome(xjpath.path_lookup, data, path)
+                sources = [lambda: text.encode(),
+                           lambda: io.BytesIO(text.encode()),
+                           lambda: io.StringIO(text)]
+                for source in sources:
+                    for chunk_size in (1, 1 << 16):
+                        self.assertEqual(expected, outcome(
+                            stream.stream_lookup, source(), path,
+                            chunk_size), path)
+                for chunk_size in (1, 5, 1 << 16):
+                    # Positions are relative to where reading starts.
+                    f.seek(1)
+                    self.assertEqual(expected, outcome(
+                        stream.stream_lookup, f, path, chunk_size), path)
+        self.assertEqual([3, 2], list(stream.iter_stream(
+            text.encode(), 'c.*')))
+        self.assertEqual([4], list(stream.iter_stream(
+            io.StringIO(text), '*.x')))
+
+    def test_iter_stream_flattens_wildcards(self):
+        data = json.dumps(DOC).encode()
+        self.assertEqual([1, 2], list(stream.iter_stream(data,
+                                                         'records.*.id')))
+        self.assertEqual(['a', 'b', 'c'],
+                         list(stream.iter_stream(data, 'records.*.tags.*')))
+        self.assertEqual(['1.2'],
+                         list(stream.iter_stream(data, 'meta.version')))
+        self.assertEqual([], list(stream.iter_stream(data, 'missing.*')))
+
+    def test_mmap_source(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(json.dumps(DOC).encode())
+            f.flush()
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                self.assertEqual(((1, 2), True),
+                                 stream.stream_lookup(buf, 'records.*.id'))
+            finally:
+                buf.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
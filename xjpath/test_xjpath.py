@@ -1,3 +1,5 @@
+import pickle
+import sys
 import unittest
 
 import xjpath
@@ -212,6 +214,443 @@ class TestXJPath(unittest.TestCase):
         self.assertEqual(1, x['t1'])
         self.assertEqual(None, x.get('t1.1'))
 
+    def test_compiled_path_lookup(self):
+        d = {'a': [{'b': 1}, {'b': 2}, {'c': 3}]}
+        p = xjpath.compile('a.*.b')
+        self.assertEqual(((1, 2), True), p.lookup(d))
+        self.assertEqual((1, 2), p.strict_lookup(d))
+        self.assertEqual((1, 2), p.get(d))
+        self.assertEqual('a.*.b', p.path)
+
+    def test_compiled_path_get_default(self):
+        p = xjpath.compile('a.b#')
+        self.assertEqual('x', p.get({'a': {'b': 'str'}}, 'x'))
+        self.assertEqual('x', p.get({}, 'x'))
+        with self.assertRaises(xjpath.XJPathError):
+            p.strict_lookup({})
+
+    def test_compiled_path_is_reusable_in_path_lookup(self):
+        p = xjpath.compile('a{}.b[]')
+        d = {}
+        self.assertEqual(([], True), xjpath.path_lookup(d, p, True))
+        self.assertEqual({'a': {'b': []}}, d)
+        self.assertEqual([], xjpath.XJPath(d)[p])
+
+    def test_compiled_path_immutable_and_picklable(self):
+        p = xjpath.compile('a\\.b.@last')
+        with self.assertRaises(AttributeError):
+            p.path = 'x'
+        p2 = pickle.loads(pickle.dumps(p))
+        self.assertEqual(p, p2)
+        self.assertEqual(p.steps, p2.steps)
+        self.assertEqual(3, p2.strict_lookup({'a.b': [1, 2, 3]}))
+
+    def test_compiled_path_bad_index_fails_on_lookup(self):
+        p = xjpath.compile('a.@wrong')
+        self.assertEqual((None, False), p.lookup({}))
+        with self.assertRaises(xjpath.XJPathError):
+            p.lookup({'a': [1]})
+
+    def test_compile_requires_string(self):
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.compile(10)
+
+    def test_validate_path_uses_lookup_rules(self):
+        xjpath.validate_path('x.@first[].@-1#')
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.validate_path('x.@+1')
+
+    def test_path_cache_stats(self):
+        xjpath.cache_clear()
+        p1 = xjpath.compile('cache.test')
+        p2 = xjpath.compile('cache.test')
+        self.assertIs(p1, p2)
+        xjpath.strict_path_lookup({'cache': {'test': 1}}, 'cache.test')
+        info = xjpath.cache_info()
+        self.assertEqual(2, info.hits)
+        self.assertEqual(1, info.misses)
+        self.assertEqual(1, info.currsize)
+        xjpath.cache_clear()
+        self.assertEqual(0, xjpath.cache_info().currsize)
+
+    def test_path_cache_eviction(self):
+        maxsize = xjpath.cache_info().maxsize
+        xjpath.cache_clear()
+        try:
+            xjpath.set_cache_size(2)
+            p1 = xjpath.compile('p1')
+            xjpath.compile('p2')
+            xjpath.compile('p1')
+            xjpath.compile('p3')
+            info = xjpath.cache_info()
+            self.assertEqual(1, info.evictions)
+            self.assertEqual(2, info.currsize)
+            self.assertIs(p1, xjpath.compile('p1'))
+            xjpath.set_cache_size(0)
+            self.assertIsNot(xjpath.compile('p4'), xjpath.compile('p4'))
+            self.assertEqual(0, xjpath.cache_info().currsize)
+        finally:
+            xjpath.set_cache_size(maxsize)
+            xjpath.cache_clear()
+
+    def test_nested_wildcards_result_shape(self):
+        d = {'e': [{'p': [{'id': 1}, {'id': 2}]}, {'p': []}, {'x': 1},
+                   {'p': [{'id': 3}, {}]}]}
+        self.assertEqual(((1, 2), (), (3,)),
+                         xjpath.strict_path_lookup(d, 'e.*.p.*.id'))
+        self.assertEqual((), xjpath.strict_path_lookup(d, 'e.*.x.*'))
+
+    def test_wildcard_on_scalar_does_not_exist(self):
+        self.assertEqual((None, False), xjpath.path_lookup({'a': 1}, 'a.*'))
+        self.assertEqual(((), True),
+                         xjpath.path_lookup({'a': [1, 2]}, 'a.*.*'))
+
+    def test_path_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        d = v = {}
+        for _ in range(depth):
+            v['n'] = v = {}
+        v['id'] = 1
+        path = '.'.join(['n'] * depth + ['id'])
+        self.assertEqual(1, xjpath.strict_path_lookup(d, path))
+        self.assertEqual((1,), xjpath.strict_path_lookup(
+            [d], '*.' + path))
+
+    def test_wildcard_predicates(self):
+        d = {'items': [{'id': 1, 'status': 'active', 'size': 200,
+                        'm': {'x': 3}},
+                       {'id': 2, 'status': 'off', 'size': 50},
+                       {'id': 3, 'status': 'active', 'size': 'big'}, 7]}
+        lookup = xjpath.strict_path_lookup
+        self.assertEqual((1, 3), lookup(d, 'items.*[status=active].id'))
+        self.assertEqual((d['items'][0],), lookup(d, 'items.*[size>100]'))
+        self.assertEqual((1,), lookup(d, 'items.*[m.x>=3].id'))
+        self.assertEqual((1, 2, 3), lookup(d, 'items.*[size].id'))
+        self.assertEqual((2,), lookup(d, 'items.*[size<=50.5].id'))
+        self.assertEqual((1, 3), lookup(d, 'items.*[status!="off"].id'))
+        self.assertEqual((), lookup(d, 'items.*[m.x=\'3\']'))
+        self.assertEqual(((1,), ()), lookup({'a': [
+            {'b': [{'c': 1, 'on': True}]}, {'b': [{'c': 2, 'on': None}]}]},
+            'a.*.b.*[on=true].c'))
+        self.assertEqual([3], list(xjpath.iter_lookup(
+            d, 'items.*[status=active].id', flatten=True, limit=2))[1:])
+
+    def test_wildcard_predicate_validation(self):
+        xjpath.validate_path('a.*[b.c>=-1.5e3].d')
+        xjpath.validate_path('a.*[b\\=c]')
+        for path in ('a.*[b=]', 'a.*[b=>1]', 'a.*[@x]'):
+            with self.assertRaises(xjpath.XJPathError):
+                xjpath.validate_path(path)
+        path = xjpath.compile('a.*[b=1]')
+        self.assertEqual(path, pickle.loads(pickle.dumps(path)))
+
+    def test_descendants(self):
+        d = {'p': {'id': 1, 'a': [{'id': 2, 'b': {'id': 3}}, [{'id': 4}],
+                                  'id'], 'c': {'x': {'id': 5}}}}
+        lookup = xjpath.strict_path_lookup
+        self.assertEqual((1, 2, 3, 4, 5), lookup(d, 'p.**.id'))
+        self.assertEqual((1,), lookup(d, 'p.**1.id'))
+        self.assertEqual((1, 2, 5), lookup(d, 'p.**2.id'))
+        self.assertEqual(({'id': 2, 'b': {'id': 3}}, {'id': 4}),
+                         lookup(d, 'p.**.@0'))
+        self.assertEqual(((2, 3), (4,)), lookup(d, 'p.a.*.**.id'))
+        self.assertEqual(((3,),), lookup(d, 'p.**.b.**.id'))
+        self.assertEqual(8, len(lookup(d, 'p.**')))
+        self.assertEqual((None, False), xjpath.path_lookup(d, 'p.id.**'))
+        self.assertEqual({'**': 1}, lookup({'**': {'**': 1}}, '\\*\\*'))
+
+    def test_descendants_iter_lookup(self):
+        d = {'a': [{'id': 1, 'b': [{'id': 2}]}, {'id': 3}]}
+        self.assertEqual([1, 2], list(xjpath.iter_lookup(
+            d, 'a.**.id', limit=2)))
+        self.assertEqual([2], list(xjpath.iter_lookup(
+            d, 'a.*.b.**.id', flatten=True)))
+        self.assertEqual([(2,)], list(xjpath.iter_lookup(
+            d, 'a.*.b.**.id')))
+
+    def test_descendants_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        d = v = {}
+        for _ in range(depth):
+            v['n'] = v = {}
+        v['id'] = 1
+        self.assertEqual((1,), xjpath.strict_path_lookup(d, '**.id'))
+        self.assertEqual([1], list(xjpath.iter_lookup(d, '**.id')))
+        self.assertEqual(1, xjpath.path_delete(d, '**.id'))
+
+    def test_slices(self):
+        d = {'log': [{'ts': i} for i in range(10)], 't': (1, 2, 3)}
+        lookup = xjpath.strict_path_lookup
+        self.assertEqual((0, 1, 2), lookup(d, 'log.@0:3.ts'))
+        self.assertEqual((8, 9), lookup(d, 'log.@-2:.ts'))
+        self.assertEqual((0, 4, 8), lookup(d, 'log.@::4.ts'))
+        self.assertEqual((9, 6, 3, 0), lookup(d, 'log.@::-3.ts'))
+        self.assertEqual((2, 3), lookup(d, 't.@1:#'))
+        self.assertEqual((), lookup(d, 'log.@5:2'))
+        self.assertEqual((None, False), xjpath.path_lookup(d, 'log.@0.@:1'))
+        with self.assertRaises(xjpath.XJPathError):
+            lookup(d, 'log.@0:2$')
+        for path in ('log.@a:', 'log.@1:2:0', 'log.@1:2:3:4'):
+            with self.assertRaises(xjpath.XJPathError):
+                xjpath.validate_path(path)
+
+    def test_slices_iter_lookup(self):
+        d = {'log': [{'ts': i} for i in range(10)]}
+        res = xjpath.iter_lookup(d, 'log.@-3:.ts')
+        self.assertEqual(7, next(res))
+        d['log'][8]['ts'] = 'changed'
+        self.assertEqual(['changed', 9], list(res))
+
+    def test_path_set_lookup_keeps_order(self):
+        d = {'u': {'id': 1, 'p': {'name': 'n', 'geo': {'lat': .5}},
+                   'tags': ['a', 'b']}}
+        paths = ['u.p.geo.lat%', 'u.id', 'u.tags.*', 'u.p.name',
+                 'u.missing', 'u.tags.@last', '', 'u.id']
+        ps = xjpath.PathSet(paths)
+        self.assertEqual(len(paths), len(ps))
+        self.assertEqual(tuple(xjpath.path_lookup(d, p) for p in paths),
+                         ps.lookup(d))
+
+    def test_path_set_shared_wildcards(self):
+        d = {'o': [{'id': 1, 'i': [{'s': 'a'}, {'s': 'b'}]},
+                   {'id': 2, 'i': []}, {'x': 3}]}
+        ps = xjpath.PathSet(['o.*.id', 'o.*.i.*.s', 'o.*', 'o.@0.id'])
+        self.assertEqual((((1, 2), True),
+                          ((('a', 'b'), ()), True),
+                          (tuple(d['o']), True),
+                          (1, True)), ps.lookup(d))
+
+    def test_path_set_type_mismatch(self):
+        ps = xjpath.PathSet(['a.b', 'a.c#'])
+        with self.assertRaises(xjpath.XJPathError):
+            ps.lookup({'a': {'b': 1, 'c': 'str'}})
+
+    def test_extract_many(self):
+        d = {'a': {'b': 1, 'c': [1, 2]}}
+        self.assertEqual({'a.b': (1, True), 'a.c.*': ((1, 2), True),
+                          'a.d': (None, False)},
+                         xjpath.extract_many(d, ['a.b', 'a.c.*', 'a.d']))
+
+    def test_iter_lookup_first_wildcard_level(self):
+        d = {'a': [{'b': [{'c': 1}, {'c': 2}]}, {'x': 1}, {'b': []}]}
+        self.assertEqual([(1, 2), ()],
+                         list(xjpath.iter_lookup(d, 'a.*.b.*.c')))
+        self.assertEqual([d['a'][0]['b']],
+                         list(xjpath.iter_lookup(d, 'a.@0.b')))
+        self.assertEqual([], list(xjpath.iter_lookup(d, 'a.@5.b')))
+
+    def test_iter_lookup_flatten(self):
+        d = {'a': [{'b': [{'c': 1}, {'c': 2}]}, {'b': {'k': {'c': 3}}}]}
+        self.assertEqual([1, 2, 3], list(xjpath.iter_lookup(
+            d, 'a.*.b.*.c', flatten=True)))
+        self.assertEqual([{'c': 1}, {'c': 2}, {'c': 3}], list(
+            xjpath.iter_lookup(d, 'a.*.b.*', flatten=True)))
+
+    def test_iter_lookup_limit_stops_walk(self):
+        d = {'a': [{'b': 1}, {'b': 2}, {'b': 'not reached'}]}
+        self.assertEqual([1, 2], list(xjpath.iter_lookup(
+            d, 'a.*.b#', limit=2)))
+        with self.assertRaises(xjpath.XJPathError):
+            list(xjpath.iter_lookup({'a': [{'b': 1}, {'b': 'x'}]},
+                                    'a.*.b#', limit=2))
+        self.assertEqual([1], list(xjpath.compile('a.*.b').iter_lookup(
+            d, True, 1)))
+
+
+    def test_path_set_creates_intermediate_containers(self):
+        d = {'a': {'l': [{}]}}
+        self.assertEqual(1, xjpath.path_set(d, 'a.b.c', 1))
+        self.assertEqual(1, xjpath.path_set(d, 'a.x[]', []))
+        self.assertEqual(1, xjpath.path_set(d, 'a.l.@last.k#', 2))
+        self.assertEqual({'a': {'b': {'c': 1}, 'x': [], 'l': [{'k': 2}]}},
+                         d)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'n[]', 'not a list')
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.l.@1.k', 1)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.b.c.d', 1)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.b.c#', 'str')
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.y#.z', 1)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, '', 1)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.@x', 1)
+
+    def test_path_set_failure_removes_created_containers(self):
+        d = {}
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.b.@0', 1)
+        self.assertEqual({}, d)
+        d = {'a': {'x': 1}}
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.b[].c.d', 1)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_setdefault(d, 'a.n.m.@first', 1)
+        self.assertEqual({'a': {'x': 1}}, d)
+
+        # Targets of a marker set before the failing one are kept.
+        d = {'l': [{}, 1]}
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'l.*.b.c', 1)
+        self.assertEqual({'l': [{'b': {'c': 1}}, 1]}, d)
+
+        # Batched updates of a prefix tree remove them too.
+        updates = [('x', 1), ('a.x', 1), ('a.b.@0', 1)]
+        self.assertIsNotNone(xjpath.xjpath._update_plan(
+            tuple(path for path, _ in updates)))
+        for d, expected in (({}, {'x': 1}),
+                            ({'a': {}}, {'x': 1, 'a': {'x': 1}})):
+            with self.assertRaises(xjpath.XJPathError):
+                xjpath.apply_updates(d, updates)
+            self.assertEqual(expected, d)
+
+    def test_path_set_wildcards(self):
+        d = {'a': [{'b': 1}, {}], 'm': {'x': 1, 'y': 2}}
+        self.assertEqual(2, xjpath.path_set(d, 'a.*.b', 5))
+        self.assertEqual(2, xjpath.path_set(d, 'm.*', 0))
+        self.assertEqual(0, xjpath.path_set(d, 'missing.*.b', 5))
+        self.assertEqual({'a': [{'b': 5}, {'b': 5}], 'm': {'x': 0, 'y': 0}},
+                         d)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.@0.b.*', 1)
+
+    def test_path_set_and_delete_with_predicates(self):
+        d = {'a': [{'s': 1}, {'s': 2}, {'s': 3}], 'm': {'x': 1, 'y': 2}}
+        self.assertEqual(2, xjpath.path_set(d, 'a.*[s>1].t', 0))
+        self.assertEqual(1, xjpath.path_set(d, 'm.*[=2]', 0))
+        self.assertEqual(1, xjpath.path_delete(d, 'a.*[s=2]'))
+        self.assertEqual({'a': [{'s': 1}, {'s': 3, 't': 0}],
+                          'm': {'x': 1, 'y': 0}}, d)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.*[s=].t', 1)
+
+    def test_path_set_and_delete_descendants(self):
+        d = {'a': {'secret': 1, 'b': [{'secret': 2}, {'c': {}}]}}
+        self.assertEqual(2, xjpath.path_delete(d, '**.secret'))
+        self.assertEqual({'a': {'b': [{}, {'c': {}}]}}, d)
+        self.assertEqual(3, xjpath.path_set(d, 'a.**2.x', 0))
+        self.assertEqual({'a': {'x': 0, 'b': [{'x': 0}, {'c': {}, 'x': 0}]}},
+                         d)
+        self.assertEqual((0, 0, None), xjpath.path_setdefault(
+            d, 'a.b.**.x'))
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'a.**', 1)
+
+    def test_path_set_and_delete_slices(self):
+        d = {'l': [{'a': i} for i in range(5)], 'n': [0, 1, 2, 3]}
+        self.assertEqual(2, xjpath.path_set(d, 'l.@-2:.a', None))
+        self.assertEqual(2, xjpath.path_set(d, 'n.@::2', 5))
+        self.assertEqual(2, xjpath.path_delete(d, 'n.@:2'))
+        self.assertEqual(((0, 1), True), xjpath.path_lookup(
+            d, 'l.@:2.a'))
+        self.assertEqual({'l': [{'a': 0}, {'a': 1}, {'a': 2}, {'a': None},
+                                {'a': None}], 'n': [5, 3]}, d)
+        self.assertEqual((5, 3), xjpath.path_setdefault(d, 'n.@:'))
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_set(d, 'l.@0.a.@:1', 1)
+
+    def test_path_setdefault(self):
+        d = {'a': {'b': 1}, 'l': [{'k': 1}, {}]}
+        self.assertEqual(1, xjpath.path_setdefault(d, 'a.b', 2))
+        self.assertEqual(2, xjpath.path_setdefault(d, 'a.c.d', 2))
+        self.assertEqual((1, 0), xjpath.path_setdefault(d, 'l.*.k', 0))
+        self.assertEqual({'a': {'b': 1, 'c': {'d': 2}},
+                          'l': [{'k': 1}, {'k': 0}]}, d)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_setdefault(d, 'a.b$', 'x')
+
+    def test_path_delete(self):
+        d = {'a': {'b': 1, 'c': 2}, 'l': [1, 2, 3], 'w': [{'k': 1}, {}]}
+        self.assertEqual(1, xjpath.path_delete(d, 'a.b'))
+        self.assertEqual(0, xjpath.path_delete(d, 'a.b'))
+        self.assertEqual(0, xjpath.path_delete(d, 'x.y'))
+        self.assertEqual(1, xjpath.path_delete(d, 'l.@first'))
+        self.assertEqual(0, xjpath.path_delete(d, 'l.@5'))
+        self.assertEqual(1, xjpath.path_delete(d, 'w.*.k'))
+        self.assertEqual(2, xjpath.path_delete(d, 'l.*'))
+        self.assertEqual({'a': {'c': 2}, 'l': [], 'w': [{}, {}]}, d)
+        with self.assertRaises(xjpath.XJPathError):
+            xjpath.path_delete(d, 'a.c.d')
+
+    def test_apply_updates(self):
+        d = {'a': {'b': 1}}
+        updates = [('a.b', 2), ('a.c.d', 3), ('a.c.e', 4), ('l[]', [1]),
+                   (xjpath.compile('x.*.y'), 5)]
+        self.assertEqual(4, xjpath.apply_updates(d, updates))
+        self.assertEqual({'a': {'b': 2, 'c': {'d': 3, 'e': 4}}, 'l': [1]}, d)
+
+    def test_apply_updates_overlapping_paths_keep_order(self):
+        d = {'l': [0, 0]}
+        xjpath.apply_updates(d, [('a', {}), ('a.b', 1), ('l.@-1', 1),
+                                 ('l.@1', 2), ('a.b', 3)])
+        self.assertEqual({'a': {'b': 3}, 'l': [0, 2]}, d)
+
+    def test_apply_updates_slices_and_descendants(self):
+        d = {'a': [{'x': 0}, {'x': 1}, {'x': 2}], 'b': {'c': {'y': 0}}}
+        self.assertEqual(5, xjpath.apply_updates(
+            d, [('a.@0:2.x', 5), ('a.@-1.x', 6), ('b.**.y', 7)]))
+        self.assertEqual({'a': [{'x': 5}, {'x': 5}, {'x': 6}],
+                          'b': {'c': {'y': 7}, 'y': 7}}, d)
+
+    def test_XJPath_set_and_delete(self):
+        xj = xjpath.XJPath({})
+        xj['a.b'] = 1
+        self.assertEqual(1, xj['a.b'])
+        del xj['a.b']
+        self.assertEqual({'a': {}}, xj.data_structure)
+        with self.assertRaises(IndexError):
+            del xj['a.b']
+        with self.assertRaises(IndexError):
+            xj['a.@0'] = 1
+
+    def test_XJPath_result_cache(self):
+        d = {'a': {'b': [1, 2]}, 'c': {'d': 1}}
+        xj = xjpath.XJPath(d, cache_size=3)
+        self.assertEqual((1, 2), xj['a.b.*'])
+        self.assertIs(xj['a.b.*'], xj['a.b.*'])
+        self.assertEqual(1, xj['c.d'])
+        self.assertIsNone(xj.get('c.x'))
+        info = xj.cache_info()
+        self.assertEqual((2, 3, 0, 3), info[:4])
+
+        # Writes invalidate only overlapping results.
+        version = xj.version
+        xj['a.b.@0'] = 5
+        self.assertEqual(version + 1, xj.version)
+        self.assertEqual(2, xj.cache_info().currsize)
+        self.assertEqual((5, 2), xj['a.b.*'])
+        del xj['c']
+        self.assertIsNone(xj.get('c.d'))
+        with self.assertRaises(IndexError):
+            xj['a.b$$'] = 1
+
+        # Direct changes need an explicit invalidation.
+        d['a']['b'].append(3)
+        self.assertEqual((5, 2), xj['a.b.*'])
+        xj.invalidate('x')
+        self.assertEqual((5, 2), xj['a.b.*'])
+        xj.invalidate('a.b.@-1')
+        self.assertEqual((5, 2, 3), xj['a.b.*'])
+        d['a'] = {}
+        xj.invalidate()
+        self.assertIsNone(xj.get('a.b.*'))
+        xj.data_structure = {'a': {'b': [0]}}
+        self.assertEqual((0,), xj['a.b.*'])
+        self.assertIsNone(xjpath.XJPath(d).cache_info())
+
+    def test_XJPath_result_cache_bytes(self):
+        d = {'a': list(range(100)), 'b': 1}
+        xj = xjpath.XJPath(d, cache_size=10, cache_bytes=500)
+        self.assertEqual(1, xj['b'])
+        self.assertEqual(100, len(xj['a.*']))
+        self.assertEqual(1, xj.cache_info().currsize)
+        self.assertEqual((1, 2), xj['a.@1:3'])
+        self.assertEqual(2, xj.cache_info().currsize)
+        with self.assertRaises(ValueError):
+            xjpath.XJPath(d, cache_size=-1)
 
 if __name__ == '__main__':
     import logging
@@ -0,0 +1,61 @@
+"""Fixtures shared by tests comparing lookup engines with path_lookup."""
+
+import itertools
+
+from xjpath.xjpath import XJPathError
+
+
+# A JSON serializable document and paths of every step kind in it.
+JSON_DOC = {'meta': {'version': '1.2', 'v.v': [1, 2.5, -3e5]},
+            'records': [{'id': 1, 'tags': ['a', 'b'],
+                         'attrs': {'x': 'a"b\\c'}},
+                        {'id': 2, 'tags': [], 'attrs': {'x': None}},
+                        {'tags': ['c'], 'attrs': {'x': True}}],
+            'empty': {}}
+
+JSON_PATHS = ['meta.version', 'meta', 'meta.v\\.v.@-1', 'meta.v\\.v.@1%',
+              'records.*.id', 'records.*.tags.*', 'records.@last.tags.@0$',
+              'records.@-2.attrs.x', 'records.*.attrs', 'empty.*',
+              'missing', 'records.@10', 'records.@-10', 'records.id', '',
+              '*', 'records.*[id>1].tags', 'records.*[attrs.x=true].tags.*',
+              'meta.v\\.v.*[<0]', 'records.**.x', '**1.@0', '**',
+              'records.@1:.id', 'records.@-2:.tags.*', 'records.@::-2.id',
+              'meta.v\\.v.@1:-1%', 'meta.@:1']
+
+# Documents of different shapes, and paths of one to three segments in
+# them, paths of three segments only with a '*'.
+SHAPE_DOCS = [
+    {'a': {'b': [{'c': 1}, {'c': {'d': 'x'}}, {}], 'v.v': (1, 2.5)},
+     '@id': [[1, 2], [], [3]], '*': {'k': None}},
+    [{'a': [1]}, {'a': {'b': {}}}, 'a', None],
+    {'a': 'abc', 'b': [], 'c': {}},
+    {},
+    [],
+    'a',
+    None,
+]
+
+_SEGMENTS = ['a', 'b', 'c', 'd', 'v\\.v', '\\@id', '\\*', '*', '@first',
+             '@last', '@1', '@-1', '@x', 'a#', 'a$', 'b{}', 'c[]', '@0{}',
+             '@last%', 'k()', '*[c]', '*[c.d!=x]', '*[=1]', '*[c=]',
+             '**', '**1', '@1:', '@::-1', '@:1()']
+
+SHAPE_PATHS = ['', '.', 'a.'] + [
+    '.'.join(p) for length in (1, 2, 3)
+    for p in itertools.product(_SEGMENTS, repeat=length)
+    if length < 3 or '*' in p]
+
+
+def outcome(func, *args):
+    """Calls func and returns a comparable outcome of the call.
+
+    :return: ('ok', result), ('error', XJPathError arguments) or
+             'type error'.
+    """
+
+    try:
+        return 'ok', func(*args)
+    except XJPathError as e:
+        return 'error', e.args
+    except TypeError:
+        return 'type error'
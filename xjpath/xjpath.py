@@ -28,6 +28,13 @@ An array index is prepended with '@' symbol:
     @last - Means last element.
     @first - Means first element of the array.
 
+A slice of an array is written as a Python slice after '@' symbol. Like
+'*' it matches many elements, but only the selected elements are visited:
+
+    @0:10 - Means first ten elements.
+    @-100: - Means last hundred elements.
+    @::10 - Means every tenth element.
+
 In case if dictionary key contains any reserved symbols, just escape them.
 
 '2.\@2' - will lookup key 2 and then key '@2'.
@@ -95,16 +102,211 @@ To get all values of b_dict dictionary:
 >>> xj['data.b_dict.*']
 ('zzz', 'yyy', 'xxx')
 
+To get only elements matching a predicate, put it in brackets right after
+the '*' marker. A predicate is a path relative to an element, optionally
+compared to a number, a string or true, false and null with one of =, !=,
+>, >=, < or <=. Elements not matching it are skipped during the lookup:
+
+>>> xj['data.c_array.*[v=vdata2]']
+({'v': 'vdata2'},)
+>>> xj['data.c_array.*[v!="vdata2"].v']
+('vdata1',)
+>>> xj['data.c_array.*[v].v']
+('vdata1', 'vdata2')
+
+To look a path up at any nesting level use the '**' marker. It matches a
+value and every dictionary and list nested in it, depth first. A number
+after it limits how deep to descend, '**1' matches a value and its direct
+children only:
+
+>>> xj['data.**.v']
+('vdata1', 'vdata2')
+>>> xj['data.**.@0']
+(0, {'v': 'vdata1'})
+
+To get last two elements of 'a_array' and 'v' of the first element of
+'c_array':
+
+>>> xj['data.a_array.@-2:']
+(9, 10)
+>>> xj['data.c_array.@:1.v']
+('vdata1',)
+
 
 If you don't like a dictionary like interface. Feel free to use path_lookup
 function instead that returns a found value as well as a boolean value telling
 you if result is found or not.
 
+If the same path is looked up many times, compile it once and reuse the
+compiled object. It is immutable and can be pickled:
+
+>>> users = xjpath.compile('data.c_array.*.v')
+>>> users.lookup(d)
+(('vdata1', 'vdata2'), True)
+>>> users.strict_lookup(d)
+('vdata1', 'vdata2')
+>>> users.get({}, 'default')
+'default'
+
+String paths are compiled behind the scenes as well and kept in a bounded
+LRU cache. Use cache_info(), cache_clear() and set_cache_size() to inspect
+and tune it.
+
+If a document is read much more often than changed, XJPath can cache
+lookup results. Writes through the instance drop cached results of paths
+they may change and bump its version. Call invalidate() with a changed
+path, or without arguments, after changing the data structure directly:
+
+>>> config = xjpath.XJPath(conf, cache_size=256, cache_bytes=1 << 20)
+>>> config['services.*.port']
+(80, 443)
+>>> conf['services']['web']['port'] = 8080
+>>> config.invalidate('services.web')
+
+To react to changes of a long-lived document, wrap it in TrackedDocument
+and subscribe to paths. Writes through the document look up again only
+subscriptions whose paths intersect written paths, and callbacks get the
+old and the new (value, exists) result:
+
+>>> state = xjpath.TrackedDocument({'services': {'web': {'port': 80}}})
+>>> sub = state.subscribe('services.*.port', print)
+>>> state.set('services.web.port', 8080)
+Change(path='services.*.port', old=((80,), True), new=((8080,), True))
+
+To extract many paths from the same document use PathSet or extract_many.
+Shared path prefixes are walked only once:
+
+>>> paths = xjpath.PathSet(['data.b_dict.a', 'data.b_dict.b', 'data.x'])
+>>> paths.lookup(d)
+(('xxx', True), ('yyy', True), (None, False))
+>>> xjpath.extract_many(d, ['data.b_dict.a', 'data.a_array.@last'])
+{'data.b_dict.a': ('xxx', True), 'data.a_array.@last': (10, True)}
+
+Use iter_lookup to get values matched by '*' one by one. With flatten=True
+values of nested '*' markers are yielded instead of tuples, and limit stops
+the lookup early:
+
+>>> list(xjpath.iter_lookup(d, 'data.c_array.*.v', limit=1))
+['vdata1']
+>>> list(xjpath.iter_lookup(d, 'data.a_array.@::5'))
+[0, 5, 10]
+
+To build a column of values from many documents use lookup_column. Paths
+with '#' or '%' postfix produce compact arrays (NumPy arrays if NumPy is
+installed) and a mask of documents where the path exists:
+
+>>> docs = [{'m': {'latency': .5}}, {}, {'m': {'latency': 1.5}}]
+>>> xjpath.lookup_column(docs, 'm.latency%')
+Column(values=array('d', [0.5, 0.0, 1.5]), mask=bytearray(b'\\x01\\x00\\x01'))
+
+To turn documents into flat rows use RecordSpec. Fields are extracted in
+one traversal, and type mismatches fall back to field defaults and are
+counted per field instead of raising:
+
+>>> spec = xjpath.RecordSpec([('id', 'm.id#'), ('lat', ('m.latency%', 0.))])
+>>> errors = xjpath.ErrorSummary()
+>>> list(spec.iter_rows([{'m': {'id': 1}}, {'m': {'id': '2'}}], errors))
+[(1, 0.0), (None, 0.0)]
+>>> errors.counts
+Counter({'id': 1})
+
+Counts, sums and other aggregates of values matched by a path can be
+computed without building tuples of them. Values of nested markers are
+reduced one at a time in constant memory:
+
+>>> xjpath.aggregate(d, 'data.a_array.*', 'sum')
+55
+>>> xjpath.aggregate(d, 'data.a_array.*', 'top', k=2)
+[10, 9]
+
+Huge JSON files can be looked up without loading them into memory. Only
+values selected by the path are decoded:
+
+>>> with open('export.json', 'rb') as f:
+...     xjpath.stream_lookup(f, 'meta.version')
+('1.2', True)
+>>> with open('export.json', 'rb') as f:
+...     ids = list(xjpath.iter_stream(f, 'records.*.id'))
+
+asyncio applications can look paths up in documents of an async iterator
+with xjpath.aio. Documents are looked up in batches, optionally in an
+executor, with a bounded number of batches in flight:
+
+>>> from xjpath import aio
+>>> async for value, exists in aio.lookup_stream(docs, 'user.id'):
+...     print(value)
+
+A single huge document can be looked up by a pool of processes with
+xjpath.parallel. Elements of the first '*' or slice are split between
+forked workers, and results are merged in order. Markers with fewer than
+min_size elements are looked up serially, a pool costs more than it saves
+there:
+
+>>> from xjpath import parallel
+>>> parallel.parallel_lookup(doc, 'records.*.attrs.*.value', workers=8)
+
+If only a few paths of a large JSON blob are needed, wrap its raw bytes
+or a memory mapped file in LazyDocument instead of decoding it. Offsets of
+members are indexed for containers a lookup goes through, and only the
+values a path reaches are decoded:
+
+>>> doc = xjpath.LazyDocument.from_file('export.json')
+>>> xjpath.path_lookup(doc, 'meta.version')
+('1.2', True)
+
+Hot paths can be turned into specialized Python functions. They return the
+same results as path_lookup, but skip the generic step dispatch:
+
+>>> lookup = xjpath.compile_function('data.a_array.@last')
+>>> lookup(d)
+(10, True)
+
+If a path is looked up in documents of the same shape, AdaptivePath
+records the types of containers met on the way and, after a warmup,
+generates a function guarded by checks of those exact types. A document
+failing a guard is looked up by the generic engine and the shape is
+recorded again:
+
+>>> path = xjpath.AdaptivePath('data.a_array.@last', warmup=1)
+>>> path.lookup(d)
+(10, True)
+>>> path.info()
+AdaptiveInfo(specializations=1, deopts=0, state='specialized')
+
+To query many documents by path values, keep them in a XJPathCollection
+with indexes on the paths. Indexes are updated on add, replace and remove:
+
+>>> docs = xjpath.XJPathCollection([d])
+>>> docs.add_index('data.c_array.*.v')
+>>> docs.find('data.c_array.*.v', 'vdata2')
+[0]
+
+Values are written with path_set, path_setdefault and path_delete. Missing
+dictionaries on the way are created, a '[]' postfix creates a list instead.
+apply_updates sets many paths walking shared prefixes once:
+
+>>> xjpath.path_set(d, 'data.meta.owner', 'me')
+1
+>>> xjpath.path_setdefault(d, 'data.meta.owner', 'you')
+'me'
+>>> xjpath.apply_updates(d, [('data.b_dict.a', 1), ('data.c_array.*.v', 0)])
+3
+>>> xjpath.path_delete(d, 'data.meta')
+1
+
 
 Author: vburenin@gmail.com
 """
 
 
+import collections
+import itertools
+import operator
+import re
+import sys
+import threading
+
+
 ESCAPE_STR1 = '111' * 5
 ESCAPE_STR2 = '222' * 5
 ESCAPE_SEQ = '\\'  # '\' character used as an escape sequence in xjpath.
@@ -155,40 +357,6 @@ def split(inp_str, sep_char, maxsplit=-1, escape_char='\\'):
     yield ''.join(word_chars)
 
 
-def _full_sub_array(data_obj, xj_path, create_dict_path):
-    """Retrieves all array or dictionary elements for '*' JSON path marker.
-
-    :param dict|list data_obj: The current data object.
-    :param str xj_path: A json path.
-    :param bool create_dict_path create a dict path.
-    :return: tuple with two values: first is a result and second
-             a boolean flag telling if this value exists or not.
-    """
-
-    if isinstance(data_obj, list):
-        if xj_path:
-            res = []
-            for d in data_obj:
-                val, exists = path_lookup(d, xj_path, create_dict_path)
-                if exists:
-                    res.append(val)
-            return tuple(res), True
-        else:
-            return tuple(data_obj), True
-    elif isinstance(data_obj, dict):
-        if xj_path:
-            res = []
-            for d in data_obj.values():
-                val, exists = path_lookup(d, xj_path, create_dict_path)
-                if exists:
-                    res.append(val)
-            return tuple(res), True
-        else:
-            return tuple(data_obj.values()), True
-    else:
-        return None, False
-
-
 def _get_array_index(array_path):
     """Translates @first @last @1 @-1 expressions into an actual array index.
 
@@ -211,32 +379,93 @@ def _get_array_index(array_path):
         raise XJPathError('Unknown index reference', (array_path,))
 
 
-def _single_array_element(data_obj, xj_path, array_path, create_dict_path):
+def _get_array_slice(array_path):
+    """Translates @1:10 @-10: @::2 expressions into an array slice.
+
+    :param str array_path: Array path in XJ notation.
+    :rtype: slice
+    :return: Array slice.
+    """
+
+    if not array_path.startswith('@'):
+        raise XJPathError('Array slice must start from @ symbol.')
+    parts = array_path[1:].split(':')
+    if len(parts) > 3:
+        raise XJPathError('Unknown slice reference', (array_path[1:],))
+    bounds = []
+    for part in parts:
+        if not part:
+            bounds.append(None)
+        elif part.isdigit() or (part.startswith('-') and
+                                part[1:].isdigit()):
+            bounds.append(int(part))
+        else:
+            raise XJPathError('Unknown slice reference', (array_path[1:],))
+    if len(bounds) == 3 and bounds[2] == 0:
+        raise XJPathError('Slice step cannot be zero', (array_path[1:],))
+    return slice(*bounds)
+
+
+def _slice_items(data_obj, array_slice, val_type):
+    """Returns an iterator over list elements selected by a slice.
+
+    Elements are taken by index, so the list is not copied.
+
+    :param list data_obj: The current data object.
+    :param slice array_slice: An array slice.
+    :param type|None val_type: Expected type of the elements.
+    :rtype: iterator
+    """
+
+    indexes = range(*array_slice.indices(len(data_obj)))
+    if val_type is None:
+        return map(data_obj.__getitem__, indexes)
+    return _checked_items(data_obj, indexes, val_type)
+
+
+def _checked_items(data_obj, indexes, val_type):
+    for idx in indexes:
+        value = data_obj[idx]
+        _check_index_type(idx, value, val_type)
+        yield value
+
+
+def _check_index_type(array_idx, value, val_type):
+    """Raises XJPathError if an array element is not of expected type."""
+
+    if val_type is not None and not isinstance(value, val_type):
+        raise XJPathError('Index array "%s" of "%s" type does not '
+                          'match expected type "%s"' %
+                          (array_idx, type(value).__name__,
+                           val_type.__name__))
+
+
+def _check_key_type(key, value, val_type):
+    """Raises XJPathError if a dictionary value is not of expected type."""
+
+    if val_type is not None and not isinstance(value, val_type):
+        raise XJPathError(
+            'Key %s expects type "%s", but found value type is "%s"' %
+            (key, val_type.__name__, type(value).__name__))
+
+
+def _single_array_element(data_obj, array_idx, val_type):
     """Retrieves a single array for a '@' JSON path marker.
 
     :param list data_obj: The current data object.
-    :param str xj_path: A json path.
-    :param str array_path: A lookup key.
-    :param bool create_dict_path create a dict path.
+    :param int array_idx: An array index.
+    :param type|None val_type: Expected type of the element.
+    :return: tuple with two values: first is a result and second
+             a boolean flag telling if this value exists or not.
     """
 
-    val_type, array_path = _clean_key_type(array_path)
-    array_idx = _get_array_index(array_path)
     if data_obj and isinstance(data_obj, (list, tuple)):
         try:
             value = data_obj[array_idx]
-            if val_type is not None and not isinstance(value, val_type):
-                raise XJPathError('Index array "%s" of "%s" type does not '
-                                  'match expected type "%s"' %
-                                  (array_idx, type(value).__name__,
-                                   val_type.__name__))
-
-            if xj_path:
-                return path_lookup(value, xj_path, create_dict_path)
-            else:
-                return value, True
         except IndexError:
             return None, False
+        _check_index_type(array_idx, value, val_type)
+        return value, True
     else:
         if val_type is not None:
             raise XJPathError('Expected the list element type, but "%s" found' %
@@ -244,6 +473,31 @@ def _single_array_element(data_obj, xj_path, array_path, create_dict_path):
         return None, False
 
 
+def _dict_element(data_obj, key, val_type, create_dict_path):
+    """Retrieves a dictionary value for a plain key JSON path marker.
+
+    :param dict data_obj: The current data object.
+    :param str key: An unescaped key name.
+    :param type|None val_type: Expected type of the value.
+    :param bool create_dict_path create a dict path.
+    :return: tuple with two values: first is a result and second
+             a boolean flag telling if this value exists or not.
+    """
+
+    if key in data_obj:
+        value = data_obj[key]
+        _check_key_type(key, value, val_type)
+        return value, True
+    if val_type is not None:
+        if not isinstance(data_obj, dict):
+            raise XJPathError('Accessed object must be a dict type '
+                              'for the key: "%s"' % key)
+        if create_dict_path:
+            value = data_obj[key] = val_type()
+            return value, True
+    return None, False
+
+
 def _split_path(xj_path):
     """Extract the last piece of XJPath.
 
@@ -274,17 +528,12 @@ def validate_path(xj_path):
     if not isinstance(xj_path, str):
         raise XJPathError('XJPath must be a string')
 
-    for path in split(xj_path, '.'):
-        if path == '*':
-            continue
-        if path.startswith('@'):
-            if path == '@first' or path == '@last':
-                continue
-            try:
-                int(path[1:])
-            except ValueError:
-                raise XJPathError('Array index must be either integer or '
-                                  '@first or @last')
+    for kind, key, _ in compile(xj_path).steps:
+        if kind == _BAD_INDEX:
+            raise XJPathError('Array index must be either integer or '
+                              '@first or @last')
+        if kind == _BAD_PREDICATE:
+            raise XJPathError(*key)
 
 
 _KEY_SPLIT = {
@@ -349,85 +598,1528 @@ def _clean_key_type(key_name, escape_char=ESCAPE_SEQ):
     return None, key_name
 
 
+# Kinds of compiled path steps.
+_KEY = 0
+_INDEX = 1
+_WILDCARD = 2
+_BAD_INDEX = 3
+_BAD_PREDICATE = 4
+_DESCENDANT = 5
+_SLICE = 6
+
+# Steps matching any number of values, their results are tuples.
+_MARKERS = (_WILDCARD, _DESCENDANT, _SLICE)
+
+# Predicate operators, two character ones go first.
+_OPERATORS = collections.OrderedDict((
+    ('!=', operator.ne),
+    ('>=', operator.ge),
+    ('<=', operator.le),
+    ('=', operator.eq),
+    ('>', operator.gt),
+    ('<', operator.lt),
+))
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+_NUMBER_RE = re.compile(r'-?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?$')
+
+_DESCENDANT_RE = re.compile(r'\*\*([0-9]*)$')
+
+
+def _parse_step(top_key):
+    """Translates a single XJPath key into a compiled step.
+
+    :param str top_key: A path key with escaped dots already resolved.
+    :rtype: tuple
+    :return: A tuple of a step kind, a key or an index and an expected type.
+    """
+
+    if top_key == '*':
+        return _WILDCARD, None, None
+    match = _DESCENDANT_RE.match(top_key)
+    if match:
+        max_depth = match.group(1)
+        return _DESCENDANT, int(max_depth) if max_depth else None, None
+    val_type, key = _clean_key_type(top_key)
+    if top_key.startswith('@'):
+        try:
+            if ':' in key:
+                return _SLICE, _get_array_slice(key), val_type
+            return _INDEX, _get_array_index(key), val_type
+        except XJPathError as e:
+            # Bad indexes fail at lookup time only if they are reached.
+            return _BAD_INDEX, e.args, val_type
+    return _KEY, unescape(key), val_type
+
+
+def _scan_brackets(text, start, stop_chars):
+    """Finds the first of stop_chars outside of nested brackets.
+
+    :param str text: Text to scan.
+    :param int start: Position to start from.
+    :param str stop_chars: Characters to look for.
+    :rtype: int
+    :return: Position of the found character or -1.
+    """
+
+    depth = 0
+    pos = start
+    while pos < len(text):
+        char = text[pos]
+        if char == ESCAPE_SEQ:
+            pos += 2
+            continue
+        if char in stop_chars and depth == 0:
+            return pos
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        pos += 1
+    return -1
+
+
+def _parse_literal(text):
+    """Translates a predicate literal into a value."""
+
+    if len(text) > 1 and text[0] == text[-1] and text[0] in '"\'':
+        return unescape(text[1:-1])
+    if text in _LITERALS:
+        return _LITERALS[text]
+    if _NUMBER_RE.match(text):
+        if text.lstrip('-').isdigit():
+            return int(text)
+        return float(text)
+    return unescape(text)
+
+
+def _match_function(steps, compare, value):
+    """Builds a function telling if an element matches a predicate.
+
+    Sub paths of plain keys, the most common ones, are followed without
+    the lookup engine.
+    """
+
+    if any(kind != _KEY or val_type is not None
+           for kind, _, val_type in steps):
+        def match(item):
+            try:
+                item, exists = _walk(item, steps, False)
+                return exists and (compare is None or compare(item, value))
+            except (XJPathError, TypeError):
+                return False
+    elif len(steps) == 1:
+        key = steps[0][1]
+
+        def match(item):
+            try:
+                return key in item and (compare is None or
+                                        compare(item[key], value))
+            except TypeError:
+                return False
+    else:
+        keys = tuple(key for _, key, _ in steps)
+
+        def match(item):
+            try:
+                for key in keys:
+                    if key not in item:
+                        return False
+                    item = item[key]
+                return compare is None or compare(item, value)
+            except TypeError:
+                return False
+    return match
+
+
+class _Predicate(object):
+    """A filter of elements matched by a '*[...]' marker.
+
+    An element matches if the sub path exists in it and, when an operator
+    is given, the found value compares to the literal. Values that cannot
+    be compared and lookup errors make an element not match.
+    """
+
+    __slots__ = ('path', 'op', 'value', 'steps', 'match')
+
+    def __init__(self, path, op=None, value=None):
+        """
+        :param str path: A XJPath expression relative to an element.
+        :param str|None op: One of =, !=, >, >=, < or <=.
+        :param value: A literal to compare with.
+        """
+
+        self.path = path
+        self.op = op
+        self.value = value
+        self.steps = _parse_steps(path)
+        self.match = _match_function(
+            self.steps, _OPERATORS[op] if op is not None else None, value)
+
+    def __eq__(self, other):
+        if isinstance(other, _Predicate):
+            return ((self.path, self.op, self.value) ==
+                    (other.path, other.op, other.value))
+        return NotImplemented
+
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    def __hash__(self):
+        return hash((self.path, self.op, self.value))
+
+    def __repr__(self):
+        if self.op is None:
+            return '_Predicate(%r)' % self.path
+        return '_Predicate(%r, %r, %r)' % (self.path, self.op, self.value)
+
+
+def _parse_predicate(body):
+    """Translates the body of a '*[...]' marker into a compiled step.
+
+    :param str body: Text between the brackets.
+    :rtype: tuple
+    """
+
+    pos = _scan_brackets(body, 0, '=!<>')
+    if pos < 0:
+        predicate = _Predicate(body)
+    else:
+        for op in _OPERATORS:
+            if body.startswith(op, pos):
+                literal = body[pos + len(op):]
+                break
+        else:
+            literal = None
+        if not literal or literal[0] in '=!<>':
+            return _BAD_PREDICATE, ('Invalid predicate', (body,)), None
+        predicate = _Predicate(body[:pos], op, _parse_literal(literal))
+    for kind, key, _ in predicate.steps:
+        if kind == _BAD_INDEX or kind == _BAD_PREDICATE:
+            return _BAD_PREDICATE, key, None
+    return _WILDCARD, predicate, None
+
+
+def _parse_steps(xj_path):
+    """Splits XJPath expression into a tuple of compiled steps.
+
+    :param str xj_path: A XJPath expression.
+    :rtype: tuple[tuple]
+    """
+
+    steps = []
+    while xj_path and xj_path != '.':
+        if xj_path.startswith('*[') and not xj_path.startswith('*[]'):
+            end = _scan_brackets(xj_path, 2, ']')
+            rest = xj_path[end + 1:]
+            if end > 0 and (not rest or rest[0] == '.'):
+                steps.append(_parse_predicate(xj_path[2:end]))
+                xj_path = rest[1:]
+                continue
+        res = list(split(xj_path, '.', maxsplit=1))
+        steps.append(_parse_step(res[0]))
+        xj_path = res[1] if len(res) > 1 else None
+    return tuple(steps)
+
+
+_NOTHING = object()
+
+# Lookup observer installed by xjpath.instrument, None when disabled.
+_instrumentation = None
+
+
+def _set_instrumentation(instrumentation):
+    global _instrumentation
+    _instrumentation = instrumentation
+
+
+def _descendant_type(steps):
+    """Returns a type of containers the steps after '**' apply to."""
+
+    if steps:
+        kind = steps[0][0]
+        if kind == _KEY:
+            return dict
+        if kind == _INDEX or kind == _SLICE:
+            return list
+    return (dict, list)
+
+
+def _iter_descendants(data_obj, max_depth, node_type):
+    """Yields the data_obj and all containers nested in it depth first.
+
+    An explicit stack of element iterators is used, so the depth of the
+    data_obj is not limited by the recursion limit.
+
+    :param dict|list data_obj: An object to look into.
+    :param int|None max_depth: Maximum nesting level to descend to, the
+                               data_obj itself is level 0.
+    :param type|tuple node_type: Type of containers to yield.
+    :rtype: __generator
+    """
+
+    if isinstance(data_obj, node_type):
+        yield data_obj
+    if max_depth == 0:
+        return
+    stack = [iter(data_obj.values() if isinstance(data_obj, dict)
+                  else data_obj)]
+    while stack:
+        value = next(stack[-1], _NOTHING)
+        if value is _NOTHING:
+            stack.pop()
+            continue
+        if isinstance(value, dict):
+            items = value.values()
+        elif isinstance(value, list):
+            items = value
+        else:
+            continue
+        if isinstance(value, node_type):
+            yield value
+        if max_depth is None or len(stack) < max_depth:
+            stack.append(iter(items))
+
+
+class _StepsLookup(object):
+    """Base of documents that look compiled steps up on their own.
+
+    Subclasses define lookup_steps(steps, create_dict_path) returning a
+    (value, exists) tuple. It is checked when a subclass is created, not
+    with abc, which would make the isinstance check in _walk slower.
+    """
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'lookup_steps', None)):
+            raise TypeError('%s must define lookup_steps' % cls.__name__)
+
+
+def _walk(data_obj, steps, create_dict_path):
+    """Looks up compiled steps in the data_obj without recursion.
+
+    Every '*', '**' and slice step pushes a frame with an iterator over
+    the elements, the position of the next step and the list of values found
+    for it. Once the iterator is exhausted the frame is replaced by a tuple
+    of its values.
+
+    :param dict|list data_obj: An object to look into.
+    :param tuple steps: Compiled path steps.
+    :param bool create_dict_path: Create an element if type is specified.
+    :return: A tuple where 0 value is an extracted value and a second
+             field that tells if value either was found or not found.
+    """
+
+    if isinstance(data_obj, _StepsLookup):
+        return data_obj.lookup_steps(steps, create_dict_path)
+
+    steps_len = len(steps)
+    pos = 0
+    stack = []
+    while True:
+        # Go down until the path ends, a value is missing or '*' is met.
+        exists = True
+        while pos < steps_len:
+            kind, key, val_type = steps[pos]
+            pos += 1
+            if kind == _KEY:
+                if val_type is None:
+                    if key in data_obj:
+                        data_obj = data_obj[key]
+                        continue
+                    exists = False
+                    break
+                data_obj, exists = _dict_element(data_obj, key, val_type,
+                                                 create_dict_path)
+                if not exists:
+                    break
+            elif kind == _WILDCARD:
+                if isinstance(data_obj, list):
+                    items = data_obj
+                elif isinstance(data_obj, dict):
+                    items = data_obj.values()
+                else:
+                    exists = False
+                    break
+                if key is not None:
+                    # Filtered out elements are skipped while iterating.
+                    items = filter(key.match, items)
+                if pos == steps_len:
+                    data_obj = tuple(items)
+                    break
+                stack.append((iter(items), pos, []))
+                exists = None
+                break
+            elif kind == _DESCENDANT:
+                if not isinstance(data_obj, (dict, list)):
+                    exists = False
+                    break
+                items = _iter_descendants(data_obj, key,
+                                          _descendant_type(steps[pos:]))
+                if create_dict_path:
+                    # Values created on the way must not be descended to.
+                    items = iter(tuple(items))
+                if pos == steps_len:
+                    data_obj = tuple(items)
+                    break
+                stack.append((items, pos, []))
+                exists = None
+                break
+            elif kind == _SLICE:
+                if not isinstance(data_obj, (list, tuple)):
+                    exists = False
+                    break
+                items = _slice_items(data_obj, key, val_type)
+                if pos == steps_len:
+                    data_obj = tuple(items)
+                    break
+                stack.append((items, pos, []))
+                exists = None
+                break
+            elif kind == _INDEX:
+                data_obj, exists = _single_array_element(data_obj, key,
+                                                         val_type)
+                if not exists:
+                    break
+            else:
+                raise XJPathError(*key)
+
+        if exists is False:
+            data_obj = None
+
+        # Go up collecting results until there is an element to descend to.
+        while stack:
+            items, pos, res = stack[-1]
+            if exists:
+                res.append(data_obj)
+            data_obj = next(items, _NOTHING)
+            if data_obj is not _NOTHING:
+                break
+            stack.pop()
+            data_obj = tuple(res)
+            exists = True
+        else:
+            return data_obj, exists
+
+
+def _iter_walk(data_obj, steps, flatten):
+    """Yields values matched by compiled steps in the data_obj.
+
+    Steps are split into segments on '*', '**' and slice markers. Segments
+    are evaluated by _walk and markers push element iterators to an
+    explicit stack, so values are produced one at a time.
+
+    :param dict|list data_obj: An object to look into.
+    :param tuple steps: Compiled path steps.
+    :param bool flatten: Iterate over elements of every marker if True,
+                         otherwise only over the first one.
+    :rtype: __generator
+    """
+
+    segments = []
+    markers = []
+    segment_start = 0
+    for pos, step in enumerate(steps):
+        if step[0] in _MARKERS:
+            segments.append(steps[segment_start:pos])
+            markers.append(step)
+            segment_start = pos + 1
+            if not flatten:
+                break
+    segments.append(steps[segment_start:])
+
+    last_level = len(segments) - 1
+    stack = [iter((data_obj,))]
+    while stack:
+        data_obj = next(stack[-1], _NOTHING)
+        if data_obj is _NOTHING:
+            stack.pop()
+            continue
+        level = len(stack) - 1
+        value, exists = _walk(data_obj, segments[level], False)
+        if not exists:
+            continue
+        if level == last_level:
+            yield value
+            continue
+        kind, key, val_type = markers[level]
+        if kind == _DESCENDANT:
+            if not isinstance(value, (dict, list)):
+                continue
+            items = _iter_descendants(value, key,
+                                      _descendant_type(segments[level + 1]))
+        elif kind == _SLICE:
+            if not isinstance(value, (list, tuple)):
+                continue
+            items = _slice_items(value, key, val_type)
+        else:
+            if isinstance(value, list):
+                items = value
+            elif isinstance(value, dict):
+                items = value.values()
+            else:
+                continue
+            if key is not None:
+                items = filter(key.match, items)
+        if level + 1 < last_level:
+            stack.append(iter(items))
+            continue
+
+        # Elements of the last marker are looked into right away.
+        segment = segments[last_level]
+        if not segment:
+            yield from items
+        elif len(segment) == 1 and segment[0][0] == _KEY:
+            _, key, val_type = segment[0]
+            for item in items:
+                if key in item:
+                    value = item[key]
+                    if val_type is not None and not isinstance(value,
+                                                               val_type):
+                        _check_key_type(key, value, val_type)
+                    yield value
+                elif val_type is not None:
+                    # Raises if the element is not a dict.
+                    _dict_element(item, key, val_type, False)
+        else:
+            for item in items:
+                value, exists = _walk(item, segment, False)
+                if exists:
+                    yield value
+
+
+def _strict_result(value, exists, xj_path, force_type):
+    """Returns a found value or raises XJPathError as strict lookups do."""
+
+    if exists:
+        if force_type is not None:
+            if not isinstance(value, force_type):
+                raise XJPathError('Found value is a wrong type',
+                                  (xj_path, force_type))
+        return value
+    else:
+        raise XJPathError('Path does not exist', (xj_path,))
+
+
+# Write operations.
+_SET = 0
+_SETDEFAULT = 1
+_DELETE = 2
+
+
+def _check_writable(steps):
+    """Raises XJPathError if compiled steps cannot be written to."""
+
+    if not steps:
+        raise XJPathError('Cannot write to the root of the data object')
+    for kind, key, _ in steps:
+        if kind == _BAD_INDEX or kind == _BAD_PREDICATE:
+            raise XJPathError(*key)
+    if steps[-1][0] == _DESCENDANT:
+        raise XJPathError('Cannot write to a "**" marker')
+
+
+def _write_child(data_obj, step, create):
+    """Retrieves a child container on the way to a write target.
+
+    :param dict|list data_obj: The current data object.
+    :param tuple step: A compiled key or index step.
+    :param bool create: Create a missing dictionary value.
+    :return: The child or _NOTHING if it is missing and not created.
+    """
+
+    kind, key, val_type = step
+    if kind == _KEY:
+        if not isinstance(data_obj, dict):
+            raise XJPathError('Accessed object must be a dict type '
+                              'for the key: "%s"' % key)
+        if key in data_obj:
+            value = data_obj[key]
+            _check_key_type(key, value, val_type)
+            return value
+        if not create:
+            return _NOTHING
+        if val_type is None:
+            val_type = dict
+        elif val_type is not dict and val_type is not list:
+            raise XJPathError('Cannot create a "%s" container for the key: '
+                              '"%s"' % (val_type.__name__, key))
+        value = data_obj[key] = val_type()
+        return value
+
+    if not isinstance(data_obj, (list, tuple)):
+        raise XJPathError('Expected the list element type, but "%s" found' %
+                          type(data_obj).__name__)
+    try:
+        value = data_obj[key]
+    except IndexError:
+        if not create:
+            return _NOTHING
+        raise XJPathError('Array index is out of range', (key,))
+    _check_index_type(key, value, val_type)
+    return value
+
+
+def _write_items(data_obj, predicate):
+    """Returns elements a '*' marker iterates over in a write."""
+
+    if isinstance(data_obj, (list, tuple)):
+        items = data_obj
+    elif isinstance(data_obj, dict):
+        items = data_obj.values()
+    else:
+        raise XJPathError('Expected a dict or a list for "*", but "%s" '
+                          'found' % type(data_obj).__name__)
+    if predicate is not None:
+        return [item for item in items if predicate.match(item)]
+    return items
+
+
+def _write_slice_items(data_obj, array_slice, val_type):
+    """Returns elements a slice marker iterates over in a write."""
+
+    if not isinstance(data_obj, (list, tuple)):
+        raise XJPathError('Expected the list element type, but "%s" found' %
+                          type(data_obj).__name__)
+    return list(_slice_items(data_obj, array_slice, val_type))
+
+
+def _write_target(data_obj, step, op, value, res):
+    """Applies a write operation to the last step of a path.
+
+    :param dict|list data_obj: A container of the target.
+    :param tuple step: The last compiled step.
+    :param int op: _SET, _SETDEFAULT or _DELETE.
+    :param value: A value to set.
+    :param list res: Values set, kept or deleted are appended here.
+    """
+
+    kind, key, val_type = step
+    if kind == _WILDCARD:
+        if op == _SETDEFAULT:
+            res.extend(_write_items(data_obj, key))
+        elif isinstance(data_obj, dict):
+            item_keys = [item_key for item_key, item in data_obj.items()
+                         if key is None or key.match(item)]
+            for item_key in item_keys:
+                if op == _DELETE:
+                    res.append(data_obj.pop(item_key))
+                else:
+                    data_obj[item_key] = value
+                    res.append(value)
+        elif isinstance(data_obj, list):
+            matches = [key is None or key.match(item) for item in data_obj]
+            if op == _DELETE:
+                res.extend(itertools.compress(data_obj, matches))
+                data_obj[:] = [item for item, match in zip(data_obj, matches)
+                               if not match]
+            else:
+                for idx, match in enumerate(matches):
+                    if match:
+                        data_obj[idx] = value
+                        res.append(value)
+        else:
+            raise XJPathError('Expected a dict or a list for "*", but "%s" '
+                              'found' % type(data_obj).__name__)
+        return
+
+    if kind == _SLICE:
+        if op == _SETDEFAULT:
+            res.extend(_write_slice_items(data_obj, key, val_type))
+            return
+        if not isinstance(data_obj, list):
+            raise XJPathError('Expected the list element type, but "%s" '
+                              'found' % type(data_obj).__name__)
+        if op == _DELETE:
+            res.extend(data_obj[key])
+            del data_obj[key]
+            return
+        for idx in range(*key.indices(len(data_obj))):
+            _check_index_type(idx, value, val_type)
+            data_obj[idx] = value
+            res.append(value)
+        return
+
+    if kind == _KEY:
+        if not isinstance(data_obj, dict):
+            raise XJPathError('Accessed object must be a dict type '
+                              'for the key: "%s"' % key)
+        if key in data_obj:
+            if op == _SETDEFAULT:
+                value = data_obj[key]
+                _check_key_type(key, value, val_type)
+                res.append(value)
+                return
+            if op == _DELETE:
+                res.append(data_obj.pop(key))
+                return
+        elif op == _DELETE:
+            return
+        _check_key_type(key, value, val_type)
+        data_obj[key] = value
+        res.append(value)
+        return
+
+    if not isinstance(data_obj, list):
+        raise XJPathError('Expected the list element type, but "%s" found' %
+                          type(data_obj).__name__)
+    try:
+        current = data_obj[key]
+    except IndexError:
+        if op == _DELETE:
+            return
+        raise XJPathError('Array index is out of range', (key,))
+    if op == _SETDEFAULT:
+        _check_index_type(key, current, val_type)
+        res.append(current)
+    elif op == _DELETE:
+        del data_obj[key]
+        res.append(current)
+    else:
+        _check_index_type(key, value, val_type)
+        data_obj[key] = value
+        res.append(value)
+
+
+def _write(data_obj, steps, pos, op, value, res):
+    """Applies a write operation at every target of steps from pos on.
+
+    Missing dictionary values are created on the way down unless the
+    operation is a delete or the next step is a '*' marker. If the write
+    fails below them, the created values are removed again.
+    """
+
+    last = len(steps) - 1
+    # The dict and key of the first created value, values created after
+    # it are nested in it.
+    created = None
+    try:
+        while pos < last:
+            step = steps[pos]
+            kind, key, val_type = step
+            if kind == _KEY and isinstance(data_obj, dict):
+                if key in data_obj and val_type is None:
+                    # Existing plain keys are the most common case.
+                    data_obj = data_obj[key]
+                    pos += 1
+                    continue
+                if created is None and key not in data_obj:
+                    created = data_obj, key
+            elif kind == _WILDCARD:
+                for item in _write_items(data_obj, key):
+                    _write(item, steps, pos + 1, op, value, res)
+                return
+            elif kind == _DESCENDANT:
+                # Nodes are collected first, writes may change the tree.
+                if isinstance(data_obj, (dict, list)):
+                    for item in list(_iter_descendants(
+                            data_obj, key, _descendant_type(steps[pos + 1:]))):
+                        _write(item, steps, pos + 1, op, value, res)
+                return
+            elif kind == _SLICE:
+                for item in _write_slice_items(data_obj, key, val_type):
+                    _write(item, steps, pos + 1, op, value, res)
+                return
+            create = op != _DELETE and steps[pos + 1][0] not in _MARKERS
+            data_obj = _write_child(data_obj, step, create)
+            if data_obj is _NOTHING:
+                return
+            pos += 1
+        _write_target(data_obj, steps[last], op, value, res)
+    except Exception:
+        if created is not None:
+            parent, key = created
+            parent.pop(key, None)
+        raise
+
+
+class CompiledPath(object):
+    """XJPath expression parsed once into a sequence of lookup steps.
+
+    Instances are immutable and picklable, so they can be created at
+    import time and shared between threads and processes.
+    """
+
+    __slots__ = ('_path', '_steps')
+
+    def __init__(self, xj_path):
+        if not isinstance(xj_path, str):
+            raise XJPathError('XJPath must be a string')
+        object.__setattr__(self, '_path', xj_path)
+        object.__setattr__(self, '_steps', _parse_steps(xj_path))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompiledPath is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('CompiledPath is immutable')
+
+    def __reduce__(self):
+        return compile, (self._path,)
+
+    def __eq__(self, other):
+        if isinstance(other, CompiledPath):
+            return self._path == other._path
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, CompiledPath):
+            return self._path != other._path
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._path)
+
+    def __repr__(self):
+        return 'CompiledPath(%r)' % self._path
+
+    @property
+    def path(self):
+        """Source XJPath expression."""
+        return self._path
+
+    @property
+    def steps(self):
+        """Tuple of compiled steps."""
+        return self._steps
+
+    def lookup(self, data_obj, create_dict_path=False):
+        """Looks up the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param bool create_dict_path: Create an element if type is specified.
+        :return: A tuple where 0 value is an extracted value and a second
+                 field that tells if value either was found or not found.
+        """
+
+        if _instrumentation is None:
+            return _walk(data_obj, self._steps, create_dict_path)
+        return _instrumentation.observe(self, data_obj, create_dict_path)
+
+    def strict_lookup(self, data_obj, force_type=None):
+        """Looks up the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param type force_type: A type that excepted to be.
+        :return: Returns result or throws an exception if value is not found.
+        """
+
+        value, exists = self.lookup(data_obj)
+        return _strict_result(value, exists, self._path, force_type)
+
+    def iter_lookup(self, data_obj, flatten=False, limit=None):
+        """Yields values matched by the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param bool flatten: Yield values matched by every '*' marker
+                             instead of tuples for nested markers.
+        :param int|None limit: Maximum number of values to yield.
+        :rtype: __generator
+        """
+
+        res = _iter_walk(data_obj, self._steps, flatten)
+        if limit is not None:
+            res = itertools.islice(res, limit)
+        return res
+
+    def get(self, data_obj, default=None):
+        """Looks up the path in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :param default: A value to return if path cannot be resolved.
+        :return: Found value or default.
+        """
+
+        try:
+            value, exists = self.lookup(data_obj)
+        except (XJPathError, TypeError):
+            return default
+        return value if exists else default
+
+    def set(self, data_obj, value):
+        """Sets a value at the path in the data_obj.
+
+        Missing dictionary values on the way are created as dicts, or as
+        lists and dicts according to their type postfix. A '*' marker sets
+        every element it matches.
+
+        A failed write is not atomic: values created on the way to the
+        failing target are removed, but targets of markers set before it
+        keep their new values.
+
+        :param dict|list data_obj: An object to modify.
+        :param value: A value to set.
+        :rtype: int
+        :return: Number of values set.
+        """
+
+        _check_writable(self._steps)
+        res = []
+        _write(data_obj, self._steps, 0, _SET, value, res)
+        return len(res)
+
+    def setdefault(self, data_obj, default=None):
+        """Sets a value at the path unless it exists already.
+
+        :param dict|list data_obj: An object to modify.
+        :param default: A value to set if the path does not exist.
+        :return: The value at the path, or a tuple of values at all paths
+                 matched by '*' markers.
+        """
+
+        _check_writable(self._steps)
+        res = []
+        _write(data_obj, self._steps, 0, _SETDEFAULT, default, res)
+        if any(step[0] in _MARKERS for step in self._steps):
+            return tuple(res)
+        return res[0]
+
+    def delete(self, data_obj):
+        """Deletes values at the path in the data_obj.
+
+        A '*' marker deletes every element it matches. Missing values are
+        ignored.
+
+        :param dict|list data_obj: An object to modify.
+        :rtype: int
+        :return: Number of values deleted.
+        """
+
+        _check_writable(self._steps)
+        res = []
+        _write(data_obj, self._steps, 0, _DELETE, None, res)
+        return len(res)
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ('hits', 'misses', 'evictions', 'maxsize', 'currsize'))
+
+
+class _LRUCache(object):
+    """Thread safe LRU cache of values built by a factory from a key."""
+
+    def __init__(self, factory, maxsize, maxbytes=None, sizeof=None):
+        """
+        :param callable factory: Builds a value for a key.
+        :param int maxsize: Maximum number of values.
+        :param int|None maxbytes: Maximum total size of values.
+        :param callable|None sizeof: Returns a size of a value, required
+                                     with maxbytes.
+        """
+
+        self._factory = factory
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._sizeof = sizeof
+        self._sizes = {}
+        self._bytes = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Changed on removal, so values built meanwhile are not stored.
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __call__(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                generation = self._generation
+            else:
+                self._hits += 1
+                self._data.move_to_end(key)
+                return value
+
+        # Build a value outside of the lock, the factory may be slow.
+        value = self._factory(key)
+        with self._lock:
+            if self._maxsize > 0 and generation == self._generation:
+                if self._maxbytes is not None:
+                    size = self._sizeof(value)
+                    if size > self._maxbytes:
+                        return value
+                    self._bytes += size - self._sizes.get(key, 0)
+                    self._sizes[key] = size
+                self._data[key] = value
+                self._shrink(self._maxsize)
+        return value
+
+    def _shrink(self, maxsize):
+        while len(self._data) > maxsize or (
+                self._maxbytes is not None and self._bytes > self._maxbytes):
+            key, _ = self._data.popitem(last=False)
+            if self._maxbytes is not None:
+                self._bytes -= self._sizes.pop(key)
+            self._evictions += 1
+
+    def resize(self, maxsize):
+        if maxsize < 0:
+            raise ValueError('Cache size cannot be negative')
+        with self._lock:
+            self._maxsize = maxsize
+            self._shrink(maxsize)
+
+    def discard(self, predicate):
+        """Removes values of keys the predicate returns True for."""
+
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+                if self._maxbytes is not None:
+                    self._bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self._maxsize, len(self._data))
+
+
+_path_cache = _LRUCache(CompiledPath, 1024)
+
+
+def compile(xj_path):
+    """Parses XJPath expression once for repeated lookups.
+
+    Parsed paths are kept in a process wide LRU cache, so repeated calls
+    with the same string return the same object.
+
+    :param str|CompiledPath xj_path: A XJPath expression.
+    :rtype: CompiledPath
+    :raise: XJPathError if path is not a string.
+    """
+
+    if isinstance(xj_path, CompiledPath):
+        return xj_path
+    if not isinstance(xj_path, str):
+        raise XJPathError('XJPath must be a string')
+    return _path_cache(xj_path)
+
+
+def cache_info():
+    """Returns statistics of the parsed paths cache.
+
+    :rtype: CacheInfo
+    """
+
+    return _path_cache.info()
+
+
+def cache_clear():
+    """Drops all parsed paths and resets the cache statistics."""
+
+    _path_cache.clear()
+
+
+def set_cache_size(maxsize):
+    """Changes the maximum number of parsed paths kept in the cache.
+
+    :param int maxsize: Number of paths, 0 disables caching.
+    """
+
+    _path_cache.resize(maxsize)
+
+
+class _TrieNode(object):
+    """A node of the PathSet prefix tree."""
+
+    __slots__ = ('children', 'terminals', 'slots', 'edges')
+
+    def __init__(self):
+        self.children = collections.OrderedDict()
+        self.terminals = []
+        self.slots = []
+        self.edges = ()
+
+    def add(self, slot, steps):
+        node = self
+        node.slots.append(slot)
+        for step in steps:
+            if step[0] in _MARKERS:
+                break
+            child = node.children.get(step)
+            if child is None:
+                child = node.children[step] = _TrieNode()
+            node = child
+            node.slots.append(slot)
+        else:
+            node.terminals.append(slot)
+
+    def compress(self, paths, depth=0):
+        """Builds edges the lookup walks along.
+
+        Every edge is a tuple of a flag telling if all steps are plain
+        keys, steps to follow and either a slot of the path that ends
+        there or a child node to continue with. A subtree used by a single
+        path, as well as the rest of a path from a '*' marker, becomes one
+        edge. A chain of nodes without branches is merged into one edge.
+        """
+
+        edges = []
+        for slot in self.slots:
+            steps = paths[slot].steps
+            if len(steps) > depth and steps[depth][0] in _MARKERS:
+                edges.append(_trie_edge(steps[depth:], slot))
+        for step, child in self.children.items():
+            if len(child.slots) == 1:
+                slot = child.slots[0]
+                edges.append(_trie_edge(paths[slot].steps[depth:], slot))
+                continue
+            steps = [step]
+            child_depth = depth + 1
+            while not child.terminals and len(child.children) == 1:
+                next_step, next_child = next(iter(child.children.items()))
+                if len(next_child.slots) < len(child.slots):
+                    break
+                steps.append(next_step)
+                child = next_child
+                child_depth += 1
+            child.compress(paths, child_depth)
+            edges.append(_trie_edge(tuple(steps), None, child))
+        self.edges = tuple(edges)
+
+
+def _trie_edge(steps, slot, child=None):
+    return (all(step[0] == _KEY for step in steps), steps, slot, child)
+
+
+def _walk_trie(node, data_obj, found):
+    """Looks up all paths of the prefix tree node in the data_obj.
+
+    :param _TrieNode node: A prefix tree node matching the data_obj.
+    :param dict|list data_obj: An object to look into.
+    :param dict found: Mapping of path slot to a found value to fill in.
+    """
+
+    for slot in node.terminals:
+        found[slot] = data_obj
+    for keys_only, steps, slot, child in node.edges:
+        if keys_only:
+            # Plain keys are cheaper to follow here than in _walk.
+            value = data_obj
+            exists = True
+            for _, key, val_type in steps:
+                if key in value:
+                    value = value[key]
+                    if val_type is None or isinstance(value, val_type):
+                        continue
+                    _check_key_type(key, value, val_type)
+                if val_type is not None:
+                    # Raises if the value is not a dict.
+                    _dict_element(value, key, val_type, False)
+                exists = False
+                break
+        else:
+            value, exists = _walk(data_obj, steps, False)
+
+        if exists:
+            if child is None:
+                found[slot] = value
+            else:
+                _walk_trie(child, value, found)
+
+
+class PathSet(object):
+    """A set of XJPath expressions looked up in a single traversal.
+
+    Paths are merged into a prefix tree, so a shared prefix is walked once
+    per document no matter how many paths start with it. Below a '*'
+    marker every path is evaluated by the lookup engine loop over the
+    container, which is cheaper than walking the tree element by element.
+    """
+
+    def __init__(self, paths):
+        """
+        :param iterable[str|CompiledPath] paths: XJPath expressions.
+        """
+
+        self.paths = tuple(compile(p) for p in paths)
+        self._root = _TrieNode()
+        for slot, path in enumerate(self.paths):
+            self._root.add(slot, path.steps)
+        self._root.compress(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def lookup(self, data_obj):
+        """Looks up all paths in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :rtype: tuple[tuple]
+        :return: (value, exists) tuples in the order paths were given.
+        """
+
+        found = {}
+        _walk_trie(self._root, data_obj, found)
+        return tuple((found[slot], True) if slot in found else (None, False)
+                     for slot in range(len(self.paths)))
+
+    def lookup_dict(self, data_obj):
+        """Looks up all paths in the data_obj.
+
+        :param dict|list data_obj: An object to look into.
+        :rtype: dict
+        :return: Mapping of a path string to a (value, exists) tuple.
+        """
+
+        return dict((path.path, res) for path, res in
+                    zip(self.paths, self.lookup(data_obj)))
+
+
+def extract_many(data_obj, paths):
+    """Looks up several paths in the data_obj in a single traversal.
+
+    Use PathSet directly to avoid building the prefix tree on every call.
+
+    :param dict|list data_obj: An object to look into.
+    :param iterable[str|CompiledPath] paths: XJPath expressions.
+    :rtype: dict
+    :return: Mapping of a path string to a (value, exists) tuple.
+    """
+
+    return PathSet(paths).lookup_dict(data_obj)
+
+
 def path_lookup(data_obj, xj_path, create_dict_path=False):
     """Looks up a xj path in the data_obj.
 
     :param dict|list data_obj: An object to look into.
-    :param str xj_path: A path to extract data from.
+    :param str|CompiledPath xj_path: A path to extract data from.
     :param bool create_dict_path: Create an element if type is specified.
     :return: A tuple where 0 value is an extracted value and a second
              field that tells if value either was found or not found.
     """
 
     if not xj_path or xj_path == '.':
+        if isinstance(data_obj, _StepsLookup):
+            return data_obj.lookup_steps((), create_dict_path)
         return data_obj, True
+    return compile(xj_path).lookup(data_obj, create_dict_path)
 
-    res = list(split(xj_path, '.', maxsplit=1))
-    top_key = res[0]
-    leftover = res[1] if len(res) > 1 else None
-    if top_key == '*':
-        return _full_sub_array(data_obj, leftover, create_dict_path)
-    elif top_key.startswith('@'):
-        return _single_array_element(data_obj, leftover, top_key,
-                                     create_dict_path)
-    else:
-        val_type, top_key = _clean_key_type(top_key)
-        top_key = unescape(top_key)
-        if top_key in data_obj:
-            value = data_obj[top_key]
-            if val_type is not None and not isinstance(value, val_type):
-                raise XJPathError(
-                    'Key %s expects type "%s", but found value type is "%s"' %
-                    (top_key, val_type.__name__, type(value).__name__))
-            if leftover:
-                return path_lookup(value, leftover, create_dict_path)
-            else:
-                return value, True
-        else:
-            if val_type is not None:
-                if not isinstance(data_obj, dict):
-                    raise XJPathError('Accessed object must be a dict type '
-                                      'for the key: "%s"' % top_key)
-                if create_dict_path:
-                    data_obj[top_key] = val_type()
-                else:
-                    return None, False
-                if leftover:
-                    return path_lookup(data_obj[top_key], leftover,
-                                       create_dict_path)
-                else:
-                    return data_obj[top_key], True
-            return None, False
+
+def iter_lookup(data_obj, xj_path, flatten=False, limit=None):
+    """Lazily yields values matched by a xj path in the data_obj.
+
+    A path without '*' markers yields at most one value. Otherwise values
+    found for every element of the first '*' marker are yielded one by
+    one, and nested markers produce tuples as in path_lookup unless
+    flatten is set.
+
+    :param dict|list data_obj: An object to look into.
+    :param str|CompiledPath xj_path: A path to extract data from.
+    :param bool flatten: Yield values matched by every '*' marker instead
+                         of tuples for nested markers.
+    :param int|None limit: Maximum number of values to yield. The lookup
+                           stops as soon as the limit is reached.
+    :rtype: __generator
+    """
+
+    return compile(xj_path).iter_lookup(data_obj, flatten, limit)
 
 
 def strict_path_lookup(data_obj, xj_path, force_type=None):
     """Looks up a xj path in the data_obj.
 
     :param dict|list data_obj: An object to look into.
-    :param str xj_path: A path to extract data from.
+    :param str|CompiledPath xj_path: A path to extract data from.
     :param type force_type: A type that excepted to be.
     :return: Returns result or throws an exception if value is not found.
     """
 
     value, exists = path_lookup(data_obj, xj_path)
-    if exists:
-        if force_type is not None:
-            if not isinstance(value, force_type):
-                raise XJPathError('Found value is a wrong type',
-                                  (xj_path, force_type))
-        return value
+    return _strict_result(value, exists, xj_path, force_type)
+
+
+class _UpdateNode(object):
+    """A node of the apply_updates prefix tree."""
+
+    __slots__ = ('children', 'targets', 'wildcard')
+
+    def __init__(self):
+        self.children = collections.OrderedDict()
+        self.targets = []
+        self.wildcard = False
+
+    def check(self):
+        """Tells if no entries of the subtree may refer to the same value.
+
+        Otherwise updates depend on their order and the tree cannot be
+        used.
+        """
+
+        steps = list(self.children)
+        steps.extend(step for step, _ in self.targets)
+        keys = set()
+        indexes = set()
+        for kind, key, _ in steps:
+            if kind == _DESCENDANT or kind == _SLICE:
+                return False
+            if kind == _WILDCARD:
+                # Updates may change what a predicate matches.
+                if len(steps) > 1 or key is not None:
+                    return False
+                self.wildcard = True
+                continue
+            seen = keys if kind == _KEY else indexes
+            if key in seen:
+                return False
+            seen.add(key)
+        # Negative and positive indexes may refer to the same element.
+        if len(set(idx < 0 for idx in indexes)) > 1:
+            return False
+        return all(child.check() for child in self.children.values())
+
+
+def _update_plan(paths):
+    """Builds a prefix tree of paths updated by apply_updates.
+
+    :param tuple[str] paths: XJPath expressions.
+    :rtype: _UpdateNode|None
+    :return: Root of the tree, or None if paths overlap and have to be
+             updated one by one.
+    """
+
+    all_steps = [compile(xj_path).steps for xj_path in paths]
+    for steps in all_steps:
+        _check_writable(steps)
+    for steps in all_steps:
+        for kind, _, _ in steps[:-1]:
+            # Slices are not hashable, and '**' and slices may refer to
+            # values of other paths anyway.
+            if kind == _DESCENDANT or kind == _SLICE:
+                return None
+    root = _UpdateNode()
+    for slot, steps in enumerate(all_steps):
+        node = root
+        for step in steps[:-1]:
+            child = node.children.get(step)
+            if child is None:
+                child = node.children[step] = _UpdateNode()
+            node = child
+        node.targets.append((steps[-1], slot))
+    return root if root.check() else None
+
+
+_update_plans = _LRUCache(_update_plan, 256)
+
+
+def _apply_plan(node, data_obj, values, res):
+    for step, slot in node.targets:
+        _write_target(data_obj, step, _SET, values[slot], res)
+    for step, child in node.children.items():
+        if step[0] == _WILDCARD:
+            for item in _write_items(data_obj, step[1]):
+                _apply_plan(child, item, values, res)
+        else:
+            created = (step[0] == _KEY and isinstance(data_obj, dict) and
+                       step[1] not in data_obj)
+            value = _write_child(data_obj, step, not child.wildcard)
+            if value is _NOTHING:
+                continue
+            try:
+                _apply_plan(child, value, values, res)
+            except Exception:
+                # As in _write, values created for a failed write are
+                # removed, outer calls remove the first created one.
+                if created:
+                    data_obj.pop(step[1], None)
+                raise
+
+
+def path_set(data_obj, xj_path, value):
+    """Sets a value at a xj path in the data_obj.
+
+    See CompiledPath.set for what is kept of a failed write.
+
+    :param dict|list data_obj: An object to modify.
+    :param str|CompiledPath xj_path: A path to set a value at.
+    :param value: A value to set.
+    :rtype: int
+    :return: Number of values set.
+    """
+
+    return compile(xj_path).set(data_obj, value)
+
+
+def path_setdefault(data_obj, xj_path, default=None):
+    """Sets a value at a xj path in the data_obj unless it exists already.
+
+    :param dict|list data_obj: An object to modify.
+    :param str|CompiledPath xj_path: A path to set a value at.
+    :param default: A value to set if the path does not exist.
+    :return: The value at the path, or a tuple of values at all paths
+             matched by '*' markers.
+    """
+
+    return compile(xj_path).setdefault(data_obj, default)
+
+
+def path_delete(data_obj, xj_path):
+    """Deletes values at a xj path in the data_obj.
+
+    :param dict|list data_obj: An object to modify.
+    :param str|CompiledPath xj_path: A path to delete.
+    :rtype: int
+    :return: Number of values deleted.
+    """
+
+    return compile(xj_path).delete(data_obj)
+
+
+def apply_updates(data_obj, updates):
+    """Sets values at many xj paths in the data_obj.
+
+    Paths are merged into a prefix tree, so a shared prefix is walked once.
+    Paths that refer to overlapping parts of the data_obj are set one by
+    one in the given order. If an update fails, updates made before it are
+    kept, except in dictionaries created on the way to the failed one,
+    which are removed.
+
+    :param dict|list data_obj: An object to modify.
+    :param iterable updates: (xj path, value) pairs.
+    :rtype: int
+    :return: Number of values set.
+    """
+
+    updates = list(updates)
+    paths = tuple(compile(xj_path).path for xj_path, _ in updates)
+    plan = _update_plans(paths)
+    res = []
+    if plan is None:
+        for xj_path, value in updates:
+            _write(data_obj, compile(xj_path).steps, 0, _SET, value, res)
     else:
-        raise XJPathError('Path does not exist', (xj_path,))
+        _apply_plan(plan, data_obj, [value for _, value in updates], res)
+    return len(res)
+
+
+def _paths_overlap(steps, other_steps):
+    """Tells if a value at one path may be within a value at another one.
+
+    Paths are compared by leading plain keys only, any other step is
+    assumed to overlap.
+    """
+
+    for (kind, key, _), (other_kind, other_key, _) in zip(steps,
+                                                          other_steps):
+        if kind != _KEY or other_kind != _KEY:
+            return True
+        if key != other_key:
+            return False
+    return True
+
+
+def _result_size(res):
+    """Estimates memory held by a cached (value, exists) lookup result.
+
+    Found values are shared with the data structure, only tuples built by
+    '*' markers are counted.
+    """
+
+    value = res[0]
+    size = sys.getsizeof(res)
+    if isinstance(value, tuple):
+        stack = [value]
+        while stack:
+            value = stack.pop()
+            size += sys.getsizeof(value)
+            stack.extend(item for item in value if isinstance(item, tuple))
+    return size
 
 
 class XJPath(object):
 
-    def __init__(self, data_structure):
-        self.data_structure = data_structure
+    def __init__(self, data_structure, cache_size=0, cache_bytes=None):
+        """
+        :param dict|list data_structure: An object to look into.
+        :param int cache_size: Number of lookup results to keep, lookups
+                               are not cached if 0.
+        :param int|None cache_bytes: Maximum memory taken by cached
+                                     results, estimated by sys.getsizeof.
+        """
+
+        self._cache = None
+        if cache_size < 0:
+            raise ValueError('Cache size cannot be negative')
+        if cache_size:
+            self._cache = _LRUCache(self._lookup, cache_size, cache_bytes,
+                                    _result_size if cache_bytes is not None
+                                    else None)
+        #: Bumped by every write through the instance.
+        self.version = 0
+        self._data_structure = data_structure
+
+    @property
+    def data_structure(self):
+        return self._data_structure
+
+    @data_structure.setter
+    def data_structure(self, data_structure):
+        self._data_structure = data_structure
+        self.invalidate()
+
+    def _lookup(self, item):
+        return path_lookup(self._data_structure, item)
+
+    def invalidate(self, path_prefix=None):
+        """Drops cached results after the data structure was changed.
+
+        Writes through the instance invalidate results they may affect,
+        call this after changing the data structure directly.
+
+        :param str|CompiledPath|None path_prefix: A changed path, results
+            of paths that may go through it or into it are dropped. All
+            results are dropped if None.
+        """
+
+        self.version += 1
+        if self._cache is None:
+            return
+        if path_prefix is None:
+            self._cache.discard(lambda key: True)
+            return
+        steps = compile(path_prefix).steps
+        self._cache.discard(
+            lambda key: _paths_overlap(compile(key).steps, steps))
+
+    def _written(self, item):
+        try:
+            compile(item)
+        except XJPathError:
+            # Nothing is written to an invalid path.
+            return
+        self.invalidate(item)
+
+    def cache_info(self):
+        """Returns statistics of the result cache.
+
+        :rtype: CacheInfo|None
+        """
+
+        return None if self._cache is None else self._cache.info()
 
     def __getitem__(self, item):
         try:
-            value, exists = path_lookup(self.data_structure, item)
+            if self._cache is None:
+                value, exists = path_lookup(self._data_structure, item)
+            else:
+                value, exists = self._cache(item)
         except XJPathError as e:
             raise IndexError('Path error: %s' % str(item), *e.args)
         except TypeError as e:
@@ -438,6 +2130,24 @@ class XJPath(object):
         else:
             raise IndexError('Path does not exist %s' % str(item))
 
+    def __setitem__(self, item, value):
+        try:
+            path_set(self._data_structure, item, value)
+        except XJPathError as e:
+            raise IndexError('Path error: %s' % str(item), *e.args)
+        finally:
+            self._written(item)
+
+    def __delitem__(self, item):
+        try:
+            deleted = path_delete(self._data_structure, item)
+        except XJPathError as e:
+            raise IndexError('Path error: %s' % str(item), *e.args)
+        finally:
+            self._written(item)
+        if not deleted:
+            raise IndexError('Path does not exist %s' % str(item))
+
     def get(self, path, default=None):
         try:
             return self[path]
@@ -446,37 +2156,5 @@ class XJPath(object):
 
 
 if __name__ == '__main__':
-    import argparse
-    import json
-    import sys
-
-    parser = argparse.ArgumentParser(
-        description='JSON data structure lookup. This utility performs a XJPath'
-        ' lookup on a given data structure and writes the result as JSON.')
-    parser.add_argument('-i', '--input-file', default=None,
-                        help='Path to JSON data structure. Default is STDIN.')
-    parser.add_argument('-o', '--output-file', default=None,
-                        help='Where to write XJPath result. Default is STDOUT.')
-    parser.add_argument('-m', '--multiple-lines', action='store_true',
-                        help='Expect multiple newline-deliminated JSON objects.')
-    parser.add_argument('path', type=str,
-                        help='XJPath expression to apply to data structure.')
-    args = parser.parse_args()
-
-    input_file = sys.stdin if args.input_file is None else open(args.input_file)
-    output_file = (sys.stdout if args.output_file is None
-                   else open(args.output_file, 'w'))
-
-    def dump_xjpath(obj):
-        xj = XJPath(obj)
-        output_file.write(json.dumps(xj[args.path]))
-        output_file.write('\n')
-
-    with input_file, output_file:
-        if args.multiple_lines:
-            for line in input_file:
-                line = line.strip()
-                if line:
-                    dump_xjpath(json.loads(line))
-        else:
-            dump_xjpath(json.load(input_file))
+    from xjpath import cli
+    cli.main()